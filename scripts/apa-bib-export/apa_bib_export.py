@@ -6,20 +6,47 @@ Reads a BibTeX file, optionally filters by group, sorts by publication year and
 formats entries in APA style (with first-name initials), includes journal, volume,
 number, pages, and generates Markdown or HTML output with clickable DOIs.
 
+Several groups and formats can be exported in one run: the .bib is parsed once
+and every list is written to Export/ next to the .bib, leaving the other files
+of that folder untouched.
+
 Usage:
-    python3 export_bib.py --file /path/to/library.bib [--group GroupName] [--output md|html]
+    python3 export_bib.py --file /path/to/library.bib [--group GroupName ...]
+                          [--output md|html|html-md ...]
 """
 
 import argparse
+import hashlib
+import html
+import json
+import os
 import sys
 import datetime
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
-import bibtexparser
-from bibtexparser.customization import convert_to_unicode
 from pylatexenc.latex2text import LatexNodes2Text
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from bib_cache import load_bib_entries
+from group_filter import GroupIndex, GroupQueryError
+
+# BibTeX fields used by the export (filter, sorting and APA formatting)
+BIB_FIELDS = ('author', 'year', 'title', 'journal', 'booktitle',
+              'volume', 'number', 'pages', 'doi', 'groups')
+
+# Output formats: Markdown, HTML rendered directly, HTML converted from the
+# Markdown with the markdown package (former "html" behaviour)
+FORMATS = ('md', 'html', 'html-md')
+EXTENSIONS = {'md': 'md', 'html': 'html', 'html-md': 'html'}
+
+# Fields that determine a rendered citation; bump RENDER_VERSION whenever
+# entry_to_apa() or its helpers change their output
+RENDER_FIELDS = ('author', 'year', 'title', 'journal', 'booktitle',
+                 'volume', 'number', 'pages', 'doi')
+RENDER_VERSION = 1
+
 
 def format_authors(author_field: str) -> str:
     """
@@ -49,16 +76,20 @@ def format_authors(author_field: str) -> str:
 import re
 from pylatexenc.latex2text import LatexNodes2Text
 
+_LATEX = LatexNodes2Text()
+
+
+@lru_cache(maxsize=4096)
 def clean_text(latex_str: str) -> str:
     """
     Convert LaTeX markup into plain text.  
     Falls back to removing braces and backslashes if pylatexenc fails.
+    Conversions are memoized: journal names repeat across many entries.
     """
     if not latex_str:
         return ''
     try:
-        converter = LatexNodes2Text()
-        return converter.latex_to_text(latex_str).strip()
+        return _LATEX.latex_to_text(latex_str).strip()
     except Exception:
         # Simple fallback: remove braces and backslashes
         text = re.sub(r'[{}\\\\]', '', latex_str)
@@ -66,21 +97,36 @@ def clean_text(latex_str: str) -> str:
 
 
 
-def entry_to_apa(entry: dict) -> str:
+# Inline HTML tags and character entities found in titles (e.g. <i>Shank2</i>, &aacute;)
+_HTML_RAW = re.compile(r'(<[/!?]?[A-Za-z][^<>]*>|&#?\w+;)')
+
+
+def _html_text(text: str) -> str:
+    """Escape text for HTML, passing inline tags and entities through as the markdown package does."""
+    parts = _HTML_RAW.split(text)
+    return ''.join(p if i % 2 else html.escape(p, quote=False) for i, p in enumerate(parts))
+
+
+def entry_to_apa(entry: dict, as_html: bool = False) -> str:
     """
     Format a single BibTeX entry into an APA citation string.
     Includes journal, volume(issue), pages and DOI.
+    With as_html=True the citation is returned as escaped HTML instead of Markdown.
     """
-    author = format_authors(entry.get('author', ''))
-    year = entry.get('year', 'n.d.')
-    title = clean_text(entry.get('title', ''))
-    journal = clean_text(entry.get('journal', entry.get('booktitle', '')))
-    volume = entry.get('volume', '')
-    number = entry.get('number', '')
-    pages = entry.get('pages', '')
+    esc = _html_text if as_html else (lambda s: s)
+    author = esc(format_authors(entry.get('author', '')))
+    year = esc(entry.get('year', 'n.d.'))
+    title = esc(clean_text(entry.get('title', '')))
+    journal = esc(clean_text(entry.get('journal', entry.get('booktitle', ''))))
+    volume = esc(entry.get('volume', ''))
+    number = esc(entry.get('number', ''))
+    pages = esc(entry.get('pages', ''))
     doi = entry.get('doi', '')
 
-    citation = f"{author} ({year}). *{title}*."
+    if as_html:
+        citation = f"{author} ({year}). <em>{title}</em>."
+    else:
+        citation = f"{author} ({year}). *{title}*."
     if journal:
         citation += f" {journal}"
         if volume:
@@ -91,10 +137,137 @@ def entry_to_apa(entry: dict) -> str:
             citation += f", {pages}"
         citation += "."
     if doi:
-        citation += f" doi:[{doi}](https://doi.org/{doi})"
+        if as_html:
+            citation += f' doi:<a href="https://doi.org/{esc(doi)}">{esc(doi)}</a>'
+        else:
+            citation += f" doi:[{doi}](https://doi.org/{doi})"
     return citation
 
 
+def group_by_year(entries: list) -> list:
+    """
+    Group entries by year (most recent first), each year sorted by author.
+    Returns a list of (year, entries) pairs.
+    """
+    def sort_key(e):
+        y = int(e.get('year', '0')) if e.get('year', '').isdigit() else 0
+        return (-y, e.get('author', ''))
+
+    grouped = {}
+    for entry in sorted(entries, key=sort_key):
+        grouped.setdefault(entry.get('year', 'n.d.'), []).append(entry)
+    return [(year, sorted(grouped[year], key=lambda x: x.get('author', '')))
+            for year in sorted(grouped.keys(), reverse=True)]
+
+
+def render_key(entry: dict) -> str:
+    """Hash of the fields a citation is rendered from (plus the renderer version)."""
+    fields = [RENDER_VERSION] + [entry.get(f) for f in RENDER_FIELDS]
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class CitationCache:
+    """
+    Rendered citations (Markdown and HTML) keyed by render_key(), stored as
+    JSON next to the .bib file. Only entries whose rendered fields changed
+    since the previous export go through entry_to_apa() again.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self.citations = {}
+        self.rendered = 0
+        self.changed = False
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                if data.get('version') == RENDER_VERSION:
+                    self.citations = data['citations']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def __call__(self, entry: dict, as_html: bool = False) -> str:
+        key = render_key(entry)
+        slot = 1 if as_html else 0
+        cached = self.citations.setdefault(key, [None, None])
+        if cached[slot] is None:
+            cached[slot] = entry_to_apa(entry, as_html=as_html)
+            self.rendered += 1
+            self.changed = True
+        return cached[slot]
+
+    def save(self, entries: list) -> None:
+        """Write the cache, dropping citations of entries no longer in the .bib."""
+        keep = {render_key(e) for e in entries}
+        if keep != self.citations.keys():
+            self.citations = {k: v for k, v in self.citations.items() if k in keep}
+            self.changed = True
+        if self.path is None or not self.changed:
+            return
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        try:
+            tmp.write_text(json.dumps({'version': RENDER_VERSION, 'citations': self.citations},
+                                      ensure_ascii=False), encoding='utf-8')
+            tmp.replace(self.path)
+        except OSError as exc:
+            print(f"Warning: could not write the citation cache {self.path}: {exc}")
+
+
+def render_markdown(bib_name: str, group: str, years: list, timestamp: str,
+                    cite=entry_to_apa) -> str:
+    header = f"# Export of `{bib_name}`"
+    if group:
+        header += f" (group: {group})"
+    header += f"\n> Generated on {timestamp}\n"
+    header += "> **This file was automatically generated by [apa_bib_export python script](../../../scripts/apa-bib-export/) in this repository**\n"
+    header += "> **This list will be regularly updated as the project progresses.**\n"
+
+    lines = [header]
+    for year, year_entries in years:
+        lines.append(f"\n---- {year} ----\n")
+        for entry in year_entries:
+            lines.append(f"- {cite(entry)}")
+    return "\n".join(lines)
+
+
+def render_html(bib_name: str, group: str, years: list, timestamp: str,
+                cite=entry_to_apa) -> str:
+    """
+    Render the export directly as HTML, with the same markup the markdown
+    package produces for the Markdown export, without converting the whole
+    document.
+    """
+    title = f"Export of <code>{html.escape(bib_name, quote=False)}</code>"
+    if group:
+        title += f" (group: {_html_text(group)})"
+    lines = [
+        f"<h1>{title}</h1>",
+        "<blockquote>",
+        f"<p>Generated on {timestamp}",
+        '<strong>This file was automatically generated by <a href="../../../scripts/apa-bib-export/">apa_bib_export python script</a> in this repository</strong>',
+        "<strong>This list will be regularly updated as the project progresses.</strong></p>",
+        "</blockquote>",
+    ]
+    for year, year_entries in years:
+        lines.append(f"<p>---- {_html_text(year)} ----</p>")
+        lines.append("<ul>")
+        lines.extend(f"<li>{cite(entry, as_html=True).strip()}</li>"
+                     for entry in year_entries)
+        lines.append("</ul>")
+    return "\n".join(lines)
+
+
+def output_name(stem: str, group: str, fmt: str, several: bool = False) -> str:
+    """
+    Export/<stem>_list.<ext>, or <stem>_list_<group>.<ext> for each group when
+    the run exports several groups (a single --group keeps the plain name).
+    """
+    name = f"{stem}_list"
+    if group and several:
+        name += "_" + (re.sub(r'[^A-Za-z0-9_-]+', '_', group).strip('_') or 'group')
+    return f"{name}.{EXTENSIONS[fmt]}"
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Export BibTeX entries to Markdown or HTML in APA style with initials and full journal details"
@@ -108,86 +281,89 @@ def main():
     )
     parser.add_argument(
         '-g', '--group',
-        dest='group',
+        dest='groups',
+        action='append',
         default=None,
-        help='(Optional) BibTeX group name to filter entries'
+        help='(Optional) BibTeX group, or boolean group expression such as '
+             '"Fund_A2T AND NOT Exclude_*", to filter entries; '
+             'repeat to export several groups in one run'
     )
     parser.add_argument(
         '-o', '--output',
-        dest='output_format',
-        choices=['md', 'html'],
-        default='md',
-        help='Output format: "md" (Markdown) or "html"'
+        dest='output_formats',
+        action='append',
+        choices=FORMATS,
+        default=None,
+        help='Output format: "md" (Markdown), "html" (rendered directly) or '
+             '"html-md" (Markdown converted with the markdown package); '
+             'repeat to write several formats (default: md)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        dest='no_cache',
+        action='store_true',
+        help='Do not read or write the parsed-entry and rendered-citation caches next to the .bib'
     )
     args = parser.parse_args()
 
+    formats = list(dict.fromkeys(args.output_formats or ['md']))
+    if 'html' in formats and 'html-md' in formats:
+        parser.error('"html" and "html-md" both write the .html file; choose one')
+    groups = list(dict.fromkeys(args.groups or [None]))
+
     bib_path = args.bibfile.resolve()
     if not bib_path.exists():
         print(f"Error: File not found: {bib_path}")
         sys.exit(1)
 
-    # Prepare export directory
+    # Prepare export directory (other exports in it are kept)
     export_dir = bib_path.parent / 'Export'
-    if export_dir.exists():
-        shutil.rmtree(export_dir)
-    export_dir.mkdir()
-
-    # Load BibTeX data
-    with open(bib_path, encoding='utf-8') as bibtex_file:
-        bib_parser = bibtexparser.bparser.BibTexParser()
-        bib_parser.customization = convert_to_unicode
-        bib_db = bibtexparser.load(bibtex_file, parser=bib_parser)
-
-    entries = bib_db.entries
-    # Filter by group if provided
-    if args.group:
-        entries = [
-            e for e in entries
-            if 'groups' in e and args.group in [g.strip() for g in e['groups'].split(',')]
-        ]
-
-    # Sort by year (desc) then author
-    def sort_key(e):
-        y = int(e.get('year', '0')) if e.get('year', '').isdigit() else 0
-        return (-y, e.get('author', ''))
-
-    entries.sort(key=sort_key)
+    export_dir.mkdir(exist_ok=True)
 
-    # Group by year
-    grouped = {}
-    for entry in entries:
-        year = entry.get('year', 'n.d.')
-        grouped.setdefault(year, []).append(entry)
+    # Load BibTeX data once (parsed entries are cached next to the .bib file)
+    entries = load_bib_entries(str(bib_path), BIB_FIELDS, unicode=True,
+                               use_cache=not args.no_cache)
+    # Rendered citations from previous exports (only changed entries are re-rendered)
+    cite = CitationCache(None if args.no_cache else bib_path.parent / f".{bib_path.name}.apa-cache")
+    index = GroupIndex(entries)
 
-    # Header with timestamp
-    
+    # Header timestamp, shared by every file of the run
     timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    header = f"# Export of `{bib_path.name}`"
-    if args.group:
-        header += f" (group: {args.group})"
-    header += f"\n> Generated on {timestamp}\n"
-    header += "> **This file was automatically generated by [apa_bib_export python script](../../../scripts/apa-bib-export/) in this repository**\n"
-    header += "> **This list will be regularly updated as the project progresses.**\n"
-    
-    # Build content
-    lines = [header]
-    for year in sorted(grouped.keys(), reverse=True):
-        lines.append(f"\n---- {year} ----\n")
-        for entry in sorted(grouped[year], key=lambda x: x.get('author', '')):
-            lines.append(f"- {entry_to_apa(entry)}")
-    content = "\n".join(lines)
-
-    # Write output
-    output_filename = f"{bib_path.stem}_list.{args.output_format}"
-    output_path = export_dir / output_filename
-    if args.output_format == 'md':
-        output_path.write_text(content, encoding='utf-8')
-    else:
-        import markdown  # pip install markdown
-        html = markdown.markdown(content)
-        output_path.write_text(html, encoding='utf-8')
 
-    print(f"✔ Export created: {output_path}")
+    for group in groups:
+        selected = entries
+        # Filter by group expression if provided
+        if group:
+            try:
+                selected = index.select(group)
+            except GroupQueryError as exc:
+                print(f"Error: invalid group filter {group!r}: {exc}")
+                sys.exit(1)
+            if index.unknown:
+                print(f"Warning: unknown group(s) in filter: {', '.join(index.unknown)}")
+                index.unknown.clear()
+
+        years = group_by_year(selected)
+        markdown_content = None
+        for fmt in formats:
+            if fmt == 'html':
+                content = render_html(bib_path.name, group, years, timestamp, cite)
+            else:
+                if markdown_content is None:
+                    markdown_content = render_markdown(bib_path.name, group, years, timestamp, cite)
+                content = markdown_content
+                if fmt == 'html-md':
+                    import markdown  # pip install markdown
+                    content = markdown.markdown(content)
+
+            # Write output
+            output_path = export_dir / output_name(bib_path.stem, group, fmt, len(groups) > 1)
+            output_path.write_text(content, encoding='utf-8')
+            print(f"✔ Export created: {output_path}")
+
+    cite.save(entries)
+    if cite.citations and not args.no_cache:
+        print(f"✔ {cite.rendered} citation(s) rendered, the others reused from {cite.path.name}")
 
     # Clean up virtualenv if present
     venv_dir = export_dir / 'env'
@@ -1,22 +1,22 @@
 #!/usr/bin/env bash
-# Usage: export.sh --file /path/to/library.bib [--group GroupName] [--output md|tex]
+# Usage: export.sh --file /path/to/library.bib [--group GroupName ...] [--output md|html|html-md ...]
 set -euo pipefail
 
 # Print usage
 usage() {
   cat <<EOF
-Usage: $0 --file /path/to/file.bib [--group GroupName] [--output md|tex]
+Usage: $0 --file /path/to/file.bib [--group GroupName ...] [--output md|html|html-md ...]
 Options:
   -f|--file     Path to the BibTeX file to export (required)
-  -g|--group    Name of the group to filter entries (optional)
-  -o|--output   Output format: 'md' for Markdown or 'tex' for LaTeX (default: tex)
+  -g|--group    Group or group expression to filter entries (optional, repeatable)
+  -o|--output   Output format: 'md', 'html' or 'html-md' (default: md, repeatable)
   -h|--help     Show this help message
 EOF
   exit 1
 }
 
-# Default output format
-OUTPUT_FORMAT="tex"
+GROUP_FILTERS=()
+OUTPUTS=()
 
 # Parse arguments
 if [[ $# -eq 0 ]]; then
@@ -28,9 +28,9 @@ while [[ "$#" -gt 0 ]]; do
     -f|--file)
       BIBFILE="$2"; shift 2;;
     -g|--group)
-      GROUP="$2"; shift 2;;
+      GROUP_FILTERS+=("$2"); shift 2;;
     -o|--output)
-      OUTPUT_FORMAT="$2"; shift 2;;
+      OUTPUTS+=("$2"); shift 2;;
     -h|--help)
       usage;;
     *)
@@ -45,9 +45,8 @@ if [[ -z "${BIBFILE:-}" ]]; then
   usage
 fi
 
-# Set up export directory
+# Set up export directory (earlier exports are kept)
 EXPORT_DIR="$(dirname "$BIBFILE")/Export"
-rm -rf "$EXPORT_DIR"
 mkdir -p "$EXPORT_DIR"
 
 # Create & activate virtual environment
@@ -62,14 +61,17 @@ pip install bibtexparser pylatexenc markdown
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PYSCRIPT="$SCRIPT_DIR/apa_bib_export.py"
 
-CMD=(python3 "$PYSCRIPT" --file "$BIBFILE" --output "$OUTPUT_FORMAT")
-if [[ -n "${GROUP:-}" ]]; then
+CMD=(python3 "$PYSCRIPT" --file "$BIBFILE")
+for GROUP in ${GROUP_FILTERS[@]+"${GROUP_FILTERS[@]}"}; do
   CMD+=(--group "$GROUP")
-fi
+done
+for OUTPUT in ${OUTPUTS[@]+"${OUTPUTS[@]}"}; do
+  CMD+=(--output "$OUTPUT")
+done
 
 echo "🚀 Running: ${CMD[*]}"
 "${CMD[@]}"
 
 # Deactivate venv
 deactivate
-echo "✅ Export complete (format: $OUTPUT_FORMAT). Files are in $EXPORT_DIR."
+echo "✅ Export complete (format: ${OUTPUTS[*]:-md}). Files are in $EXPORT_DIR."
@@ -0,0 +1,26 @@
+"""
+Tests for the export file names of apa_bib_export.py.
+
+Run from this folder with: python -m pytest -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apa_bib_export import output_name  # noqa: E402
+
+
+def test_no_group_keeps_plain_name():
+    assert output_name("corpus", None, "md") == "corpus_list.md"
+
+
+def test_single_group_keeps_plain_name():
+    # corpus/jabref/Export/corpus_autism_research_list.md : --group Corpus_A2T_static
+    name = output_name("corpus_autism_research", "Corpus_A2T_static", "md")
+    assert name == "corpus_autism_research_list.md"
+
+
+def test_several_groups_get_a_suffix():
+    assert output_name("corpus", "Fund_A2T AND NOT Exclude_*", "html", several=True) \
+        == "corpus_list_Fund_A2T_AND_NOT_Exclude.html"
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+bib_dedupe.py
+
+Find duplicate entries and preprint/published pairs in a BibTeX library and
+propose the JabRef group tags that record them (Protocol Phase A, Step 5, and
+the `Exclude_Preprint_Then_Published` group).
+
+Candidate pairs are found in near-linear time instead of comparing every pair
+of entries:
+
+  - exact keys: normalized DOI (without preprint version suffix) and
+    normalized title;
+  - MinHash signatures (one-permutation hashing, 64 slots) of two shingle
+    sets per entry, the title character 4-grams and the abstract word 2-grams
+    plus author surnames, indexed with LSH (16 bands of 4 rows): two entries
+    become candidates when one band of either signature is identical.
+
+Each candidate pair is then checked on exact similarities (title, authors,
+abstract). Confirmed pairs are merged into clusters of records of the same
+work; in each cluster the preprints are proposed for
+`Exclude_Preprint_Then_Published` when a published version exists, and
+duplicate records are proposed for merging, with the Source_* groups to keep
+on the retained entry.
+
+Usage:
+    python3 bib_dedupe.py --file library.bib [--group "Fund_A2T"] [--output report.txt]
+
+Requirements:
+    - bibtexparser:    pip install bibtexparser
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from bib_cache import load_bib_entries
+from group_filter import GroupIndex, GroupQueryError, entry_groups
+
+BIB_FIELDS = ('author', 'year', 'title', 'doi', 'journal', 'publisher', 'abstract', 'groups')
+
+PREPRINT_TAG = 'Exclude_Preprint_Then_Published'
+SOURCE_PREFIX = 'source_'
+
+# DOI et revues des serveurs de preprints
+PREPRINT_DOI = re.compile(
+    r"^10\.(?:1101/(?:\d{4}\.\d{2}\.\d{2}\.)?\d{6,}"   # bioRxiv, medRxiv
+    r"|21203/rs\.|2139/ssrn\.|31234/|31219/|48550/|22541/au\.|20944/preprints|36227/)")
+PREPRINT_VENUE = re.compile(r"rxiv|research square|ssrn|preprint|authorea", re.IGNORECASE)
+# Avis publiés sur un article (« Correction: <titre> ») : liés à l'article, pas doublons
+NOTICE = re.compile(r"^\s*(?:corrigendum|correction|erratum|addendum|retraction(?: note)?|retracted)"
+                    r"(?:\s+to)?\s*[:.-]\s*", re.IGNORECASE)
+
+SLOTS = 64
+BANDS = 16
+ROWS = SLOTS // BANDS
+
+# Seuils de confirmation d'une paire candidate
+TITLE_MIN = 0.7
+ABSTRACT_MIN = 0.5
+AUTHORS_MIN = 0.5
+
+
+# ---------------------------------------------------------------------------
+# Normalization and shingles
+# ---------------------------------------------------------------------------
+
+def normalize_doi(doi: str) -> str:
+    """DOI en minuscules, sans préfixe d'URL ni suffixe de version (/v2)."""
+    doi = doi.strip().lower()
+    doi = re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", "", doi)
+    return re.sub(r"/v\d+$", "", doi)
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules sans accents ni ponctuation, blancs réduits."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^\w]+", " ", text).replace("_", " ").split())
+
+
+def surnames(author_field: str) -> Set[str]:
+    names = set()
+    for author in author_field.split(" and "):
+        author = author.strip()
+        if not author or author.lower() == "others":
+            continue
+        last = author.split(",")[0] if "," in author else author.split()[-1]
+        last = normalize_text(last)
+        if last:
+            names.add(last)
+    return names
+
+
+def char_shingles(text: str, n: int = 4) -> Set[str]:
+    return {text[i:i + n] for i in range(max(len(text) - n + 1, 1))} if text else set()
+
+
+def word_shingles(text: str, n: int = 2) -> Set[str]:
+    words = text.split()
+    return {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))} if words else set()
+
+
+def is_preprint(entry: dict) -> bool:
+    if PREPRINT_DOI.match(normalize_doi(entry.get('doi', ''))):
+        return True
+    venue = f"{entry.get('journal', '')} {entry.get('publisher', '')}"
+    return bool(PREPRINT_VENUE.search(venue))
+
+
+class Record:
+    """Clés et ensembles de shingles d'une entrée, calculés une fois."""
+
+    def __init__(self, index: int, entry: dict):
+        self.index = index
+        self.entry = entry
+        self.key = entry.get('ID', '')
+        self.doi = normalize_doi(entry.get('doi', ''))
+        title = entry.get('title', '')
+        self.notice = bool(NOTICE.match(title))
+        self.title = normalize_text(NOTICE.sub("", title, count=1))
+        self.authors = surnames(entry.get('author', ''))
+        self.abstract = word_shingles(normalize_text(entry.get('abstract', '')))
+        self.title_grams = char_shingles(self.title)
+        self.groups = entry_groups(entry)
+        self.preprint = is_preprint(entry)
+
+    @property
+    def text_shingles(self) -> Set[str]:
+        return self.abstract | {"@" + a for a in self.authors}
+
+
+# ---------------------------------------------------------------------------
+# MinHash / LSH
+# ---------------------------------------------------------------------------
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(shingles: Iterable[str]) -> Optional[Tuple[int, ...]]:
+    """
+    Signature MinHash à une seule permutation : chaque shingle n'est haché
+    qu'une fois et va dans l'un des SLOTS compartiments, dont on garde le
+    minimum ; un compartiment vide reprend la valeur du suivant non vide.
+    """
+    slots = [None] * SLOTS
+    for shingle in shingles:
+        h = _hash64(shingle)
+        slot, value = h % SLOTS, h // SLOTS
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+    filled = [i for i, v in enumerate(slots) if v is not None]
+    if not filled:
+        return None
+    for i in range(SLOTS):
+        if slots[i] is None:
+            # Densification par rotation : premier compartiment plein à droite
+            j = next((k for k in filled if k > i), filled[0])
+            slots[i] = (slots[j], j - i)
+    return tuple(slots)
+
+
+def lsh_pairs(signatures: Dict[int, Tuple[int, ...]]) -> Set[Tuple[int, int]]:
+    """Paires d'entrées dont au moins une bande de ROWS valeurs est identique."""
+    pairs = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for idx, sig in signatures.items():
+            buckets[sig[band * ROWS:(band + 1) * ROWS]].append(idx)
+        for members in buckets.values():
+            pairs.update(combinations(members, 2))
+    return pairs
+
+
+def key_pairs(records: List[Record], attr: str) -> Set[Tuple[int, int]]:
+    buckets = defaultdict(list)
+    for r in records:
+        value = getattr(r, attr)
+        if value:
+            buckets[value].append(r.index)
+    return {pair for members in buckets.values() for pair in combinations(members, 2)}
+
+
+def candidate_pairs(records: List[Record]) -> Set[Tuple[int, int]]:
+    pairs = key_pairs(records, "doi") | key_pairs(records, "title")
+    for shingles in (lambda r: r.title_grams, lambda r: r.text_shingles):
+        signatures = {}
+        for r in records:
+            sig = minhash(shingles(r))
+            if sig is not None:
+                signatures[r.index] = sig
+        pairs |= lsh_pairs(signatures)
+    return pairs
+
+
+# ---------------------------------------------------------------------------
+# Pair confirmation and clusters
+# ---------------------------------------------------------------------------
+
+def jaccard(a: Set[str], b: Set[str]) -> Optional[float]:
+    if not a or not b:
+        return None
+    return len(a & b) / len(a | b)
+
+
+def overlap(a: Set[str], b: Set[str]) -> Optional[float]:
+    if not a or not b:
+        return None
+    return len(a & b) / min(len(a), len(b))
+
+
+def compare(a: Record, b: Record) -> Optional[Tuple[str, dict]]:
+    """(motif, similarités) si les deux entrées décrivent le même travail, sinon None."""
+    scores = {
+        "title": jaccard(a.title_grams, b.title_grams),
+        "authors": overlap(a.authors, b.authors),
+        "abstract": jaccard(a.abstract, b.abstract),
+    }
+    if a.doi and a.doi == b.doi:
+        return "same DOI", scores
+    authors_ok = scores["authors"] is None or scores["authors"] >= AUTHORS_MIN
+    if not authors_ok:
+        return None
+    if a.title and a.title == b.title:
+        return "same title", scores
+    if scores["title"] is not None and scores["title"] >= TITLE_MIN:
+        return "similar title", scores
+    if scores["abstract"] is not None and scores["abstract"] >= ABSTRACT_MIN:
+        return "similar abstract", scores
+    return None
+
+
+def clusters(n: int, links: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """Composantes connexes (union-find) de plus d'une entrée, dans l'ordre du fichier."""
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in links:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+    return [members for _root, members in sorted(groups.items()) if len(members) > 1]
+
+
+def keeper(records: List[Record]) -> Record:
+    """
+    Entrée conservée parmi des doublons : non exclue (Exclude_*), la plus
+    classée, puis la première du fichier.
+    """
+    return max(records, key=lambda r: (not any(g.startswith("exclude_") for g in r.groups),
+                                       len(r.groups), -r.index))
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _scores(scores: dict) -> str:
+    return ", ".join(f"{name} {value:.2f}" for name, value in scores.items() if value is not None)
+
+
+def _describe(r: Record) -> str:
+    venue = r.entry.get('journal', '') or r.entry.get('publisher', '')
+    return f"{r.key} ({r.entry.get('year', '')}, {venue or 'no venue'}) doi:{r.doi or '-'}"
+
+
+def build_report(bib_name: str, records: List[Record], found: List[List[int]],
+                 reasons: Dict[Tuple[int, int], Tuple[str, dict]],
+                 notices: List[Tuple[int, int]], stats: dict) -> str:
+    tag = PREPRINT_TAG.lower()
+    lines = [f"Duplicate and preprint check of {bib_name}",
+             f"Entries                : {len(records)}",
+             f"Candidate pairs        : {stats['candidates']} "
+             f"(of {len(records) * (len(records) - 1) // 2} possible)",
+             f"Confirmed pairs        : {len(reasons)}",
+             f"Clusters               : {len(found)}",
+             f"Time                   : {stats['seconds']:.2f}s", ""]
+
+    preprint_lines, duplicate_lines, matched = [], [], set()
+    for members in found:
+        recs = [records[i] for i in members]
+        published = [r for r in recs if not r.preprint]
+        preprints = [r for r in recs if r.preprint]
+        links = [f"    {records[a].key} ~ {records[b].key}: {reason} ({_scores(scores)})"
+                 for (a, b), (reason, scores) in sorted(reasons.items())
+                 if a in members and b in members]
+
+        if published and preprints:
+            block = ["  Published: " + "; ".join(_describe(r) for r in published)]
+            for r in preprints:
+                matched.add(r.index)
+                action = "already tagged" if tag in r.groups else f"add {PREPRINT_TAG}"
+                block.append(f"  Preprint : {_describe(r)} -> {action}")
+            preprint_lines += block + links + [""]
+
+        # Doublons : plusieurs versions publiées, ou plusieurs preprints sans version publiée
+        same = published if len(published) > 1 else (preprints if not published else [])
+        if len(same) > 1:
+            keep = keeper(same)
+            sources = sorted({g for r in same for g in r.entry.get('groups', '').split(',')
+                              if g.strip().lower().startswith(SOURCE_PREFIX)}
+                             - {g for g in keep.entry.get('groups', '').split(',')}, key=str.strip)
+            block = [f"  Keep     : {_describe(keep)}"]
+            block += [f"  Merge    : {_describe(r)}" for r in same if r is not keep]
+            if sources:
+                block.append(f"  -> add to {keep.key}: {', '.join(s.strip() for s in sources)}")
+            duplicate_lines += block + links + [""]
+
+    lines += [f"Preprints with a published version ({PREPRINT_TAG}):", ""]
+    lines += preprint_lines or ["  none", ""]
+    lines += ["Duplicate records (keep one entry, keep all Source_* groups):", ""]
+    lines += duplicate_lines or ["  none", ""]
+
+    lines += ["Corrections and other notices matching an article (not duplicates):", ""]
+    lines += [f"  {_describe(records[n])} -> notice on {records[a].key}"
+              for n, a in notices] or ["  none"]
+    lines.append("")
+
+    unmatched = [r for r in records if tag in r.groups and r.index not in matched]
+    lines += [f"Tagged {PREPRINT_TAG} without a published version in this library "
+              f"(check manually):", ""]
+    lines += [f"  {_describe(r)}" for r in unmatched] or ["  none"]
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find duplicate entries and preprint/published pairs in a BibTeX library "
+                    "and propose JabRef group tags"
+    )
+    parser.add_argument(
+        '-f', '--file',
+        dest='bibfile',
+        type=Path,
+        required=True,
+        help='Path to the BibTeX (.bib) file'
+    )
+    parser.add_argument(
+        '-g', '--group',
+        dest='group',
+        default=None,
+        help='(Optional) BibTeX group, or boolean group expression, restricting the check'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        dest='output',
+        type=Path,
+        default=None,
+        help='Report path (default: <name>_dedupe.txt next to the .bib)'
+    )
+    parser.add_argument(
+        '--exhaustive',
+        action='store_true',
+        help='Compare every pair of entries instead of the MinHash/LSH candidates '
+             '(quadratic; to check what LSH misses)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        dest='no_cache',
+        action='store_true',
+        help='Do not read or write the parsed-entry cache next to the .bib'
+    )
+    args = parser.parse_args()
+
+    bib_path = args.bibfile.resolve()
+    if not bib_path.exists():
+        print(f"Error: File not found: {bib_path}")
+        sys.exit(1)
+
+    entries = load_bib_entries(str(bib_path), BIB_FIELDS, unicode=True,
+                               use_cache=not args.no_cache)
+    if args.group:
+        index = GroupIndex(entries)
+        try:
+            entries = index.select(args.group)
+        except GroupQueryError as exc:
+            print(f"Error: invalid group filter {args.group!r}: {exc}")
+            sys.exit(1)
+        if index.unknown:
+            print(f"Warning: unknown group(s) in filter: {', '.join(index.unknown)}")
+
+    start = time.perf_counter()
+    records = [Record(i, e) for i, e in enumerate(entries)]
+    if args.exhaustive:
+        pairs = set(combinations(range(len(records)), 2))
+    else:
+        pairs = candidate_pairs(records)
+    reasons, notices = {}, []
+    for a, b in sorted(pairs):
+        result = compare(records[a], records[b])
+        if not result:
+            continue
+        if records[a].notice != records[b].notice:
+            notices.append((a, b) if records[a].notice else (b, a))
+        else:
+            reasons[(a, b)] = result
+    found = clusters(len(records), reasons)
+    stats = {"candidates": len(pairs), "seconds": time.perf_counter() - start}
+
+    report = build_report(bib_path.name, records, found, reasons, notices, stats)
+    output = args.output or bib_path.parent / f"{bib_path.stem}_dedupe.txt"
+    output.write_text(report, encoding='utf-8')
+    print(f"✔ {len(found)} cluster(s) of duplicate or preprint records among "
+          f"{len(records)} entries ({len(pairs)} candidate pairs)")
+    print(f"✔ Report written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env bash
+# -------------------------------------------------------------
+# dedupe.sh
+# Installs/reuses a dedicated Python venv and runs bib_dedupe.py
+# on a .bib file, with optional group filtering.
+# Usage:
+#   ./dedupe.sh --file /path/to/library.bib [--group "GroupName"] [--output report.txt] [--exhaustive]
+# -------------------------------------------------------------
+set -euo pipefail
+
+# Locate this script’s directory
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+VENV_DIR="$SCRIPT_DIR/venv"
+SCRIPT_PATH="$SCRIPT_DIR/bib_dedupe.py"
+DEPS=(bibtexparser)
+DEPS_STAMP="$VENV_DIR/.deps"
+
+# Print usage
+usage() {
+  cat <<USAGE
+Usage: $0 --file /path/to/library.bib [--group "GroupName"] [--output report.txt] [--exhaustive]
+Options:
+  -f|--file       Path to the .bib file to check (required)
+  -g|--group      Group or group expression restricting the check (optional)
+  -o|--output     Report path (default: <name>_dedupe.txt next to the .bib) (optional)
+  --exhaustive    Compare every pair of entries instead of the MinHash/LSH candidates (optional)
+  -h|--help       Show this help message
+USAGE
+  exit 1
+}
+
+# Parse arguments
+if [[ $# -eq 0 ]]; then
+  usage
+fi
+
+while [[ "$#" -gt 0 ]]; do
+  case $1 in
+    -f|--file)
+      BIBFILE="$2"; shift 2;;
+    -g|--group)
+      GROUP_FILTER="$2"; shift 2;;
+    -o|--output)
+      OUTPUT="$2"; shift 2;;
+    --exhaustive)
+      EXHAUSTIVE=1; shift;;
+    -h|--help)
+      usage;;
+    *)
+      echo "Unknown argument: $1"
+      usage;;
+  esac
+done
+
+# Validate required argument
+if [[ -z "${BIBFILE:-}" ]]; then
+  echo "Error: --file is required."
+  usage
+fi
+
+# Ensure virtual environment exists, create if needed
+if [[ ! -d "$VENV_DIR" ]]; then
+  echo "🐍 Creating virtual environment in $VENV_DIR"
+  python3 -m venv "$VENV_DIR"
+fi
+source "$VENV_DIR/bin/activate"
+
+# Install dependencies only when the venv is new or the list changed
+if [[ "$(cat "$DEPS_STAMP" 2>/dev/null)" != "${DEPS[*]}" ]]; then
+  echo "⬆️  Upgrading pip and installing dependencies"
+  python -m pip install --upgrade pip
+  pip install "${DEPS[@]}"
+  echo "${DEPS[*]}" > "$DEPS_STAMP"
+fi
+
+# Build the Python command
+CMD=(python3 "$SCRIPT_PATH" --file "$BIBFILE")
+if [[ -n "${GROUP_FILTER:-}" ]]; then
+  CMD+=(--group "$GROUP_FILTER")
+fi
+if [[ -n "${OUTPUT:-}" ]]; then
+  CMD+=(--output "$OUTPUT")
+fi
+if [[ -n "${EXHAUSTIVE:-}" ]]; then
+  CMD+=(--exhaustive)
+fi
+
+# Run
+echo "🚀 Running bib_dedupe.py"
+"${CMD[@]}"
+
+deactivate
+echo "✅ Done."
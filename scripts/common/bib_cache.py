@@ -0,0 +1,223 @@
+"""
+bib_cache.py
+
+Shared, cached BibTeX loading for the scripts of this repository
+(apa_bib_export.py, pdf_keyword_scan.py and bib_dedupe.py).
+
+Parsing the 2 MB corpus library with bibtexparser takes seconds, most of it
+spent on fields no script uses (abstracts, JabRef timestamps, ...).
+load_bib_entries() therefore:
+
+  - drops the unrequested fields with a light brace-aware pre-pass before
+    handing the text to bibtexparser, and
+  - caches the parsed entries as zlib-compressed JSON next to the .bib
+    (.<name>.bib.entries-cache), keyed by the file size, mtime and SHA-1, the
+    requested fields and the parser options, so that repeat invocations do not
+    even import bibtexparser.
+
+Scripts in sibling folders import it with:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    os.pardir, "common"))
+    from bib_cache import load_bib_entries
+
+Requirements:
+    - bibtexparser (<2):    pip install "bibtexparser<2"
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+CACHE_VERSION = 1
+
+_ENTRY = re.compile(r"@\s*(\w+)\s*([{(])")
+_KEY = re.compile(r"[^,\s}]*\s*,?")
+_FIELD = re.compile(r"\s*([^\s=,{}\"#]+)\s*=\s*")
+_END = re.compile(r"\s*\}")
+_SEP = re.compile(r"\s*,?")
+_CONCAT = re.compile(r"\s*#\s*")
+_BARE = re.compile(r"[^\s,}#]+")
+_BRACE = re.compile(r"[{}]")
+_QUOTE_OR_BRACE = re.compile(r"[{}\"]")
+
+
+def cache_path(bib_path: str) -> str:
+    directory, name = os.path.split(bib_path)
+    return os.path.join(directory, f".{name}.entries-cache")
+
+
+# ---------------------------------------------------------------------------
+# Field pre-filter
+# ---------------------------------------------------------------------------
+
+def _brace_end(text: str, pos: int) -> int:
+    """Position après l'accolade fermante qui équilibre text[pos] == "{"."""
+    depth = 0
+    for m in _BRACE.finditer(text, pos):
+        depth += 1 if m.group() == "{" else -1
+        if depth == 0:
+            return m.end()
+    raise ValueError("unbalanced braces")
+
+
+def _quoted_end(text: str, pos: int) -> int:
+    depth = 0
+    for m in _QUOTE_OR_BRACE.finditer(text, pos + 1):
+        c = m.group()
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        elif depth == 0:
+            return m.end()
+    raise ValueError("unterminated quoted value")
+
+
+def _value_end(text: str, pos: int) -> int:
+    """Fin d'une valeur de champ : {…}, "…", nombre ou macro, concaténés par #."""
+    while True:
+        if text[pos] == "{":
+            pos = _brace_end(text, pos)
+        elif text[pos] == '"':
+            pos = _quoted_end(text, pos)
+        else:
+            m = _BARE.match(text, pos)
+            if not m:
+                raise ValueError(f"unexpected value at {pos}")
+            pos = m.end()
+        m = _CONCAT.match(text, pos)
+        if not m:
+            return pos
+        pos = m.end()
+
+
+def strip_fields(text: str, keep: Iterable[str]) -> str:
+    """
+    Texte BibTeX sans les champs absents de `keep` (insensible à la casse).
+    Les blocs @comment, @string et @preamble sont recopiés tels quels.
+    Lève ValueError sur une syntaxe inattendue.
+    """
+    keep = {f.lower() for f in keep}
+    out, pos = [], 0
+    while True:
+        m = _ENTRY.search(text, pos)
+        if not m:
+            out.append(text[pos:])
+            return "".join(out)
+        if m.group(2) != "{":
+            raise ValueError("parenthesised entries are not supported")
+        if m.group(1).lower() in ("comment", "string", "preamble"):
+            end = _brace_end(text, m.end() - 1)
+            out.append(text[pos:end])
+            pos = end
+            continue
+
+        key = _KEY.match(text, m.end())
+        out.append(text[pos:key.end()])
+        i = key.end()
+        while True:
+            f = _FIELD.match(text, i)
+            if not f:
+                e = _END.match(text, i)
+                if not e:
+                    raise ValueError(f"unexpected text at {i}")
+                out.append(e.group())
+                i = e.end()
+                break
+            sep = _SEP.match(text, _value_end(text, f.end()))
+            if f.group(1).lower() in keep:
+                out.append(text[i:sep.end()])
+            i = sep.end()
+        pos = i
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _parse(text: str, unicode: bool) -> List[Dict[str, str]]:
+    try:
+        import bibtexparser
+        from bibtexparser.bparser import BibTexParser
+        from bibtexparser.customization import convert_to_unicode
+    except ImportError:
+        sys.exit("❌  The bibtexparser package is required: pip install bibtexparser")
+    parser = BibTexParser()
+    if unicode:
+        parser.customization = convert_to_unicode
+    return bibtexparser.loads(text, parser=parser).entries
+
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_cache(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as f:
+            data = json.loads(zlib.decompress(f.read()))
+    except (OSError, ValueError, zlib.error):
+        return None
+    return data if data.get("version") == CACHE_VERSION else None
+
+
+def _write_cache(path: str, data: dict) -> None:
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+        os.replace(tmp, path)
+    except OSError:
+        # Cache en lecture seule ou disque plein : on s'en passe
+        pass
+
+
+def load_bib_entries(bib_path: str, fields: Iterable[str] = None, unicode: bool = False,
+                     use_cache: bool = True) -> List[Dict[str, str]]:
+    """
+    Entrées du .bib (dictionnaires bibtexparser, avec ID et ENTRYTYPE),
+    restreintes à `fields` si donné ; `unicode` applique convert_to_unicode.
+    """
+    fields = sorted({f.lower() for f in fields}) if fields is not None else None
+    variant = json.dumps([fields, unicode])
+    st = os.stat(bib_path)
+    cpath = cache_path(bib_path)
+
+    data = _read_cache(cpath) if use_cache else None
+    if data is not None and (data["size"], data["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+        # Fichier touché : s'il n'a pas changé, on garde les variantes déjà calculées
+        sha1 = _file_sha1(bib_path)
+        if data["sha1"] == sha1:
+            data.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        else:
+            data = None
+    if data is not None and variant in data["variants"]:
+        return data["variants"][variant]
+
+    with open(bib_path, encoding="utf-8") as f:
+        text = f.read()
+    if fields is not None:
+        try:
+            text = strip_fields(text, fields)
+        except (ValueError, IndexError):
+            pass
+    entries = _parse(text, unicode)
+    if fields is not None:
+        keep = set(fields) | {"ID", "ENTRYTYPE"}
+        entries = [{k: v for k, v in e.items() if k in keep} for e in entries]
+
+    if use_cache:
+        if data is None:
+            data = {"version": CACHE_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                    "sha1": _file_sha1(bib_path), "variants": {}}
+        data["variants"][variant] = entries
+        _write_cache(cpath, data)
+    return entries
@@ -0,0 +1,162 @@
+"""
+group_filter.py
+
+Boolean filter expressions on JabRef groups, shared by apa_bib_export.py
+(--group), pdf_keyword_scan.py (--group-filter) and bib_dedupe.py (--group).
+
+The `groups` field of every entry is split once into a group -> bitset index
+(one Python int per group, bit i set for entry i). An expression is then
+evaluated with integer AND/OR/NOT on those bitsets, so the cost per group in
+the expression does not depend on how the entries are tagged.
+
+Syntax (group names and operators are case-insensitive):
+
+    Fund_A2T AND Doc_Type_Research AND NOT Exclude_*
+    (Access_Open OR Access_Closed) Participatory_Yes
+    "Group with spaces", Fund_A2T
+
+  - NOT binds tighter than AND, which binds tighter than OR;
+  - a comma or simple juxtaposition means AND (as in the former filters);
+  - a trailing * matches every group starting with the given prefix;
+  - parentheses group sub-expressions.
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List
+
+_TOKEN = re.compile(r"""\s*(?:(\()|(\))|(,)|"([^"]*)"|'([^']*)'|([^\s(),"']+))""")
+_OPERATORS = {"and", "or", "not"}
+
+
+class GroupQueryError(ValueError):
+    """Expression de filtre invalide."""
+
+
+def entry_groups(entry: dict) -> List[str]:
+    return [g.strip().lower() for g in entry.get("groups", "").split(",") if g.strip()]
+
+
+def _tokenize(expr: str) -> List[tuple]:
+    """Liste de (type, valeur) : '(', ')', 'and', 'or', 'not' ou 'name'."""
+    tokens, pos = [], 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m or m.end() == pos:
+            raise GroupQueryError(f"unexpected character at position {pos}: {expr[pos:]!r}")
+        pos = m.end()
+        lpar, rpar, comma, dq, sq, word = m.groups()
+        if lpar:
+            tokens.append(("(", lpar))
+        elif rpar:
+            tokens.append((")", rpar))
+        elif comma:
+            tokens.append(("and", comma))
+        elif dq is not None or sq is not None:
+            tokens.append(("name", (dq if dq is not None else sq).strip().lower()))
+        elif word.lower() in _OPERATORS:
+            tokens.append((word.lower(), word))
+        else:
+            tokens.append(("name", word.lower()))
+    return tokens
+
+
+class GroupIndex:
+    """Index groupe -> bitset des entrées, construit une seule fois."""
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self.all = (1 << len(entries)) - 1
+        self.bits: Dict[str, int] = {}
+        for i, e in enumerate(entries):
+            for g in entry_groups(e):
+                self.bits[g] = self.bits.get(g, 0) | (1 << i)
+        self.names = sorted(self.bits)
+        self.unknown: List[str] = []
+        self._prefix: Dict[str, int] = {}
+
+    def group(self, name: str) -> int:
+        if name.endswith("*"):
+            return self.prefix(name[:-1])
+        if name not in self.bits and name not in self.unknown:
+            self.unknown.append(name)
+        return self.bits.get(name, 0)
+
+    def prefix(self, prefix: str) -> int:
+        """Union des groupes commençant par `prefix` (plage de la liste triée)."""
+        if prefix not in self._prefix:
+            bits = 0
+            i = bisect_left(self.names, prefix)
+            while i < len(self.names) and self.names[i].startswith(prefix):
+                bits |= self.bits[self.names[i]]
+                i += 1
+            if not bits:
+                self.unknown.append(prefix + "*")
+            self._prefix[prefix] = bits
+        return self._prefix[prefix]
+
+    def evaluate(self, expr: str) -> int:
+        """Bitset des entrées qui satisfont l'expression."""
+        tokens = _tokenize(expr)
+        if not tokens:
+            raise GroupQueryError("empty group filter")
+        pos = 0
+
+        def peek():
+            return tokens[pos][0] if pos < len(tokens) else None
+
+        def take(kind):
+            nonlocal pos
+            if peek() != kind:
+                found = tokens[pos][1] if pos < len(tokens) else "end of filter"
+                raise GroupQueryError(f"expected {kind!r}, found {found!r}")
+            pos += 1
+
+        def or_expr():
+            bits = and_expr()
+            while peek() == "or":
+                take("or")
+                bits |= and_expr()
+            return bits
+
+        def and_expr():
+            bits = not_expr()
+            # AND explicite, virgule ou simple juxtaposition
+            while peek() in ("and", "not", "name", "("):
+                if peek() == "and":
+                    take("and")
+                bits &= not_expr()
+            return bits
+
+        def not_expr():
+            if peek() == "not":
+                take("not")
+                return self.all & ~not_expr()
+            return atom()
+
+        def atom():
+            nonlocal pos
+            if peek() == "(":
+                take("(")
+                bits = or_expr()
+                take(")")
+                return bits
+            if peek() == "name":
+                pos += 1
+                return self.group(tokens[pos - 1][1])
+            found = tokens[pos][1] if pos < len(tokens) else "end of filter"
+            raise GroupQueryError(f"expected a group name, found {found!r}")
+
+        bits = or_expr()
+        if pos < len(tokens):
+            raise GroupQueryError(f"unexpected {tokens[pos][1]!r}")
+        return bits
+
+    def select(self, expr: str) -> List[dict]:
+        """Entrées retenues par l'expression, dans leur ordre d'origine."""
+        bits = self.evaluate(expr)
+        return [e for e, bit in zip(self.entries, bin(bits)[:1:-1]) if bit == "1"]
+
+
+def filter_entries(entries: List[dict], expr: str) -> List[dict]:
+    return GroupIndex(entries).select(expr)
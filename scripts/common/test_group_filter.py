@@ -0,0 +1,70 @@
+"""
+Tests for the group filter expressions of group_filter.py: operators and their
+precedence, parentheses, quoted names and prefixes, unknown groups and
+malformed expressions.
+
+Run from this folder with: python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from group_filter import GroupIndex, GroupQueryError, filter_entries  # noqa: E402
+
+ENTRIES = [
+    {"ID": "a", "groups": "Fund_A2T, Doc_Type_Research"},
+    {"ID": "b", "groups": "Fund_A2T, Exclude_Duplicate"},
+    {"ID": "c", "groups": "Doc_Type_Research, Access_Open"},
+    {"ID": "d", "groups": "Access_Closed, Group with spaces"},
+    {"ID": "e"},
+]
+
+
+def _ids(expr):
+    return "".join(e["ID"] for e in filter_entries(ENTRIES, expr))
+
+
+@pytest.mark.parametrize("expr, ids", [
+    ("Fund_A2T", "ab"),
+    ("fund_a2t and DOC_TYPE_RESEARCH", "a"),
+    ("Fund_A2T, Doc_Type_Research", "a"),
+    ("Fund_A2T Doc_Type_Research", "a"),
+    ("Fund_A2T OR Access_Open", "abc"),
+    ("NOT Fund_A2T", "cde"),
+    ("not not Fund_A2T", "ab"),
+    ("Fund_A2T AND NOT Exclude_*", "a"),
+    ("Access_*", "cd"),
+    ('"Group with spaces" OR Access_Open', "cd"),
+    ("'group with spaces'", "d"),
+    # NOT avant AND, AND avant OR
+    ("Access_Open OR Fund_A2T AND Exclude_Duplicate", "bc"),
+    ("NOT Fund_A2T AND Doc_Type_Research", "c"),
+    ("(Access_Open OR Fund_A2T) AND Doc_Type_Research", "ac"),
+    ("NOT (Fund_A2T OR Access_*)", "e"),
+])
+def test_select(expr, ids):
+    assert _ids(expr) == ids
+
+
+def test_unknown_groups_match_nothing_and_are_reported():
+    index = GroupIndex(ENTRIES)
+    assert index.select("Fund_A2T AND Missing") == []
+    assert [e["ID"] for e in index.select("Fund_A2T OR Nope_*")] == ["a", "b"]
+    assert index.unknown == ["missing", "nope_*"]
+
+
+@pytest.mark.parametrize("expr", [
+    "",
+    "Fund_A2T AND",
+    "Fund_A2T OR OR Access_Open",
+    "(Fund_A2T OR Access_Open",
+    "Fund_A2T)",
+    "NOT",
+    '"unterminated',
+])
+def test_malformed_expression(expr):
+    with pytest.raises(GroupQueryError):
+        GroupIndex(ENTRIES).evaluate(expr)
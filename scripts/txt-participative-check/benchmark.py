@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Throughput benchmark for pdf_keyword_scan.py on a synthetic corpus.
+
+Generates a corpus of PDFs with PyMuPDF (configurable number of documents and
+pages, keyword density, hyphenated line breaks and words split across page
+breaks) together with a matching .bib file (`file` and `groups` fields), then
+times each stage of the scanner and reports pages/sec and peak RSS:
+
+  - compile_patterns / compile_matcher
+  - clean, split_sentences, keyword matching and sentence_at() around the
+    hits on extracted page text
+  - analyse() per PDF (no cache)
+  - full .bib mode through the CLI: cold, from the extracted-text cache,
+    and incremental (unchanged corpus, manifest reused)
+
+Usage:
+    python3 benchmark.py [--docs 50] [--pages 12] [--density 0.01] [--out DIR]
+                         [--jobs N] [--json results.json]
+
+Requirements:
+    - PyMuPDF (<2):    pip install "PyMuPDF<2"
+    - bibtexparser:    pip install bibtexparser
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pdf_keyword_scan as pks
+from pdf_keyword_scan import fitz
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_keyword_scan.py")
+
+FILLER = (
+    "the of and to in a study we with autistic adults children was were for "
+    "on that data results analysis participants sample measures reported "
+    "associated between group clinical outcomes support using research "
+    "autism spectrum condition assessment social questionnaire scores model "
+    "significant differences age sex intervention quality life mental health"
+).split()
+
+GROUPS = ["Fund_A2T", "Doc_Type_Research", "Doc_Type_Review", "Access_Open",
+          "Access_Closed", "Participatory_Yes", "Exclude_Preprint_Then_Published"]
+
+LINE_CHARS = 95
+LINES_PER_PAGE = 62
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+def _keyword_variant(rng: random.Random) -> str:
+    kw = rng.choice(pks.KEYWORDS_DEFAULT)
+    r = rng.random()
+    if r < 0.25:
+        kw += "s"
+    elif r < 0.4:
+        kw = kw.replace(" ", "-")
+    return kw
+
+
+def _page_words(rng: random.Random, n_words: int, density: float):
+    words = []
+    while len(words) < n_words:
+        if rng.random() < density:
+            words.extend(_keyword_variant(rng).split())
+        else:
+            words.append(rng.choice(FILLER))
+        if rng.random() < 0.07:
+            words[-1] += rng.choice(".!?")
+    return words
+
+
+def _layout(words, rng: random.Random, hyphen_rate: float):
+    """Lignes de LINE_CHARS caractères, avec coupures « mot-\\n » aléatoires."""
+    lines, cur = [], ""
+    for w in words:
+        if len(cur) + len(w) + 1 <= LINE_CHARS:
+            cur = f"{cur} {w}" if cur else w
+            continue
+        if len(w) > 6 and rng.random() < hyphen_rate:
+            cut = rng.randint(3, len(w) - 3)
+            lines.append(f"{cur} {w[:cut]}-")
+            cur = w[cut:]
+        else:
+            lines.append(cur)
+            cur = w
+    lines.append(cur)
+    return lines
+
+
+def generate_corpus(out_dir: str, docs: int, pages: int, density: float,
+                    hyphen_rate: float, page_break_rate: float, seed: int) -> str:
+    """Écrit docs PDF et le .bib correspondant dans out_dir ; renvoie le .bib."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    bib = []
+    n_words = LINES_PER_PAGE * LINE_CHARS // 7
+    for d in range(docs):
+        key = f"Synthetic{d:05d}"
+        doc = fitz.open()
+        carry = ""
+        for _p in range(pages):
+            words = _page_words(rng, n_words, density)
+            if carry:
+                words[0] = carry + words[0]
+                carry = ""
+            lines = _layout(words, rng, hyphen_rate)[:LINES_PER_PAGE]
+            # Mot coupé entre deux pages
+            if rng.random() < page_break_rate:
+                w = _keyword_variant(rng).split()[0]
+                cut = max(2, len(w) // 2)
+                lines[-1] += f" {w[:cut]}-"
+                carry = w[cut:] + " "
+            page = doc.new_page()
+            page.insert_text((40, 50), "\n".join(lines), fontsize=8)
+        doc.save(os.path.join(out_dir, f"{key}.pdf"))
+        doc.close()
+
+        groups = rng.sample(GROUPS, rng.randint(1, 4))
+        bib.append(
+            f"@Article{{{key},\n"
+            f"  author = {{Author{rng.randint(1, 200)}, A. and Other, B.}},\n"
+            f"  title  = {{Synthetic document {d}}},\n"
+            f"  year   = {{{rng.randint(2015, 2025)}}},\n"
+            f"  doi    = {{10.0000/synthetic.{d}}},\n"
+            f"  file   = {{:{key}.pdf:PDF}},\n"
+            f"  groups = {{{', '.join(groups)}}},\n"
+            f"}}\n")
+    bib_path = os.path.join(out_dir, "synthetic_corpus.bib")
+    with open(bib_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(bib))
+    return bib_path
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _timed(fun, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fun()
+    return (time.perf_counter() - start) / repeat
+
+
+def run_benchmarks(bib_path: str, jobs: int):
+    bib_dir = os.path.dirname(bib_path)
+    pdfs = sorted(os.path.join(bib_dir, f) for f in os.listdir(bib_dir) if f.endswith(".pdf"))
+    raw_pages = []
+    for path in pdfs:
+        with fitz.open(path) as doc:
+            raw_pages.extend(page.get_text() for page in doc)
+    n_pages = len(raw_pages)
+    cleaned = [pks.clean(t) for t in raw_pages]
+    matcher = pks.compile_matcher(pks.KEYWORDS_DEFAULT)
+
+    results = []
+
+    def record(stage, seconds, pages=None):
+        results.append({
+            "stage": stage,
+            "seconds": seconds,
+            "pages_per_sec": pages / seconds if pages and seconds else None,
+        })
+
+    record("compile_patterns", _timed(lambda: pks.compile_patterns(pks.KEYWORDS_DEFAULT), 20))
+    record("compile_matcher", _timed(lambda: pks.compile_matcher(pks.KEYWORDS_DEFAULT), 20))
+    record("clean", _timed(lambda: [pks.clean(t) for t in raw_pages]), n_pages)
+    record("split_sentences", _timed(lambda: [pks.split_sentences(t) for t in cleaned]), n_pages)
+    record("matcher.finditer", _timed(lambda: [matcher.finditer(t) for t in cleaned]), n_pages)
+    hits = [(t, start) for t in cleaned for _kw, start, _end in matcher.finditer(t)]
+    record("sentence_at", _timed(lambda: [pks.sentence_at(t, start) for t, start in hits]), n_pages)
+    record("analyse", _timed(
+        lambda: [pks.analyse(p, matcher, lambda *hit: None) for p in pdfs]), n_pages)
+
+    for label, extra in (("bib mode (cold)", ["--full", "--clear-cache"]),
+                         ("bib (text cache)", ["--full"]),
+                         ("bib (incremental)", [])):
+        cmd = [sys.executable, SCRIPT, bib_path, "--jobs", str(jobs)] + extra
+        seconds = _timed(lambda: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL))
+        record(label, seconds, n_pages)
+
+    return {
+        "documents": len(pdfs),
+        "pages": n_pages,
+        "jobs": jobs,
+        "stages": results,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_rss_children_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"Corpus: {report['documents']} documents, {report['pages']} pages, "
+          f"jobs={report['jobs']}\n")
+    print(f"{'Stage':<20} {'Seconds':>10} {'Pages/sec':>12}")
+    for r in report["stages"]:
+        pps = f"{r['pages_per_sec']:.1f}" if r["pages_per_sec"] else "-"
+        print(f"{r['stage']:<20} {r['seconds']:>10.4f} {pps:>12}")
+    print(f"\nPeak RSS (benchmark process): {report['peak_rss_mb']:.1f} MB")
+    print(f"Peak RSS (CLI runs)         : {report['peak_rss_children_mb']:.1f} MB")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark pdf_keyword_scan.py on a synthetic corpus.")
+    ap.add_argument("--docs", type=int, default=50, help="Number of PDFs (default: 50)")
+    ap.add_argument("--pages", type=int, default=12, help="Pages per PDF (default: 12)")
+    ap.add_argument("--density", type=float, default=0.01,
+                    help="Probability that a word slot holds a keyword (default: 0.01)")
+    ap.add_argument("--hyphen-rate", type=float, default=0.1,
+                    help="Probability of a hyphenated line break (default: 0.1)")
+    ap.add_argument("--page-break-rate", type=float, default=0.2,
+                    help="Probability that a page ends with a split word (default: 0.2)")
+    ap.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="--jobs passed to the .bib mode runs (default: 1)")
+    ap.add_argument("--out", help="Directory for the corpus (default: temporary, removed)")
+    ap.add_argument("--json", help="Also write the results to this JSON file")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = os.path.abspath(args.out) if args.out else tmp
+        t0 = time.perf_counter()
+        bib_path = generate_corpus(out_dir, args.docs, args.pages, args.density,
+                                   args.hyphen_rate, args.page_break_rate, args.seed)
+        print(f"📄 Corpus generated in {time.perf_counter() - t0:.1f}s: {bib_path}\n")
+        report = run_benchmarks(bib_path, args.jobs)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
@@ -1,11 +1,11 @@
 #!/usr/bin/env bash
 # -------------------------------------------------------------
 # check.sh
-# Installs/uses a dedicated Python venv and runs
+# Installs/reuses a dedicated Python venv and runs
 # pdf_keyword_scan.py on a PDF or .bib file, with optional
 # keyword and group filtering.
 # Usage:
-#   ./check.sh --file /path/to/file.pdf [--keywords "kw1,kw2"] [--group "GroupName"]
+#   ./check.sh --file /path/to/file.pdf [--keywords "kw1,kw2"] [--group "GroupName"] [--jobs N] [--page-jobs N] [--sections [SKIP]] [--watch [SECONDS]] [--timeout SECONDS] [--max-pages N] [--max-memory MB] [--matrix] [--queries FILE] [--funding]
 # -------------------------------------------------------------
 set -euo pipefail
 
@@ -13,15 +13,29 @@ set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 VENV_DIR="$SCRIPT_DIR/venv"
 SCRIPT_PATH="$SCRIPT_DIR/pdf_keyword_scan.py"
+DEPS=("PyMuPDF<2" bibtexparser)
+# Only needed by --matrix (and keyword_stats.py)
+MATRIX_DEPS=(numpy scipy)
+DEPS_STAMP="$VENV_DIR/.deps"
 
 # Print usage
 usage() {
   cat <<EOF
-Usage: $0 --file /path/to/file.pdf|file.bib [--keywords "kw1,kw2"] [--group "GroupName"]
+Usage: $0 --file /path/to/file.pdf|file.bib [--keywords "kw1,kw2"] [--group "GroupName"] [--jobs N] [--page-jobs N] [--sections [SKIP]] [--watch [SECONDS]] [--timeout SECONDS] [--max-pages N] [--max-memory MB] [--matrix] [--queries FILE] [--funding]
 Options:
   -f|--file       Path to the PDF or .bib file to scan (required)
   -k|--keywords   Comma-separated list of keywords to search for (optional)
   -g|--group      Name of the keyword group to filter (.bib mode only) (optional)
+  -j|--jobs       Number of worker processes (.bib mode only, 0 = all cores) (optional)
+  --page-jobs     Worker processes extracting the pages of long PDFs (0 = all cores) (optional)
+  -s|--sections   Tag hits with their document section and skip the SKIP sections (default references, "none" = tag only) (optional)
+  -w|--watch      Keep running and rescan on .bib/PDF changes, polling every SECONDS (default 2) (.bib mode only) (optional)
+  --timeout       Time budget per PDF in seconds, scanned in a supervised worker (.bib mode only) (optional)
+  --max-pages     Skip PDFs of more than N pages (.bib mode only) (optional)
+  --max-memory    Memory cap in MB of each supervised worker (.bib mode only) (optional)
+  --matrix        Also write the documents x keywords matrix for keyword_stats.py (.bib mode only) (optional)
+  --queries       File of named keyword sets compared in one pass (.bib mode only) (optional)
+  --funding       Suggest the Fund_*/Exclude_* groups from AIMS-2-TRIALS/EU-AIMS mentions instead of scanning keywords (optional)
   -h|--help       Show this help message
 EOF
   exit 1
@@ -40,6 +54,36 @@ while [[ "$#" -gt 0 ]]; do
       KEYWORDS="$2"; shift 2;;
     -g|--group)
       GROUP_FILTER="$2"; shift 2;;
+    -j|--jobs)
+      JOBS="$2"; shift 2;;
+    --page-jobs)
+      PAGE_JOBS="$2"; shift 2;;
+    -s|--sections)
+      # Liste facultative de sections à ignorer
+      if [[ $# -gt 1 && "$2" != -* ]]; then
+        SECTIONS="$2"; shift 2
+      else
+        SECTIONS="default"; shift
+      fi;;
+    -w|--watch)
+      # Intervalle facultatif
+      if [[ $# -gt 1 && "$2" =~ ^[0-9]*\.?[0-9]+$ ]]; then
+        WATCH="$2"; shift 2
+      else
+        WATCH="default"; shift
+      fi;;
+    --timeout)
+      TIMEOUT="$2"; shift 2;;
+    --max-pages)
+      MAX_PAGES="$2"; shift 2;;
+    --max-memory)
+      MAX_MEMORY="$2"; shift 2;;
+    --matrix)
+      MATRIX=1; shift;;
+    --queries)
+      QUERIES="$2"; shift 2;;
+    --funding)
+      FUNDING=1; shift;;
     -h|--help)
       usage;;
     *)
@@ -63,27 +107,75 @@ fi
 # Activate venv
 source "$VENV_DIR/bin/activate"
 
-# Install or upgrade dependencies
-echo "⬆️  Upgrading pip and installing dependencies"
-python -m pip install --upgrade pip
-pip install "PyMuPDF<2" bibtexparser
+# Install only the dependencies not yet recorded in the stamp (one per line),
+# so repeated runs start immediately
+if [[ -n "${MATRIX:-}" ]]; then
+  DEPS+=("${MATRIX_DEPS[@]}")
+fi
+MISSING=()
+for dep in "${DEPS[@]}"; do
+  grep -qxF "$dep" "$DEPS_STAMP" 2>/dev/null || MISSING+=("$dep")
+done
+if [[ ${#MISSING[@]} -gt 0 ]]; then
+  echo "⬆️  Upgrading pip and installing dependencies"
+  python -m pip install --upgrade pip
+  pip install "${MISSING[@]}"
+  printf '%s\n' "${MISSING[@]}" >> "$DEPS_STAMP"
+fi
 
 # Build the Python command
 CMD=(python3 "$SCRIPT_PATH")
-if [[ -n "${KEYWORDS:-}" ]]; then
-  CMD+=(-k "$KEYWORDS")
+if [[ -n "${FUNDING:-}" ]]; then
+  CMD+=(funding)
 fi
+# Positional path first: after a flag whose value is optional (--sections,
+# --watch), it would be taken as that flag's value
+CMD+=("$INPUT_FILE")
 if [[ -n "${GROUP_FILTER:-}" ]]; then
   CMD+=(-g "$GROUP_FILTER")
 fi
-# finally, add the positional path argument
-CMD+=("$INPUT_FILE")
+if [[ -n "${JOBS:-}" ]]; then
+  CMD+=(-j "$JOBS")
+fi
+if [[ -n "${PAGE_JOBS:-}" ]]; then
+  CMD+=(--page-jobs "$PAGE_JOBS")
+fi
+# Keyword-scan options (the funding scan always detects sections)
+if [[ -z "${FUNDING:-}" ]]; then
+  if [[ -n "${KEYWORDS:-}" ]]; then
+    CMD+=(-k "$KEYWORDS")
+  fi
+  if [[ -n "${MATRIX:-}" ]]; then
+    CMD+=(--matrix)
+  fi
+  if [[ -n "${QUERIES:-}" ]]; then
+    CMD+=(--queries "$QUERIES")
+  fi
+  if [[ -n "${TIMEOUT:-}" ]]; then
+    CMD+=(--timeout "$TIMEOUT")
+  fi
+  if [[ -n "${MAX_PAGES:-}" ]]; then
+    CMD+=(--max-pages "$MAX_PAGES")
+  fi
+  if [[ -n "${MAX_MEMORY:-}" ]]; then
+    CMD+=(--max-memory "$MAX_MEMORY")
+  fi
+  if [[ "${SECTIONS:-}" == "default" ]]; then
+    CMD+=(--sections)
+  elif [[ -n "${SECTIONS:-}" ]]; then
+    CMD+=(--sections "$SECTIONS")
+  fi
+  if [[ "${WATCH:-}" == "default" ]]; then
+    CMD+=(--watch)
+  elif [[ -n "${WATCH:-}" ]]; then
+    CMD+=(--watch "$WATCH")
+  fi
+fi
 
 # Run
 echo "🚀 Running pdf_keyword_scan.py"
 "${CMD[@]}"
 
-# Deactivate venv
+# Deactivate venv (kept for the next run; delete venv/ to reinstall)
 deactivate
-rm -rf "$VENV_DIR"
 echo "✅ Done."
@@ -0,0 +1,287 @@
+"""
+funding.py
+
+Support-attribution detection for the `funding` subcommand of
+pdf_keyword_scan.py (Protocol Phase A, Step 8).
+
+Mentions of AIMS-2-TRIALS (and its grant 777394) and of EU-AIMS (grant 115300)
+are found with patterns that tolerate the spacing, hyphen and soft-hyphen
+variants of the PDFs ("AIMS2-Trials", "AIMS- 2- TRIALS", "777 394", "EU AIMS").
+Each sentence holding a mention is then classified:
+
+  - context: where the mention is, from the section headings of sections.py
+    and the wording of the sentence (funding section, acknowledgements,
+    support statement elsewhere, conflict of interest, author affiliation,
+    reference or in-text citation);
+  - scope: support of the study itself (main funder or one of several) or of
+    one or several authors, recognised from their initials ("J.B. is
+    supported by", "(E.C., S.C.)") checked against the author list of the entry;
+  - certainty: Sure when the sentence says who is supported, Unsure when it
+    only describes the project ("The AIMS-2-TRIALS project has received
+    funding from...").
+
+suggest_tags() turns the classified mentions of a document into the JabRef
+groups of the Fund_* and Exclude_* families. The suggestions are meant to be
+checked, not applied blindly: every mention is reported with its sentence.
+"""
+import re
+from typing import List, NamedTuple, Set, Tuple
+
+A2T = "AIMS-2-TRIALS"
+EU_AIMS = "EU-AIMS"
+
+# Séparateurs tolérés : espaces, tirets (y compris typographiques), trait d'union conditionnel
+_SEP = r"[\s\-\u00ad\u2010-\u2015_]{0,3}"
+
+# Projet -> motifs reconnus
+PROJECTS = {
+    A2T: rf"(?i:aims{_SEP}2{_SEP}trials?|autism innovative medicine studies{_SEP}2{_SEP}trials)"
+         rf"|777{_SEP}394",
+    # « EU aims to... » : la forme courte n'est reconnue qu'en capitales
+    EU_AIMS: rf"(?:EU|Eu){_SEP}(?:AIMS|Aims)|(?i:european autism interventions)|115{_SEP}300",
+}
+
+# Contextes d'une mention
+FUNDING = "funding"
+ACKNOWLEDGEMENTS = "acknowledgements"
+SUPPORT = "support"
+COI = "coi"
+AFFILIATION = "affiliation"
+REFERENCE = "reference"
+TEXT = "text"
+
+CONTEXTS = {
+    FUNDING: "funding section",
+    ACKNOWLEDGEMENTS: "acknowledgements",
+    SUPPORT: "support statement outside the funding sections",
+    COI: "conflict of interest",
+    AFFILIATION: "author affiliation",
+    REFERENCE: "reference",
+    TEXT: "cited in the text",
+}
+
+# Portée d'un soutien, dans l'ordre de préférence des suggestions
+SCOPES = ("Main_Proj", "Not_Main_Proj", "Several_Auth", "One_Auth")
+
+# Groupes JabRef que le scan peut proposer
+FUND_A2T = "Fund_A2T"
+FUND_EU_AIMS = "Fund_EuAims"
+EXCLUDE_ACK = "Exclude_A2T_Funding_Mention_Acknowledgements"
+EXCLUDE_COI = "Exclude_A2T_Funding_Mention_Coi"
+EXCLUDE_CITED = "Exclude_A2T_Only_Cited"
+EXCLUDE_NONE = "Exclude_No_A2T_Funding_Mention"
+TAGS = ([FUND_A2T, FUND_EU_AIMS]
+        + [f"Fund_{scope}_{certainty}_Section"
+           for scope in SCOPES for certainty in ("Sure", "Unsure")]
+        + [EXCLUDE_ACK, EXCLUDE_COI, EXCLUDE_CITED, EXCLUDE_NONE])
+
+_SUPPORT = re.compile(
+    r"\b(?:supported|funded|financed|sponsored|funding|grant agreement|"
+    r"with the support of|financial (?:support|contributions?)|"
+    r"(?:receive[sd]?|receiving)\b[^.;]{0,40}?\b(?:support|grants?))\b", re.I)
+_COI = re.compile(
+    r"\b(?:conflicts? of interests?|competing (?:financial )?interests?|"
+    r"declarations? of interests?|disclos\w*|consult\w*|advisory (?:boards?|committees?)|"
+    r"honorari\w*|speaker(?:'s|s)? (?:fees|bureau)|royalt\w*|stock options?)\b", re.I)
+_THIS_STUDY = re.compile(
+    r"\b(?:this|the present|the current|our)\s+(?:study|work|research|project|paper|"
+    r"article|publication|analysis|analyses|manuscript|review|trial|investigation)\b", re.I)
+_AFFILIATION = re.compile(
+    r"\b(?:department|university|institute|hospital|cent(?:re|er)|consortium|group|"
+    r"network|laborator\w*|school|faculty|behalf|team|members?)\b|@", re.I)
+_CITATION = re.compile(
+    r"\bet al\.|\bdoi\b|https?://|\(\d{4}[a-z]?\)|\b\d+\(\d+\):\s?\d+", re.I)
+# Numéro de subvention : jeton majuscules/chiffres d'au moins 5 caractères dont un chiffre
+_GRANT_ID = re.compile(r"(?<![\w/])(?=[A-Z0-9/\-]*\d)[A-Z0-9][A-Z0-9/\-]{4,}(?![\w/])")
+_OWN_GRANTS = re.compile(rf"777{_SEP}394|115{_SEP}300")
+
+# Initiales d'auteur (« J.B. », « TF-Y », « S.B.-C. ») ou « Prof. Nom », « Dr Nom »
+_INITIALS = r"[A-Z]\.?(?:\s?-?\s?[A-Z]\.?){0,3}"
+_PERSON = rf"(?:(?:Prof(?:essor)?|Dr)\.?\s+[A-Z][\w'\-]+|{_INITIALS})"
+_SUBJECT = re.compile(
+    rf"(?<![\w.])({_PERSON}(?:\s*(?:,|and|&)\s*{_PERSON})*)\s+"
+    r"(?:is|was|are|were|has|have|had|received|receives|acknowledges?)\b")
+_PAREN = re.compile(rf"\(\s*({_INITIALS}(?:\s*[,;]\s*(?:and\s+)?{_INITIALS})*)\s*\)")
+_PERSON_RE = re.compile(_PERSON)
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+class Mention(NamedTuple):
+    page: int
+    projects: Tuple[str, ...]
+    section: str
+    context: str
+    sentence: str
+    linked: bool            # soutien attribué (section Funding, ou formulation de soutien)
+    scope: str              # SCOPES, "" sans soutien attribué
+    sure: bool
+    authors: Tuple[str, ...]
+
+
+class MentionMatcher:
+    """
+    Motifs de PROJECTS en une seule alternance ; même interface que
+    KeywordMatcher (finditer() -> (projet, début, fin)), utilisable par
+    pdf_keyword_scan.iter_matches().
+    """
+
+    def __init__(self, projects: dict = None):
+        projects = PROJECTS if projects is None else projects
+        self.keywords = list(projects)
+        self.patterns = [(name, re.compile(pattern)) for name, pattern in projects.items()]
+        self._groups = {f"p{i}": name for i, name in enumerate(projects)}
+        self._regex = re.compile("|".join(
+            rf"(?<!\w)(?P<p{i}>{pattern})(?!\w)" for i, pattern in enumerate(projects.values())))
+
+    def finditer(self, text: str) -> List[Tuple[str, int, int]]:
+        return [(self._groups[m.lastgroup], m.start(), m.end())
+                for m in self._regex.finditer(text)]
+
+
+def author_initials(author_field: str) -> Set[str]:
+    """
+    Formes abrégées des auteurs d'une entrée .bib : initiales complètes
+    (« Buitelaar, Jan K. » -> JKB), prénom + nom (JB) et nom de famille.
+    """
+    forms = set()
+    for author in author_field.split(" and "):
+        author = author.strip()
+        if not author or author.lower() == "others":
+            continue
+        if "," in author:
+            last, _, first = author.partition(",")
+        else:
+            first, _, last = author.rpartition(" ")
+        given = [_LETTER.search(p) for p in re.split(r"[\s.\-]+", first) if p]
+        given = [m.group().upper() for m in given if m]
+        # Particules en minuscules (van, de) ignorées dans les initiales du nom
+        family = [m.group().upper() for p in re.split(r"[\s\-]+", last)
+                  for m in [_LETTER.search(p)] if m and not p[:1].islower()]
+        if not family:
+            continue
+        forms.add("".join(given + family))
+        forms.add("".join(given[:1] + family))
+        forms.add(re.sub(r"[{}\\\"'`^~]", "", last).strip().lower())
+    return forms
+
+
+def _person_key(person: str) -> str:
+    if person[:1] in "PD" and re.match(r"(?:Prof(?:essor)?|Dr)\b", person):
+        return person.split()[-1].lower()
+    return "".join(ch for ch in person if ch.isupper())
+
+
+def supported_authors(sentence: str, initials: Set[str] = None) -> Tuple[str, ...]:
+    """
+    Auteurs à qui la phrase attribue un soutien : sujet en initiales ou
+    « Prof. Nom » devant is/has/received..., ou initiales entre parenthèses.
+    Avec la liste des auteurs de l'entrée, seules les initiales qui y
+    correspondent sont retenues ; sans elle, seules les formes avec point ou
+    tiret (« J.B. », « TF-Y »), pour ne pas prendre un sigle pour un auteur.
+    """
+    found = []
+    for regex in (_SUBJECT, _PAREN):
+        for m in regex.finditer(sentence):
+            for person in _PERSON_RE.findall(m.group(1)):
+                key = _person_key(person)
+                if not key or person in found:
+                    continue
+                if initials:
+                    ok = key in initials
+                else:
+                    ok = key.islower() or any(ch in person for ch in ".-")
+                if ok:
+                    found.append(person.strip())
+    return tuple(found)
+
+
+def classify(section: str, before: str, sentence: str, at: int,
+             initials: Set[str] = None) -> Tuple[str, bool, str, bool, Tuple[str, ...]]:
+    """
+    (contexte, soutien attribué, portée, certitude, auteurs) d'une phrase
+    dont la première mention commence à `at` ; `before` est la phrase qui
+    la précède et `section` la section du document (sections.py).
+    """
+    support = _SUPPORT.search(sentence)
+    if section == "references":
+        context = REFERENCE
+    elif section == "funding":
+        context = FUNDING
+    elif section == "acknowledgements":
+        context = ACKNOWLEDGEMENTS
+    elif section == "declarations":
+        context = FUNDING if support and not _COI.search(sentence) else COI
+    elif _COI.search(sentence):
+        context = COI
+    elif support:
+        context = SUPPORT
+    elif _CITATION.search(sentence):
+        context = REFERENCE
+    elif section in ("front", "appendix") and _AFFILIATION.search(sentence):
+        context = AFFILIATION
+    else:
+        context = TEXT
+
+    linked = context == FUNDING or (context in (ACKNOWLEDGEMENTS, SUPPORT) and bool(support))
+    if not linked:
+        return context, False, "", False, ()
+
+    authors = supported_authors(sentence, initials)
+    this_study = bool(_THIS_STUDY.search(sentence))
+    if authors or this_study:
+        sure = True
+    elif context == SUPPORT:
+        # Hors des sections Funding/Acknowledgements, le soutien doit viser cette étude
+        sure = False
+    else:
+        # Le projet sujet de la phrase (« AIMS-2-TRIALS receives support from ») :
+        # description du projet plutôt que soutien de l'étude
+        sure = support is None or support.start() < at
+
+    if authors:
+        scope = "One_Auth" if len(authors) == 1 else "Several_Auth"
+    else:
+        others = [g for g in _GRANT_ID.findall(sentence[:at]) if not _OWN_GRANTS.search(g)]
+        main = not others and not (_SUPPORT.search(before) and not _OWN_GRANTS.search(before))
+        scope = "Main_Proj" if main else "Not_Main_Proj"
+    return context, True, scope, sure, authors
+
+
+def suggest_tags(mentions: List[Mention]) -> List[str]:
+    """Groupes Fund_* / Exclude_* proposés pour un document d'après ses mentions."""
+    tags = []
+    a2t = [m for m in mentions if A2T in m.projects]
+    funded = [m for m in a2t if m.linked]
+    if funded:
+        best = min(funded, key=lambda m: (not m.sure, SCOPES.index(m.scope)))
+        tags += [FUND_A2T, f"Fund_{best.scope}_{'Sure' if best.sure else 'Unsure'}_Section"]
+    if any(m.linked for m in mentions if EU_AIMS in m.projects):
+        tags.insert(1 if funded else 0, FUND_EU_AIMS)
+    if funded:
+        return tags
+
+    contexts = {m.context for m in a2t}
+    if ACKNOWLEDGEMENTS in contexts:
+        tags.append(EXCLUDE_ACK)
+    elif COI in contexts:
+        tags.append(EXCLUDE_COI)
+    elif contexts and contexts <= {REFERENCE, TEXT}:
+        tags.append(EXCLUDE_CITED)
+    else:
+        # Aucune mention, EU-AIMS seul ou affiliation seule
+        tags.append(EXCLUDE_NONE)
+    return tags
+
+
+def describe(mention: Mention) -> str:
+    """Contexte et portée d'une mention, pour le rapport."""
+    text = CONTEXTS[mention.context]
+    if not mention.linked:
+        return text
+    if mention.scope == "Main_Proj":
+        scope = "study support, main funder"
+    elif mention.scope == "Not_Main_Proj":
+        scope = "study support, one of several funders"
+    else:
+        scope = f"support of {', '.join(mention.authors)}"
+    return f"{text}, {scope}, {'sure' if mention.sure else 'unsure'}"
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+keyword_stats.py
+
+Documents x keywords matrix written by pdf_keyword_scan.py --matrix, and the
+group-level statistics of Phase D computed from it.
+
+The matrix file (<report>.matrix.npz, numpy.savez_compressed) holds:
+
+  - counts:      sparse CSR matrix (documents x keywords) of keyword occurrences;
+  - keywords, families: keyword strings and the header of their keyword group;
+  - keys, doi, year, has_pdf: one value per .bib entry, in the order of the
+    report (entries without PDF are rows of zeros with has_pdf False);
+  - groups, membership: JabRef group names and a sparse boolean CSR matrix
+    (documents x groups);
+  - access, doc_type, participation, funding: one category per entry taken
+    from its Access_*, Doc_Type_*, Participatory_* and Fund_* groups
+    (CATEGORIES), "" when it has none.
+
+Every statistic is one sparse product instead of one scanner run per
+--group-filter: with P the 0/1 documents x keywords presence matrix and S a
+subsets x documents indicator matrix (groups, categories, years or group
+expressions), S @ P counts the documents of each subset that mention each
+keyword, and P.T @ P is the keyword co-occurrence matrix.
+
+Usage:
+    python3 keyword_stats.py _bib_keyword_scan.matrix.npz [--by funding --by year]
+        [--compare "Fund_A2T AND Participatory_Yes" ...] [-g FILTER]
+        [--level keyword] [--cooccurrence [N]] [-o stats.txt]
+
+Requirements:
+    - NumPy and SciPy:  pip install numpy scipy
+"""
+import argparse
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    sys.exit("❌  NumPy and SciPy are required for the keyword matrix:  pip install numpy scipy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from group_filter import GroupIndex, GroupQueryError
+
+MATRIX_SUFFIX = ".matrix.npz"
+
+# Catégorie -> motif du groupe JabRef d'où elle est lue (premier groupe de
+# l'entrée qui correspond, valeur = premier sous-groupe du motif)
+CATEGORIES = {
+    "access": re.compile(r"Access_(\w+)", re.I),
+    "doc_type": re.compile(r"Doc_Type_(\w+)", re.I),
+    "participation": re.compile(r"Participatory_(\w+)", re.I),
+    # Portée et certitude du financement, quelle que soit la source (Section, A2T_Website)
+    "funding": re.compile(r"Fund_((?:Not_)?Main_Proj_(?:Sure|Unsure)|"
+                          r"(?:One|Several)_Auth_(?:Sure|Unsure))", re.I),
+}
+
+
+def entry_category(groups: List[str], pattern: re.Pattern) -> str:
+    """Doc_Type_Research -> « Research », Fund_Main_Proj_Sure_Section -> « Main_Proj_Sure »."""
+    for g in groups:
+        m = pattern.match(g)
+        if m:
+            return m.group(1)
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Writing (pdf_keyword_scan.py --matrix)
+# ---------------------------------------------------------------------------
+
+class MatrixBuilder:
+    """
+    Accumule les comptes d'occurrences document par document (coordonnées
+    COO dans des tableaux d'entiers) et les métadonnées de chaque entrée,
+    puis écrit le fichier .matrix.npz.
+    """
+
+    def __init__(self, keywords: List[str], families: List[str]):
+        self.keywords = list(keywords)
+        self.families = list(families)
+        self._column = {kw: i for i, kw in enumerate(self.keywords)}
+        self.rows, self.cols, self.data = [], [], []
+        self.keys, self.doi, self.year, self.has_pdf, self.groups = [], [], [], [], []
+
+    def add(self, entry: dict, keywords: Iterable[str], has_pdf: bool = True) -> None:
+        """Ajoute une ligne : l'entrée .bib et le mot-clé de chacune de ses occurrences."""
+        row = len(self.keys)
+        counts = {}
+        for kw in keywords:
+            col = self._column[kw]
+            counts[col] = counts.get(col, 0) + 1
+        for col in sorted(counts):
+            self.rows.append(row)
+            self.cols.append(col)
+            self.data.append(counts[col])
+        try:
+            year = int(entry.get("year", "")[:4])
+        except ValueError:
+            year = 0
+        self.keys.append(entry.get("ID", ""))
+        self.doi.append(entry.get("doi", ""))
+        self.year.append(year)
+        self.has_pdf.append(has_pdf)
+        self.groups.append([g.strip() for g in entry.get("groups", "").split(",") if g.strip()])
+
+    def save(self, path: str) -> Tuple[int, int]:
+        """Écrit la matrice et ses métadonnées ; renvoie (documents, mots-clés)."""
+        shape = (len(self.keys), len(self.keywords))
+        counts = sparse.csr_matrix(
+            (np.array(self.data, dtype=np.int32),
+             (np.array(self.rows, dtype=np.int32), np.array(self.cols, dtype=np.int32))),
+            shape=shape)
+
+        # Groupes : noms dans l'ordre de première apparition, appartenance en CSR booléen
+        names, index, rows, cols = [], {}, [], []
+        for row, groups in enumerate(self.groups):
+            for g in dict.fromkeys(groups):
+                if g not in index:
+                    index[g] = len(names)
+                    names.append(g)
+                rows.append(row)
+                cols.append(index[g])
+        membership = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=bool), (np.array(rows, dtype=np.int32),
+                                              np.array(cols, dtype=np.int32))),
+            shape=(shape[0], len(names)))
+
+        categories = {name: np.array([entry_category(groups, pattern) for groups in self.groups],
+                                     dtype=str)
+                      for name, pattern in CATEGORIES.items()}
+        np.savez_compressed(
+            path,
+            counts_data=counts.data, counts_indices=counts.indices,
+            counts_indptr=counts.indptr, counts_shape=np.array(shape),
+            keywords=np.array(self.keywords, dtype=str),
+            families=np.array(self.families, dtype=str),
+            keys=np.array(self.keys, dtype=str), doi=np.array(self.doi, dtype=str),
+            year=np.array(self.year, dtype=np.int32),
+            has_pdf=np.array(self.has_pdf, dtype=bool),
+            groups=np.array(names, dtype=str),
+            membership_indices=membership.indices, membership_indptr=membership.indptr,
+            **categories)
+        return shape
+
+
+# ---------------------------------------------------------------------------
+# Reading and statistics
+# ---------------------------------------------------------------------------
+
+class KeywordMatrix:
+    """Fichier .matrix.npz relu : comptes en CSR et métadonnées alignées sur les lignes."""
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as f:
+            shape = tuple(f["counts_shape"])
+            self.counts = sparse.csr_matrix(
+                (f["counts_data"], f["counts_indices"], f["counts_indptr"]), shape=shape)
+            self.keywords = f["keywords"]
+            self.families = f["families"]
+            self.keys, self.doi = f["keys"], f["doi"]
+            self.year, self.has_pdf = f["year"], f["has_pdf"]
+            self.groups = f["groups"]
+            indices = f["membership_indices"]
+            self.membership = sparse.csr_matrix(
+                (np.ones(len(indices), dtype=bool), indices, f["membership_indptr"]),
+                shape=(shape[0], len(self.groups)))
+            self.categories = {name: f[name] for name in CATEGORIES}
+        self._index = None
+
+    def __len__(self) -> int:
+        return self.counts.shape[0]
+
+    def presence(self, level: str = "family") -> Tuple[np.ndarray, "sparse.csr_matrix"]:
+        """
+        (libellés des colonnes, matrice 0/1 documents x colonnes) : présence
+        de chaque mot-clé, ou d'au moins un mot-clé de chaque famille.
+        """
+        present = (self.counts > 0).astype(np.int32)
+        if level == "keyword":
+            return self.keywords, present
+        labels, column = np.unique(self.families, return_inverse=True)
+        # Ordre des familles dans le rapport, pas l'ordre alphabétique
+        order = np.argsort([np.flatnonzero(self.families == lab)[0] for lab in labels])
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        fam = sparse.csr_matrix((np.ones(len(column), dtype=np.int32),
+                                 (np.arange(len(column)), rank[column])),
+                                shape=(len(column), len(labels)))
+        return labels[order], ((present @ fam) > 0).astype(np.int32)
+
+    def select(self, expr: str) -> np.ndarray:
+        """Masque booléen des documents qui satisfont l'expression de groupes (group_filter.py)."""
+        if self._index is None:
+            rows = np.split(self.groups[self.membership.indices], self.membership.indptr[1:-1])
+            self._index = GroupIndex([{"groups": ", ".join(r)} for r in rows])
+        bits = self._index.evaluate(expr)
+        raw = np.frombuffer(bits.to_bytes((len(self) + 7) // 8 or 1, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:len(self)].astype(bool)
+
+    @property
+    def unknown_groups(self) -> List[str]:
+        return self._index.unknown if self._index is not None else []
+
+
+def indicator(values: np.ndarray, mask: np.ndarray = None) -> Tuple[np.ndarray, "sparse.csr_matrix"]:
+    """(valeurs distinctes, matrice 0/1 valeurs x documents) d'une colonne catégorielle."""
+    labels, column = np.unique(values, return_inverse=True)
+    keep = np.ones(len(values), dtype=bool) if mask is None else mask
+    docs = np.flatnonzero(keep)
+    s = sparse.csr_matrix((np.ones(len(docs), dtype=np.int32), (column[docs], docs)),
+                          shape=(len(labels), len(values)))
+    return labels, s
+
+
+def stack_masks(masks: List[np.ndarray]) -> "sparse.csr_matrix":
+    """Matrice 0/1 sous-ensembles x documents à partir de masques booléens."""
+    return sparse.csr_matrix(np.vstack(masks).astype(np.int32))
+
+
+def prevalence(s: "sparse.csr_matrix", present: "sparse.csr_matrix",
+               has_pdf: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Pour chaque sous-ensemble (ligne de s) : nombre d'études, d'études avec
+    PDF, d'études avec au moins une occurrence et, par colonne de `present`,
+    d'études concernées — trois produits matrice-vecteur et un produit creux.
+    """
+    any_hit = np.asarray(present.sum(axis=1)).ravel() > 0
+    return {
+        "studies": np.asarray(s.sum(axis=1)).ravel(),
+        "pdf": s @ has_pdf.astype(np.int32),
+        "any": s @ any_hit.astype(np.int32),
+        "columns": (s @ present).toarray(),
+    }
+
+
+def cooccurrence(present: "sparse.csr_matrix", mask: np.ndarray = None) -> np.ndarray:
+    """Matrice colonnes x colonnes du nombre d'études où les deux apparaissent (diagonale : études)."""
+    if mask is not None:
+        present = present[np.flatnonzero(mask)]
+    return (present.T @ present).toarray()
+
+
+def top_pairs(co: np.ndarray, n: int) -> List[Tuple[int, int, int, float]]:
+    """(i, j, études communes, indice de Jaccard) des n paires les plus fréquentes."""
+    i, j = np.triu_indices(co.shape[0], k=1)
+    both = co[i, j]
+    union = co[i, i] + co[j, j] - both
+    jaccard = np.divide(both, union, out=np.zeros(len(both)), where=union > 0)
+    order = np.lexsort((-jaccard, -both))
+    order = order[both[order] > 0][:n]
+    return [(int(i[k]), int(j[k]), int(both[k]), float(jaccard[k])) for k in order]
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def short_family(header: str) -> str:
+    """« # ░░ INVOLVEMENT & ENGAGEMENT ░░ » -> « INVOLVEMENT & ENGAGEMENT »."""
+    return header.strip("#░ ") or header
+
+
+def write_table(f, title: str, labels: List[str], stats: Dict[str, np.ndarray],
+                rows: List[str]) -> None:
+    """Tableau lignes = familles ou mots-clés, colonnes = sous-ensembles."""
+    def cell(n, total):
+        return f"{n} ({n / total * 100:.1f}%)" if total else str(n)
+
+    body = [("Studies", [str(v) for v in stats["studies"]]),
+            ("Studies with a PDF", [str(v) for v in stats["pdf"]]),
+            ("Any keyword", [cell(v, t) for v, t in zip(stats["any"], stats["pdf"])])]
+    body += [(row, [cell(v, t) for v, t in zip(stats["columns"][:, k], stats["pdf"])])
+             for k, row in enumerate(rows)]
+    first = max(len(r) for r, _c in body)
+    widths = [max(len(lab), *(len(c[k]) for _r, c in body)) for k, lab in enumerate(labels)]
+    f.write(f"{title}\n\n")
+    f.write(" " * (first + 2) + "  ".join(lab.ljust(w) for lab, w in zip(labels, widths)).rstrip()
+            + "\n")
+    for row, cells in body:
+        f.write(f"{row.ljust(first)}  " + "  ".join(c.ljust(w) for c, w in zip(cells, widths)).rstrip()
+                + "\n")
+    f.write("\n")
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(
+        description="Group-level keyword statistics from a pdf_keyword_scan.py --matrix file.")
+    ap.add_argument("path", help=f"Matrix file (<report>{MATRIX_SUFFIX})")
+    ap.add_argument("--by", action="append", default=[],
+                    choices=sorted(CATEGORIES) + ["year"],
+                    help="Compare the studies by category or publication year (repeatable)")
+    ap.add_argument("--compare", action="append", default=[], metavar="EXPR",
+                    help="Compare the studies selected by JabRef group expressions "
+                         "(repeatable, same syntax as --group-filter)")
+    ap.add_argument("-g", "--group-filter",
+                    help="Restrict every statistic to the studies matching this group expression")
+    ap.add_argument("--level", choices=("family", "keyword"), default="family",
+                    help="Rows of the tables: keyword families (default) or keywords")
+    ap.add_argument("--cooccurrence", type=int, nargs="?", const=20, metavar="N",
+                    help="List the N most frequent co-occurring pairs (default: 20)")
+    ap.add_argument("-o", "--output", help="Write the statistics to this file instead of stdout")
+    args = ap.parse_args(argv)
+
+    if not os.path.isfile(args.path):
+        ap.error(f"Matrix file not found: {args.path}")
+    m = KeywordMatrix(args.path)
+    labels, present = m.presence(args.level)
+    rows = [short_family(lab) for lab in labels] if args.level == "family" else list(labels)
+
+    try:
+        mask = m.select(args.group_filter) if args.group_filter else np.ones(len(m), dtype=bool)
+        compare = [m.select(expr) & mask for expr in args.compare]
+    except GroupQueryError as exc:
+        sys.exit(f"❌  Invalid group expression: {exc}")
+    if m.unknown_groups:
+        print(f"⚠️  Unknown group(s): {', '.join(m.unknown_groups)}", file=sys.stderr)
+
+    by = args.by
+    if not by and not args.compare and args.cooccurrence is None:
+        by, args.cooccurrence = ["year"], 10
+
+    f = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    scope = f" ({args.group_filter})" if args.group_filter else ""
+    write_table(f, f"Keyword prevalence, all studies{scope}:", ["All"],
+                prevalence(stack_masks([mask]), present, m.has_pdf), rows)
+    if compare:
+        write_table(f, f"Keyword prevalence by group expression{scope}:", args.compare,
+                    prevalence(stack_masks(compare), present, m.has_pdf), rows)
+    for name in by:
+        values = m.year if name == "year" else m.categories[name]
+        values_labels, s = indicator(values, mask)
+        shown = [str(v) if str(v) not in ("", "0") else "(none)" for v in values_labels]
+        write_table(f, f"Keyword prevalence by {name}{scope}:", shown,
+                    prevalence(s, present, m.has_pdf), rows)
+    if args.cooccurrence:
+        co = cooccurrence(present, mask)
+        f.write(f"Co-occurrence (studies mentioning both){scope}:\n\n")
+        for i, j, both, jac in top_pairs(co, args.cooccurrence):
+            f.write(f" {rows[i]} + {rows[j]}: {both} studies (Jaccard {jac:.2f})\n")
+        f.write("\n")
+    if args.output:
+        f.close()
+        print(f"✅ Statistics written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
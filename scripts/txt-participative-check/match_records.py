@@ -0,0 +1,278 @@
+"""
+match_records.py
+
+Structured output for pdf_keyword_scan.py --format: one record per keyword
+hit, for analysis scripts that should not re-parse the text report.
+
+Every record carries the bib key, DOI, PDF path, page, keyword, the header of
+its keyword group, its document section (with --sections), the sentence, the
+context (with --context) and offsets: `start`/`end` of the match within the
+sentence and `page_offset` of the match in the cleaned page text, as quoted
+(positions found in the Unicode-folded text are mapped back to it).
+
+  - jsonl:    one JSON object per line
+  - csv:      one row per hit, RECORD_FIELDS as header
+  - columnar: a single binary file of little-endian integer columns with
+              interned string tables, which read_columns() memory-maps:
+
+      PKSCOL02 | column blobs (8-byte aligned) | UTF-8 text blob | footer JSON
+               | footer length (uint64) | PKSCOL02
+
+    The footer gives the row count, the offset, type and length of every
+    column and the string tables (documents, keywords, groups, sections);
+    sentences and contexts are (offset, length) slices of the text blob. NumPy
+    users can map a column with numpy.frombuffer(buf, dtype, count, offset).
+"""
+import csv
+import json
+import mmap
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+RECORD_FIELDS = ("key", "doi", "pdf", "page", "keyword", "group", "section",
+                 "sentence", "context", "start", "end", "page_offset")
+FORMATS = ("jsonl", "csv", "columnar")
+EXTENSIONS = {"jsonl": ".jsonl", "csv": ".csv", "columnar": ".columns"}
+
+MAGIC = b"PKSCOL02"
+# (nom, code array, dtype NumPy)
+COLUMNS = (
+    ("doc", "I", "<u4"),
+    ("page", "I", "<u4"),
+    ("keyword", "I", "<u4"),
+    ("group", "I", "<u4"),
+    ("section", "I", "<u4"),
+    ("start", "I", "<u4"),
+    ("end", "I", "<u4"),
+    ("page_offset", "I", "<u4"),
+    ("sentence_offset", "Q", "<u8"),
+    ("sentence_length", "I", "<u4"),
+    ("context_offset", "Q", "<u8"),
+    ("context_length", "I", "<u4"),
+)
+
+# (début de la phrase dans le texte émis, longueur de la phrase,
+#  début et fin de l'occurrence dans la phrase, position dans la page)
+Offsets = Tuple[int, int, int, int, int]
+
+
+def keyword_headers(groups) -> Dict[str, str]:
+    """Mot-clé -> en-tête de sa famille (KEYWORD_GROUPS ou mots-clés personnalisés)."""
+    return {kw: hdr for hdr, kws in groups for kw in kws}
+
+
+class _RecordWriter:
+    """Base commune : suit le document courant et construit les enregistrements."""
+
+    def __init__(self, path: str, groups, context: bool):
+        self.path = path
+        self.headers = keyword_headers(groups)
+        self.context = context
+        self.key = self.doi = ""
+        self.count = 0
+
+    def begin(self, key: str, doi: str) -> None:
+        self.key, self.doi = key, doi
+
+    def record(self, page, kw, text, pdf_path, offsets: Offsets, section: str = "") -> dict:
+        sent_at, sent_len, start, end, page_offset = offsets
+        return {
+            "key": self.key,
+            "doi": self.doi,
+            "pdf": pdf_path,
+            "page": page,
+            "keyword": kw,
+            "group": self.headers.get(kw, ""),
+            "section": section,
+            "sentence": text[sent_at:sent_at + sent_len],
+            "context": text if self.context else "",
+            "start": start,
+            "end": end,
+            "page_offset": page_offset,
+        }
+
+
+class JsonlWriter(_RecordWriter):
+
+    def __init__(self, path: str, groups, context: bool):
+        super().__init__(path, groups, context)
+        self.f = open(path, "w", encoding="utf-8")
+
+    def __call__(self, page, kw, text, pdf_path, offsets: Offsets, section: str = "") -> None:
+        self.f.write(json.dumps(self.record(page, kw, text, pdf_path, offsets, section),
+                                ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class CsvWriter(_RecordWriter):
+
+    def __init__(self, path: str, groups, context: bool):
+        super().__init__(path, groups, context)
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.csv = csv.DictWriter(self.f, fieldnames=RECORD_FIELDS)
+        self.csv.writeheader()
+
+    def __call__(self, page, kw, text, pdf_path, offsets: Offsets, section: str = "") -> None:
+        self.csv.writerow(self.record(page, kw, text, pdf_path, offsets, section))
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class ColumnarWriter(_RecordWriter):
+    """
+    Colonnes d'entiers en mémoire (quelques dizaines d'octets par occurrence),
+    textes en flux dans un fichier temporaire ; close() assemble le fichier.
+    """
+
+    def __init__(self, path: str, groups, context: bool):
+        super().__init__(path, groups, context)
+        self.columns = {name: array(code) for name, code, _dtype in COLUMNS}
+        self.tables: Dict[str, Dict] = {"docs": {}, "keywords": {}, "groups": {}, "sections": {}}
+        self.text = tempfile.TemporaryFile()
+        self.text_size = 0
+
+    def _intern(self, table: str, value) -> int:
+        ids = self.tables[table]
+        if value not in ids:
+            ids[value] = len(ids)
+        return ids[value]
+
+    def _text(self, s: str) -> Tuple[int, int]:
+        data = s.encode("utf-8")
+        offset = self.text_size
+        self.text.write(data)
+        self.text_size += len(data)
+        return offset, len(data)
+
+    def __call__(self, page, kw, text, pdf_path, offsets: Offsets, section: str = "") -> None:
+        rec = self.record(page, kw, text, pdf_path, offsets, section)
+        sent_off, sent_len = self._text(rec["sentence"])
+        ctx_off, ctx_len = self._text(rec["context"]) if rec["context"] else (0, 0)
+        row = {
+            "doc": self._intern("docs", (rec["key"], rec["doi"], rec["pdf"])),
+            "page": page,
+            "keyword": self._intern("keywords", kw),
+            "group": self._intern("groups", rec["group"]),
+            "section": self._intern("sections", section),
+            "start": rec["start"],
+            "end": rec["end"],
+            "page_offset": rec["page_offset"],
+            "sentence_offset": sent_off,
+            "sentence_length": sent_len,
+            "context_offset": ctx_off,
+            "context_length": ctx_len,
+        }
+        for name, value in row.items():
+            self.columns[name].append(value)
+        self.count += 1
+
+    def close(self) -> None:
+        footer = {"rows": self.count, "columns": {}, "text": {}, "tables": {
+            "docs": [list(doc) for doc in self.tables["docs"]],
+            "keywords": list(self.tables["keywords"]),
+            "groups": list(self.tables["groups"]),
+            "sections": list(self.tables["sections"]),
+        }}
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            for name, _code, dtype in COLUMNS:
+                col = self.columns[name]
+                if sys.byteorder == "big":
+                    col.byteswap()
+                footer["columns"][name] = {"dtype": dtype, "offset": f.tell(), "count": len(col)}
+                col.tofile(f)
+                f.write(b"\0" * (-f.tell() % 8))
+            footer["text"] = {"offset": f.tell(), "size": self.text_size}
+            self.text.seek(0)
+            while True:
+                chunk = self.text.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+            data = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+            f.write(data)
+            f.write(struct.pack("<Q", len(data)))
+            f.write(MAGIC)
+        self.text.close()
+
+
+def open_records(fmt: str, base: str, groups, context: bool) -> _RecordWriter:
+    """Writer --format pour le fichier base + extension du format."""
+    writer = {"jsonl": JsonlWriter, "csv": CsvWriter, "columnar": ColumnarWriter}[fmt]
+    return writer(base + EXTENSIONS[fmt], groups, context)
+
+
+# ---------------------------------------------------------------------------
+# Reading the columnar file
+# ---------------------------------------------------------------------------
+
+class Columns:
+    """
+    Lecture d'un fichier --format columnar par mmap : column() renvoie une
+    memoryview typée sur le fichier, sans copie ni analyse de texte.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buf[:8] != MAGIC or self.buf[-8:] != MAGIC:
+            raise ValueError(f"{path} is not a pdf_keyword_scan columnar file")
+        (size,) = struct.unpack("<Q", self.buf[-16:-8])
+        self.footer = json.loads(self.buf[len(self.buf) - 16 - size:-16].decode("utf-8"))
+        self.rows: int = self.footer["rows"]
+        tables = self.footer["tables"]
+        self.docs: List[List[str]] = tables["docs"]
+        self.keywords: List[str] = tables["keywords"]
+        self.groups: List[str] = tables["groups"]
+        self.sections: List[str] = tables["sections"]
+
+    def column(self, name: str) -> memoryview:
+        spec = self.footer["columns"][name]
+        code = "Q" if spec["dtype"] == "<u8" else "I"
+        width = 8 if code == "Q" else 4
+        view = memoryview(self.buf)[spec["offset"]:spec["offset"] + spec["count"] * width]
+        return view.cast(code)
+
+    def _text(self, offset: int, length: int) -> str:
+        base = self.footer["text"]["offset"]
+        return self.buf[base + offset:base + offset + length].decode("utf-8")
+
+    def records(self) -> Iterator[dict]:
+        """Enregistrements complets, comme ceux des formats jsonl et csv."""
+        cols = {name: self.column(name) for name, _code, _dtype in COLUMNS}
+        try:
+            for i in range(self.rows):
+                key, doi, pdf = self.docs[cols["doc"][i]]
+                yield {
+                    "key": key,
+                    "doi": doi,
+                    "pdf": pdf,
+                    "page": cols["page"][i],
+                    "keyword": self.keywords[cols["keyword"][i]],
+                    "group": self.groups[cols["group"][i]],
+                    "section": self.sections[cols["section"][i]],
+                    "sentence": self._text(cols["sentence_offset"][i], cols["sentence_length"][i]),
+                    "context": self._text(cols["context_offset"][i], cols["context_length"][i]),
+                    "start": cols["start"][i],
+                    "end": cols["end"][i],
+                    "page_offset": cols["page_offset"][i],
+                }
+        finally:
+            # Vues relâchées même si le parcours s'arrête avant la fin
+            for view in cols.values():
+                view.release()
+
+    def close(self) -> None:
+        self.buf.close()
+
+
+def read_columns(path: str) -> Columns:
+    return Columns(path)
@@ -0,0 +1,118 @@
+"""
+match_store.py
+
+Compact in-memory store of the keyword hits of a scan, behind the
+ReportWriter of pdf_keyword_scan.py.
+
+Documents (one report block per .bib entry), PDFs, keywords and sections are
+interned as integer ids, and each hit is one row of typed arrays: block, PDF,
+page, keyword, section, the five offsets of match_records.Offsets, and the
+(offset, length) of its sentence or context in a UTF-8 text spool on disk.
+Consecutive hits with the same text (several keywords in one sentence, or the
+same context window) share one copy of it.
+
+A hit therefore costs about 50 bytes of arrays instead of a formatted string
+and its entries in per-keyword sets of PDF paths; occurrence and study counts
+are aggregated from the id columns when the report is written, and the hit
+lines are rendered lazily, reading the spool sequentially.
+"""
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+# Colonnes entières d'une occurrence (code array)
+COLUMNS = (
+    ("block", "I"), ("pdf", "I"), ("page", "I"), ("keyword", "I"), ("section", "I"),
+    ("sent_start", "I"), ("sent_length", "I"), ("start", "I"), ("end", "I"),
+    ("page_offset", "I"), ("text_offset", "Q"), ("text_length", "I"),
+)
+
+
+class MatchStore:
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {name: array(code) for name, code in COLUMNS}
+        self.blocks: List[str] = []         # en-tête de chaque bloc du rapport
+        self.pdfs: List[str] = []
+        self.keywords: List[str] = []
+        self.sections: List[str] = []
+        self._ids: Dict[str, Dict[str, int]] = {"pdfs": {}, "keywords": {}, "sections": {}}
+        self._spool = tempfile.TemporaryFile()
+        self._size = 0
+        self._last_text, self._last_ref = None, (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.columns["page"])
+
+    def _intern(self, table: str, value: str) -> int:
+        ids = self._ids[table]
+        if value not in ids:
+            ids[value] = len(ids)
+            getattr(self, table).append(value)
+        return ids[value]
+
+    def begin(self, header: str) -> int:
+        """Nouveau bloc du rapport (une entrée .bib, un document) ; renvoie son id."""
+        self.blocks.append(header)
+        return len(self.blocks) - 1
+
+    def add(self, page: int, kw: str, text: str, pdf_path: str, offsets=None,
+            section: str = "") -> None:
+        """Ajoute une occurrence au bloc courant (mêmes champs qu'une Match)."""
+        if text != self._last_text:
+            data = text.encode("utf-8")
+            self._spool.write(data)
+            self._last_text, self._last_ref = text, (self._size, len(data))
+            self._size += len(data)
+        if offsets is None:
+            offsets = (0, len(text), 0, 0, 0)
+        row = (len(self.blocks) - 1, self._intern("pdfs", pdf_path), page,
+               self._intern("keywords", kw), self._intern("sections", section),
+               *offsets, *self._last_ref)
+        for (name, _code), value in zip(COLUMNS, row):
+            self.columns[name].append(value)
+
+    # ----- agrégats -----
+
+    def counts(self) -> Tuple[Dict[str, int], Dict[str, int], int]:
+        """
+        (occurrences par mot-clé, études — PDF distincts — par mot-clé,
+        nombre de PDF avec au moins une occurrence).
+        """
+        occ = [0] * len(self.keywords)
+        for k in self.columns["keyword"]:
+            occ[k] += 1
+        width = len(self.keywords) or 1
+        pairs = set(map(lambda p, k: p * width + k, self.columns["pdf"], self.columns["keyword"]))
+        stu = [0] * len(self.keywords)
+        for pair in pairs:
+            stu[pair % width] += 1
+        return (dict(zip(self.keywords, occ)), dict(zip(self.keywords, stu)),
+                len(set(self.columns["pdf"])))
+
+    # ----- lecture -----
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str, str, str, tuple, str]]:
+        """
+        (bloc, page, mot-clé, texte, pdf, positions, section) de chaque
+        occurrence, dans l'ordre d'ajout ; le texte est relu du spool.
+        """
+        self._spool.flush()
+        self._spool.seek(0)
+        c = self.columns
+        last, text = None, ""
+        try:
+            for i in range(len(self)):
+                ref = (c["text_offset"][i], c["text_length"][i])
+                if ref != last:
+                    text, last = self._spool.read(ref[1]).decode("utf-8"), ref
+                offsets = (c["sent_start"][i], c["sent_length"][i], c["start"][i],
+                           c["end"][i], c["page_offset"][i])
+                yield (c["block"][i], c["page"][i], self.keywords[c["keyword"][i]], text,
+                       self.pdfs[c["pdf"][i]], offsets, self.sections[c["section"][i]])
+        finally:
+            # Même sur un parcours interrompu : les ajouts suivants vont en fin de spool
+            self._spool.seek(0, 2)
+
+    def close(self) -> None:
+        self._spool.close()
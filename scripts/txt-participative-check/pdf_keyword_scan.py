@@ -10,16 +10,46 @@ Features:
   - Defines multiple keyword “families” (e.g., participatory research, engagement,
     advocacy) to group related search terms.
   - Uses PyMuPDF to extract and clean text from PDF pages, handling hyphenated
-    line breaks and sentence splitting.
+    line breaks and sentence splitting. Ligatures, Unicode dashes and spaces
+    are folded before matching (text_normalize.py); hits are mapped back to
+    the original text.
   - Supports .bib files via bibtexparser for bibliographic entries, allowing keyword
-    searches in reference metadata.
+    searches in reference metadata. Parsed entries are cached next to the .bib
+    (scripts/common/bib_cache.py), so repeat runs skip the BibTeX parsing.
   - Configurable context mode: include surrounding sentences for richer insights.
+  - Section-aware mode (--sections): headings are detected from the PDF layout,
+    hits are tagged with their section and References can be skipped.
+  - Support attribution (funding subcommand): finds AIMS-2-TRIALS / EU-AIMS
+    mentions and grant numbers, classifies where they appear (funding section,
+    acknowledgements, conflict of interest, affiliation, reference) and suggests
+    the Fund_* / Exclude_* groups of each entry (funding.py).
   - Provides customizable output writers to merge results, count occurrences,
-    and list which documents contain each keyword.
+    and list which documents contain each keyword. Hits are kept as interned
+    integer ids in typed arrays (match_store.py) and rendered at write time.
   - Error checks for required dependencies and reports missing packages.
+  - Per-document budgets (--timeout, --max-pages, --max-memory): PDFs are
+    scanned in supervised worker processes, killed and replaced when they go
+    over budget; skipped, encrypted and textless PDFs are listed next to the
+    report (scan_budget.py).
+  - Watch mode (--watch): stays running after a .bib scan and rescans the
+    entries whose PDF or .bib record changed, by polling file stats.
+  - Keyword set comparison (--queries): several named keyword sets scanned in
+    one extraction pass, one report per set and a comparison table.
+  - Keyword matrix (--matrix): sparse documents x keywords counts with the year,
+    groups and categories of every entry, analysed by keyword_stats.py.
 
 Usage:
     python3 pdf_keyword_scan.py --file path/to/document.pdf [--keywords "kw1,kw2"] [--context]
+    python3 pdf_keyword_scan.py library.bib --queries sets.txt
+    python3 pdf_keyword_scan.py funding library.bib [-g GROUPS] [-j N]
+
+Library use (lazy generators, each PDF is closed as soon as its generator is
+exhausted or closed):
+    import pdf_keyword_scan as pks
+    for page, text in pks.iter_pages("paper.pdf"): ...
+    for sent in pks.iter_sentences("paper.pdf"): ...        # Sentence(page, pos, text)
+    for m in pks.iter_matches("paper.pdf", max_hits=5): ...  # Match(page, keyword, text, pdf, offsets)
+    pks.main(["library.bib", "--context"])                   # same as the command line
 
 Requirements:
     - Python 3.6+
@@ -27,21 +57,44 @@ Requirements:
     - bibtexparser:    pip install bibtexparser
 """
 import argparse
+import hashlib
+import json
+import multiprocessing
 import os
 import re
+import shutil
 import sys
-from collections import defaultdict
-from typing import List, Tuple, TextIO, Set
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import repeat
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple, \
+    TextIO, Set
 
 try:
     import fitz  # PyMuPDF
 except ImportError:
     sys.exit("❌  PyMuPDF is required:  pip install PyMuPDF<2>")
 
-try:
-    import bibtexparser
-except ImportError:
-    sys.exit("❌  The bibtexparser package is required: pip install bibtexparser")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+from bib_cache import load_bib_entries
+from group_filter import GroupIndex, GroupQueryError
+
+from funding import TAGS as FUNDING_TAGS, Mention, MentionMatcher, author_initials, classify, \
+    describe, suggest_tags
+from match_records import FORMATS as RECORD_FORMATS, Offsets, open_records
+from match_store import MatchStore
+from scan_budget import ENCRYPTED, NO_BUDGET, PAGES, REASONS, TEXTLESS, Budget, Skipped, \
+    guarded, supervise, write_skipped
+from scan_manifest import ScanManifest
+from scan_profile import NO_PROFILE, Profile, write_profile
+from sections import FRONT, SECTIONS, SECTIONS_VERSION, may_hold_headings, page_headings, \
+    section_spans, skip_sections
+from sentence_index import INDEX_NAME, INDEX_VERSION, SentenceIndex, build_index
+from text_cache import CACHE_NAME, TextCache, file_digest
+from text_normalize import NORMALIZE_VERSION, folded_pos, normalize, original_span
 
 # ---------------------------------------------------------------------------
 # Keyword groups (semantic families)
@@ -163,6 +216,7 @@ def compile_patterns(words: List[str]) -> List[Tuple[str, re.Pattern]]:
     on autorise tiret ou espace entre les tokens, et on applique :
       - « ch » → (?:es)?
       - « y »  → (?:y|ies)
+      - « * »  → \w* (joker en fin de token : « participat* »)
       - sinon → s?
     """
     patterns, seen = [], set()
@@ -179,7 +233,10 @@ def compile_patterns(words: List[str]) -> List[Tuple[str, re.Pattern]]:
             # échappement + tolérance tiret/espace
             base = re.escape(tok).replace("\\-", "[-\\s]?")
             lower = tok.lower()
-            if lower.endswith("ch"):
+            if lower.endswith("*"):
+                # participat* → participation, participatory, ...
+                esc_tok = re.escape(tok[:-1]).replace("\\-", "[-\\s]?") + r"\w*"
+            elif lower.endswith("ch"):
                 # church → church or churches
                 esc_tok = base + r"(?:es)?"
             elif lower.endswith("y"):
@@ -201,25 +258,280 @@ def compile_patterns(words: List[str]) -> List[Tuple[str, re.Pattern]]:
 
 
 
+def _literal_head(word: str) -> str:
+    """
+    Préfixe littéral (en minuscules) par lequel toute occurrence du mot-clé
+    commence : premier token, coupé au premier tiret, sans le « y » final
+    remplacé par (?:y|ies) ni le joker « * » de compile_patterns().
+    """
+    tokens = word.split()
+    tok = tokens[0] if tokens else ""
+    if tok.lower().endswith(("y", "*")):
+        tok = tok[:-1]
+    return tok.split("-")[0].lower()
+
+
+def _trie_regex(words) -> str:
+    """
+    Alternance factorisée en trie (« co(?:de|mmunity) ») : le moteur regex
+    n'essaie qu'un caractère par niveau au lieu de chaque alternative.
+    Un préfixe plus court englobe les plus longs (on ne sert qu'au préfiltre).
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _emit(node):
+        if "" in node or not node:
+            return ""
+        alts = [re.escape(ch) + _emit(child) for ch, child in sorted(node.items())]
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return _emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Recherche mono-passe de tous les mots-clés dans un texte.
+
+    Un seul regex préfiltre (trie des préfixes littéraux) parcourt le texte
+    une fois ; les motifs complets de compile_patterns() ne sont testés,
+    ancrés, qu'aux positions candidates. Toutes les occurrences de tous les
+    mots-clés sont rapportées, chevauchements compris, avec leurs positions.
+    """
+
+    def __init__(self, words: List[str]):
+        self.patterns = compile_patterns(words)
+        self.keywords = [kw for kw, _pat in self.patterns]
+        self._buckets = defaultdict(list)
+        for idx, (kw, pat) in enumerate(self.patterns):
+            self._buckets[_literal_head(kw)].append((idx, kw, pat))
+        self._lengths = sorted({len(h) for h in self._buckets})
+        self._prefilter = re.compile(
+            r"\b(?=" + _trie_regex(self._buckets) + ")", re.IGNORECASE)
+
+    def finditer(self, text: str) -> List[Tuple[str, int, int]]:
+        """(mot-clé, début, fin) pour chaque occurrence, triés par position."""
+        hits = []
+        span = self._lengths[-1] if self._lengths else 0
+        for m in self._prefilter.finditer(text):
+            pos = m.start()
+            low = text[pos:pos + span].lower()
+            for n in self._lengths:
+                if n > len(low):
+                    break
+                for idx, kw, pat in self._buckets.get(low[:n], ()):
+                    hit = pat.match(text, pos)
+                    if hit:
+                        hits.append((pos, idx, hit.end(), kw))
+        hits.sort()
+        return [(kw, start, end) for start, _idx, end, kw in hits]
+
+
+def compile_matcher(words: List[str]) -> KeywordMatcher:
+    return KeywordMatcher(words)
+
+
+class KeywordSet(NamedTuple):
+    """Jeu de mots-clés d'un rapport : tag du nom de fichier et familles (en-tête, mots-clés)."""
+    tag: str
+    groups: List[Tuple[str, List[str]]]
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(dict.fromkeys(kw for _h, kws in self.groups for kw in kws))
+
+
+def load_queries(path: str) -> List[KeywordSet]:
+    """
+    Jeux de mots-clés nommés d'un fichier --queries :
+
+        # commentaire
+        [default]
+        [co-production]
+        co-production, co-design
+        lived experience
+
+    Un mot-clé par ligne, ou plusieurs séparés par des virgules ; chaque jeu
+    forme une famille « # <nom> », et un jeu vide reprend KEYWORD_GROUPS.
+    """
+    named = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                m = re.fullmatch(r"\[\s*(.+?)\s*\]", line)
+                if m:
+                    named.append((m.group(1), []))
+                elif not named:
+                    sys.exit(f"❌  {path}:{lineno}: keywords before the first [name] line")
+                else:
+                    named[-1][1].extend(k.strip() for k in line.split(",") if k.strip())
+    except OSError as exc:
+        sys.exit(f"❌  Cannot read the keyword sets: {exc}")
+    if not named:
+        sys.exit(f"❌  {path}: no [name] keyword set")
+
+    sets = []
+    for name, kws in named:
+        groups = [(f"# {name}", kws)] if kws else KEYWORD_GROUPS
+        sets.append(KeywordSet(name.replace(" ", "-").replace(",", "-"), groups))
+    tags = [s.tag for s in sets]
+    dup = sorted({t for t in tags if tags.count(t) > 1})
+    if dup:
+        sys.exit(f"❌  {path}: duplicate keyword set(s): {', '.join(dup)}")
+    return sets
+
+
+def keyword_plan(word: str) -> List[List[str]]:
+    """
+    Préfixes de tokens \\w+ (minuscules) qu'une phrase doit contenir pour que
+    le motif compile_patterns() du mot-clé puisse y correspondre. Les
+    séparateurs [-\\s]? étant facultatifs, on renvoie une alternative par
+    façon de coller ou non les fragments voisins (« co-design » : co + design,
+    ou codesign). Sert à interroger l'index de phrases.
+    """
+    # (racine, suffixe facultatif après, collable au fragment précédent)
+    units, prev_open = [], False
+    for tok in word.lower().split():
+        if tok.endswith(("y", "*")):
+            tok = tok[:-1]
+        parts = tok.split("-")
+        for pi, part in enumerate(parts):
+            pieces = list(re.finditer(r"\w+", part))
+            for k, m in enumerate(pieces):
+                last = pi == len(parts) - 1 and k == len(pieces) - 1
+                units.append((m.group(), last, prev_open and m.start() == 0))
+                prev_open = m.end() == len(part)
+            if part and not pieces:
+                prev_open = False
+
+    glue_points = [i for i, (_r, _o, glue) in enumerate(units) if glue]
+    if len(glue_points) > 10:
+        # Trop de combinaisons : le préfixe initial suffit (surensemble)
+        return [[units[0][0]]]
+
+    plans = set()
+    for mask in range(1 << len(glue_points)):
+        glued = {g for b, g in enumerate(glue_points) if mask >> b & 1}
+        prefixes, current, closed = [], "", False
+        for i, (root, optional, _glue) in enumerate(units):
+            if i in glued:
+                # Au-delà d'un suffixe facultatif, le texte collé n'est plus littéral
+                if not closed:
+                    current += root
+                    closed = optional
+            else:
+                if i:
+                    prefixes.append(current)
+                current, closed = root, optional
+        prefixes.append(current)
+        plans.add(tuple(prefixes))
+    return [list(p) for p in sorted(plans)]
+
+
+_HYPHEN_BREAK = re.compile(r"-\s*\n\s*")
+
+
 def clean(text: str) -> str:
-    text = re.sub(r"-\s*\n\s*", "", text)
-    text = re.sub(r"\s*\n\s*", " ", text)
-    return re.sub(r"\s+", " ", text).strip()
+    """
+    Recolle les mots coupés en fin de ligne puis réduit chaque suite de blancs
+    (retours à la ligne compris) à une espace : une passe regex, le reste en C
+    avec str.split().
+    """
+    return " ".join(_HYPHEN_BREAK.sub("", text).split())
+
+
+_SENT_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Fins de phrase dans un texte nettoyé (blancs réduits à une espace)
+_SENT_ENDS = (". ", "! ", "? ")
+
+
+def sentence_spans(s: str) -> List[Tuple[int, int]]:
+    """Positions (début, fin) des phrases renvoyées par split_sentences()."""
+    spans, start = [], 0
+    breaks = [(m.start(), m.end()) for m in _SENT_BREAK.finditer(s)]
+    for end, nxt in breaks + [(len(s), len(s))]:
+        frag = s[start:end]
+        stripped = frag.strip()
+        if stripped:
+            a = start + len(frag) - len(frag.lstrip())
+            spans.append((a, a + len(stripped)))
+        start = nxt
+    return spans
 
 
 def split_sentences(s: str) -> List[str]:
-    return [frag.strip() for frag in re.split(r"(?<=[.!?])\s+", s) if frag.strip()]
+    return [s[a:b] for a, b in sentence_spans(s)]
+
+
+def sentence_at(s: str, pos: int) -> Tuple[int, int]:
+    """
+    Positions (début, fin) de la phrase de sentence_spans(s) qui contient
+    s[pos], pour un texte nettoyé, sans découper tout le texte : on ne cherche
+    que la fin de phrase qui précède pos et celle qui suit.
+    """
+    a = 0
+    for end in _SENT_ENDS:
+        i = s.rfind(end, a, pos)
+        if i >= 0:
+            a = i + 2
+    b = len(s)
+    for end in _SENT_ENDS:
+        i = s.find(end, pos, b)
+        if i >= 0:
+            b = i + 1
+    return a, b
 
 # ---------------------------------------------------------------------------
 # Analysis
 # ---------------------------------------------------------------------------
 
-def analyse(pdf_path: str, patterns, write_fun, context: bool = False):
-    doc = fitz.open(pdf_path)
+# Version de l'extraction (clean() + mots coupés) : à incrémenter dès que
+# extract_pages() change, pour invalider le cache de texte (2 : pages vides gardées)
+EXTRACTOR_VERSION = "2"
+
+# Taille des tranches de pages de --page-jobs
+PAGE_CHUNK = 16
+
+
+# Titres de section reconnus, par page (cf. sections.page_headings())
+Headings = Dict[int, List[Tuple[str, str, int]]]
+
+
+def clean_page_range(pdf_path: str, first: int, last: int) -> List[Tuple[int, str]]:
+    """
+    clean() des pages d'indices [first, last), pages vides comprises ; chaque
+    worker de --page-jobs ouvre le PDF de son côté.
+    """
+    return _clean_page_range(pdf_path, first, last, False)[0]
+
+
+def _clean_page_range(pdf_path: str, first: int, last: int,
+                      sections: bool) -> Tuple[List[Tuple[int, str]], Optional[Headings]]:
+    """clean_page_range(), et les titres de ces pages avec sections."""
+    headings = {} if sections else None
+    with fitz.open(pdf_path) as doc:
+        pages = list(_clean_pages(doc, NO_PROFILE, headings, first, last))
+    return pages, headings
+
+
+def iter_joined(cleaned: Iterable[Tuple[int, str]],
+                keep_blank: bool = False) -> Iterator[Tuple[int, str]]:
+    """
+    Recolle les mots coupés d'une page à l'autre et écarte les pages vides
+    (ou les garde, avec un texte vide, si keep_blank).
+    """
     dangling = ""
-    for idx in range(doc.page_count):
-        raw = clean(doc[idx].get_text())
+    for page_no, raw in cleaned:
         if not raw:
+            if keep_blank:
+                yield page_no, raw
             continue
 
         # Gestion de mot-coupé en fin de page
@@ -230,21 +542,522 @@ def analyse(pdf_path: str, patterns, write_fun, context: bool = False):
         if m:
             dangling = m.group(1)
             raw = raw[:-len(m.group(0))]
+        yield page_no, raw
 
-        # Découpe en phrases
-        sents = split_sentences(raw)
-        for i, sent in enumerate(sents):
-            for kw, pat in patterns:
-                if pat.search(sent):
-                    if context:
-                        prev_sent = sents[i-1] if i > 0 else ""
-                        next_sent = sents[i+1] if i < len(sents)-1 else ""
-                        # Concatène phrase avant + phrase cible + phrase après
-                        ctx = " ".join([ps for ps in (prev_sent, sent, next_sent) if ps])
-                        write_fun(idx+1, kw, ctx, pdf_path)
-                    else:
-                        write_fun(idx+1, kw, sent, pdf_path)
-                    break
+
+def join_pages(cleaned: Iterable[Tuple[int, str]],
+               keep_blank: bool = False) -> List[Tuple[int, str]]:
+    return list(iter_joined(cleaned, keep_blank))
+
+
+def _clean_pages(doc, profile: Profile, headings: Headings = None, first: int = 0,
+                 last: int = None) -> Iterator[Tuple[int, str]]:
+    """
+    clean() de chaque page ; avec headings, y range aussi les titres de
+    section de la page, lus sur la même extraction (TextPage) que le texte,
+    et seulement si une de ses lignes peut en être un.
+    """
+    for idx in range(first, doc.page_count if last is None else last):
+        page = doc[idx]
+        with profile.stage("get_text"):
+            textpage = page.get_textpage() if headings is not None else None
+            text = page.get_text(textpage=textpage)
+        if headings is not None:
+            with profile.stage("headings"):
+                if may_hold_headings(text):
+                    heads = page_headings(page, textpage)
+                    if heads:
+                        headings[idx+1] = heads
+        with profile.stage("clean"):
+            raw = clean(text)
+        yield idx+1, raw
+
+
+def _use_page_pool(page_count: int, page_jobs: int, page_chunk: int) -> bool:
+    jobs = page_jobs or os.cpu_count() or 1
+    # Pas de pool imbriqué dans un worker démon (-j sous Python < 3.9)
+    return jobs > 1 and page_count > page_chunk and not multiprocessing.current_process().daemon
+
+
+def _extract_chunks(pdf_path: str, page_count: int, page_jobs: int, page_chunk: int,
+                    headings: Headings = None) -> List[Tuple[int, str]]:
+    jobs = page_jobs or os.cpu_count() or 1
+    firsts = range(0, page_count, page_chunk)
+    lasts = [min(a + page_chunk, page_count) for a in firsts]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(firsts))) as pool:
+        chunks = list(pool.map(_clean_page_range, repeat(pdf_path), firsts, lasts,
+                               repeat(headings is not None)))
+    if headings is not None:
+        for _pages, heads in chunks:
+            headings.update(heads)
+    return join_pages((p for pages, _heads in chunks for p in pages), keep_blank=True)
+
+
+def extract_pages(pdf_path: str, profile: Profile = NO_PROFILE, page_jobs: int = 1,
+                  page_chunk: int = PAGE_CHUNK) -> List[Tuple[int, str]]:
+    """
+    Texte nettoyé (numéro de page, texte) de chaque page non vide.
+
+    Avec page_jobs > 1 (0 = tous les cœurs), un document de plus de page_chunk
+    pages est découpé en tranches de page_chunk pages extraites par des
+    processus distincts ; les mots coupés entre pages sont recollés ensuite,
+    dans l'ordre des pages, exactement comme en séquentiel.
+    """
+    return list(iter_pages(pdf_path, profile=profile, page_jobs=page_jobs,
+                           page_chunk=page_chunk))
+
+
+def open_text_cache(directory: str, max_mb: int = 500) -> TextCache:
+    version = f"{EXTRACTOR_VERSION}/pymupdf-{fitz.VersionBind}"
+    return TextCache(os.path.join(directory, CACHE_NAME), version, max_mb * 1024 * 1024)
+
+
+def load_pages(pdf_path: str, cache: TextCache = None,
+               profile: Profile = NO_PROFILE, page_jobs: int = 1) -> List[Tuple[int, str]]:
+    """extract_pages(), en passant par le cache de texte s'il est fourni."""
+    return list(iter_pages(pdf_path, cache, profile, page_jobs))
+
+# ---------------------------------------------------------------------------
+# Library API: lazy generators over a PDF
+# ---------------------------------------------------------------------------
+
+class Sentence(NamedTuple):
+    page: int
+    pos: int
+    text: str
+
+
+# Occurrence : (page, mot-clé, phrase ou contexte, pdf, positions — cf. match_records.Offsets,
+# section du document avec --sections)
+class Match(NamedTuple):
+    page: int
+    keyword: str
+    text: str
+    pdf: str
+    offsets: Offsets
+    section: str = ""
+
+
+Hit = Match
+
+
+def _non_blank(pages: Iterable[Tuple[int, str]], profile: Profile) -> Iterator[Tuple[int, str]]:
+    """Pages avec du texte ; les pages vides sont seulement comptées (profile.blank)."""
+    for page in pages:
+        if page[1]:
+            yield page
+        else:
+            profile.blank += 1
+
+
+def _headings_key(digest: str) -> str:
+    return f"{digest}:sections-{SECTIONS_VERSION}"
+
+
+def iter_pages(pdf_path: str, cache: TextCache = None, profile: Profile = NO_PROFILE,
+               page_jobs: int = 1, page_chunk: int = PAGE_CHUNK,
+               headings: Headings = None) -> Iterator[Tuple[int, str]]:
+    """
+    Pages (numéro, texte nettoyé) non vides du PDF, extraites à la demande.
+
+    Le document est fermé dès que le générateur est épuisé ou fermé (close(),
+    break dans une boucle for, sortie d'un with contextlib.closing(...)).
+    Le cache de texte n'est servi ou complété que pour un document lu en entier ;
+    il garde aussi les pages vides, comptées dans profile.blank.
+
+    headings : dictionnaire complété avec les titres de section de chaque page,
+    au plus tard quand la page est renvoyée ; ils sont lus pendant l'extraction
+    du texte et mis en cache avec lui, et le texte en cache n'est servi que si
+    ses titres le sont aussi.
+    """
+    digest = None
+    if cache is not None:
+        with profile.stage("cache"):
+            digest = file_digest(pdf_path)
+            pages = cache.get(digest)
+            if pages is not None and headings is not None:
+                cached = cache.get(_headings_key(digest))
+                if cached is None:
+                    pages = None
+                else:
+                    headings.update((page, [tuple(h) for h in heads]) for page, heads in cached)
+        if pages is not None:
+            profile.pages = len(pages)
+            yield from _non_blank(pages, profile)
+            return
+
+    with profile.stage("open"):
+        doc = fitz.open(pdf_path)
+        page_count = doc.page_count
+    profile.pages = page_count
+    try:
+        if _use_page_pool(page_count, page_jobs, page_chunk):
+            with profile.stage("get_text"):
+                pages = _extract_chunks(pdf_path, page_count, page_jobs, page_chunk, headings)
+            if cache is not None:
+                _cache_pages(cache, digest, pages, headings, profile)
+            yield from _non_blank(pages, profile)
+            return
+
+        # Séquentiel : une page à la fois, conservée seulement pour le cache
+        pages = [] if cache is not None else None
+        for page in iter_joined(_clean_pages(doc, profile, headings), keep_blank=True):
+            if pages is not None:
+                pages.append(page)
+            if page[1]:
+                yield page
+            else:
+                profile.blank += 1
+        if cache is not None:
+            _cache_pages(cache, digest, pages, headings, profile)
+    finally:
+        doc.close()
+
+
+def _cache_pages(cache: TextCache, digest: str, pages: List[Tuple[int, str]],
+                 headings: Optional[Headings], profile: Profile) -> None:
+    with profile.stage("cache"):
+        cache.put(digest, pages)
+        if headings is not None:
+            cache.put(_headings_key(digest), sorted(headings.items()))
+
+
+def iter_sentences(pdf_path: str, cache: TextCache = None,
+                   page_jobs: int = 1) -> Iterator[Sentence]:
+    """Phrases (page, position dans la page, texte) du PDF, page après page."""
+    for page, raw in iter_pages(pdf_path, cache, page_jobs=page_jobs):
+        for pos, (a, b) in enumerate(sentence_spans(raw)):
+            yield Sentence(page, pos, raw[a:b])
+
+
+@lru_cache(maxsize=None)
+def _default_matcher() -> "KeywordMatcher":
+    return compile_matcher(KEYWORDS_DEFAULT)
+
+
+def match_sections(matcher: KeywordMatcher, text: str, spans: List[Tuple[int, str]],
+                   skip: FrozenSet[str] = frozenset()) -> List[Tuple[str, int, int, str]]:
+    """
+    (mot-clé, début, fin, section) : matcher.finditer() sur les seules
+    sections de la page qui ne sont pas ignorées.
+    """
+    hits = []
+    ends = [start for start, _name in spans[1:]] + [len(text)]
+    for (start, name), end in zip(spans, ends):
+        if name in skip:
+            continue
+        part = text if (start, end) == (0, len(text)) else text[start:end]
+        hits.extend((kw, start + a, start + b, name) for kw, a, b in matcher.finditer(part))
+    return hits
+
+
+def match_folded(matcher: KeywordMatcher, raw: str, spans: List[Tuple[int, str]],
+                 skip: FrozenSet[str] = frozenset()) -> List[Tuple[str, int, int, str]]:
+    """
+    match_sections() sur le texte replié de la page (ligatures, tirets et
+    espaces Unicode, cf. text_normalize.py) ; les positions renvoyées sont
+    celles du texte d'origine, dont les phrases sont citées telles quelles.
+    """
+    folded, offsets = normalize(raw)
+    if offsets is None:
+        return match_sections(matcher, folded, spans, skip)
+    spans = [(folded_pos(offsets, start), name) for start, name in spans]
+    return [(kw, *original_span(offsets, a, b), name)
+            for kw, a, b, name in match_sections(matcher, folded, spans, skip)]
+
+
+def _page_window(prev: str, raw: str, nxt: str) -> Tuple[str, int]:
+    """
+    Page entourée des pages voisines, jointes par une espace, pour qu'une
+    phrase à cheval sur deux pages soit lue en entier ; renvoie le texte et la
+    position de la page dans ce texte.
+    """
+    before = prev.rstrip() + " " if prev.strip() else ""
+    after = " " + nxt.rstrip() if nxt.strip() else ""
+    return before + raw.rstrip() + after, len(before)
+
+
+def page_matches(pdf_path: str, page: int, hits: List[Tuple[str, int, int, str]],
+                 prev: str, raw: str, nxt: str, context: bool = False) -> List[Match]:
+    """
+    Match de chaque occurrence (mot-clé, début, fin, section) de la page raw,
+    avec sa phrase lue au besoin sur les pages voisines non vides prev et nxt,
+    et les phrases voisines avec context. Partagé par le scan et la commande
+    query, qui rapportent ainsi les mêmes phrases.
+    """
+    text, base = _page_window(prev, raw, nxt)
+    found = []
+    for kw, start, end, tag in hits:
+        a, b = sentence_at(text, base + start)
+        sent = text[a:b]
+        # Positions : phrase dans le texte émis, occurrence dans la phrase et dans la page
+        offsets = (0, len(sent), base + start - a, base + end - a, start)
+        if context:
+            prev_sent = text[slice(*sentence_at(text, a - 2))] if a else ""
+            next_sent = text[slice(*sentence_at(text, b + 1))] if b < len(text) else ""
+            # Concatène phrase avant + phrase cible + phrase après
+            sent = " ".join([ps for ps in (prev_sent, sent, next_sent) if ps])
+            offsets = (len(prev_sent) + 1 if prev_sent else 0,) + offsets[1:]
+        found.append(Match(page, kw, sent, pdf_path, offsets, tag))
+    return found
+
+
+def iter_matches(pdf_path: str, matcher: KeywordMatcher = None, context: bool = False,
+                 cache: TextCache = None, profile: Profile = NO_PROFILE, page_jobs: int = 1,
+                 max_hits: int = None, sections: FrozenSet[str] = None) -> Iterator[Match]:
+    """
+    Occurrences des mots-clés dans le PDF, dans l'ordre des pages et des
+    positions : (page, mot-clé, phrase ou contexte, pdf, positions, section).
+
+    Chaque page est d'abord parcourue en entier par le matcher ; les limites
+    de phrase (et les phrases voisines avec context) ne sont cherchées qu'autour
+    des occurrences. Une phrase commencée sur la page précédente ou poursuivie
+    sur la suivante est rapportée en entier, d'où une page lue d'avance.
+
+    matcher : compile_matcher(...) d'une liste de mots-clés, par défaut
+    KEYWORDS_DEFAULT. max_hits arrête la lecture du document (et le ferme)
+    après N occurrences, par exemple pour un tri rapide.
+
+    sections : avec un ensemble de sections (éventuellement vide), les titres
+    sont repérés dans la mise en page, chaque occurrence porte sa section et
+    les sections de l'ensemble (p. ex. {"references"}) ne sont pas parcourues.
+    """
+    if matcher is None:
+        matcher = _default_matcher()
+    if max_hits is not None and max_hits <= 0:
+        return
+    # Titres de section, lus avec le texte de chaque page
+    headings = {} if sections is not None else None
+    section = FRONT if headings is not None else ""
+    found = 0
+    pages = iter_pages(pdf_path, cache, profile, page_jobs, headings=headings)
+    try:
+        prev = ""
+        current = next(pages, None)
+        while current is not None:
+            page, raw = current
+            upcoming = next(pages, None)
+            profile.chars += len(raw)
+            spans = [(0, section)]
+            if headings is not None:
+                spans = section_spans(raw, headings.get(page, ()), section)
+                section = spans[-1][1]
+            with profile.stage("match"):
+                hits = match_folded(matcher, raw, spans, sections or frozenset())
+            if not hits:
+                prev, current = raw, upcoming
+                continue
+            with profile.stage("sentences"):
+                found_here = page_matches(pdf_path, page, hits, prev, raw,
+                                          upcoming[1] if upcoming else "", context)
+            for match in found_here:
+                profile.hits += 1
+                yield match
+                found += 1
+                if max_hits is not None and found >= max_hits:
+                    return
+            prev, current = raw, upcoming
+    finally:
+        pages.close()
+
+
+def analyse(pdf_path: str, matcher: KeywordMatcher, write_fun, context: bool = False,
+            cache: TextCache = None, profile: Profile = NO_PROFILE, page_jobs: int = 1,
+            sections: FrozenSet[str] = None):
+    """iter_matches() avec un callback write_fun(page, kw, phrase, pdf, positions, section)."""
+    for hit in iter_matches(pdf_path, matcher, context, cache, profile, page_jobs,
+                            sections=sections):
+        write_fun(*hit)
+
+
+def collect_hits(pdf_path: str, matcher: KeywordMatcher, context: bool = False,
+                 cache: TextCache = None, page_jobs: int = 1,
+                 sections: FrozenSet[str] = None) -> List[Hit]:
+    """
+    analyse() sans callback : renvoie la liste picklable des occurrences
+    (page, mot-clé, phrase, pdf, positions, section), utilisable depuis un
+    ProcessPoolExecutor.
+    """
+    hits = []
+    analyse(pdf_path, matcher, lambda *hit: hits.append(hit), context, cache,
+            page_jobs=page_jobs, sections=sections)
+    return hits
+
+
+def profiled_hits(pdf_path: str, matcher: KeywordMatcher, context: bool = False,
+                  cache: TextCache = None, page_jobs: int = 1,
+                  sections: FrozenSet[str] = None) -> Tuple[List[Hit], Profile]:
+    """collect_hits() instrumenté pour --profile : (occurrences, profil du document)."""
+    hits = []
+    profile = Profile(pdf_path)
+    analyse(pdf_path, matcher, lambda *hit: hits.append(hit), context, cache, profile,
+            page_jobs, sections)
+    return hits, profile
+
+
+def map_documents(fun, paths: List[str], jobs: int = 1, *args):
+    """
+    fun(pdf, *args) pour chaque PDF, dans un pool de processus si jobs > 1
+    (0 = tous les cœurs). Les résultats arrivent dans l'ordre de `paths`.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+            yield from pool.map(fun, paths, *(repeat(a) for a in args))
+    else:
+        for path in paths:
+            yield fun(path, *args)
+
+
+def _encrypted(pdf_path: str) -> bool:
+    try:
+        with fitz.open(pdf_path) as doc:
+            return bool(doc.needs_pass)
+    except Exception:
+        # PDF illisible : c'est l'erreur d'origine qui est rapportée
+        return False
+
+
+def scan_document(pdf_path: str, matcher: KeywordMatcher, context: bool = False,
+                  cache: TextCache = None, page_jobs: int = 1,
+                  sections: FrozenSet[str] = None,
+                  max_pages: int = None) -> Tuple[List[Hit], Profile]:
+    """
+    profiled_hits() d'un PDF du scan .bib, avec ses contrôles : lève Skipped
+    pour un document chiffré ou de plus de max_pages pages (vérifiés dans
+    cet ordre, avant toute extraction), ou sans aucun texte.
+    """
+    try:
+        if max_pages is not None:
+            with fitz.open(pdf_path) as doc:
+                encrypted, page_count = doc.needs_pass, doc.page_count
+            if encrypted:
+                raise Skipped(ENCRYPTED)
+            if page_count > max_pages:
+                raise Skipped(PAGES, f"{page_count} pages")
+        hits, profile = profiled_hits(pdf_path, matcher, context, cache, page_jobs, sections)
+    except Skipped:
+        raise
+    except Exception:
+        if _encrypted(pdf_path):
+            raise Skipped(ENCRYPTED)
+        raise
+    if not profile.chars:
+        if _encrypted(pdf_path):
+            raise Skipped(ENCRYPTED)
+        raise Skipped(TEXTLESS, f"{profile.pages} pages")
+    return hits, profile
+
+
+def scan_documents(paths: List[str], jobs: int = 1, budget: Budget = NO_BUDGET, *args):
+    """
+    scan_document(pdf, *args) pour chaque PDF, dans l'ordre de `paths` :
+    (occurrences, profil), ou le Skipped d'un document non analysé. Avec un
+    délai ou un plafond mémoire, chaque document passe par un worker supervisé
+    (scan_budget.supervise()), sinon par map_documents().
+    """
+    args += (budget.max_pages,)
+    if budget.supervised:
+        return supervise(scan_document, paths, jobs, budget, *args)
+    return map_documents(partial(guarded, scan_document), paths, jobs, *args)
+
+# ---------------------------------------------------------------------------
+# Bibliography
+# ---------------------------------------------------------------------------
+
+# Champs du .bib utilisés par le scan (en-têtes, tri, filtre, PDF joints)
+BIB_FIELDS = ("author", "year", "title", "doi", "file", "groups")
+
+
+def load_entries(bib_path: str, group_filter: str = None) -> List[dict]:
+    """Entrées du .bib, filtrées par groupe(s) si demandé, triées par sort_key."""
+    entries = load_bib_entries(bib_path, BIB_FIELDS)
+    if group_filter:
+        entries = filter_entries(entries, group_filter)
+    entries.sort(key=sort_key)
+    return entries
+
+
+def filter_entries(entries: List[dict], group_filter: str) -> List[dict]:
+    """Filtre les entrées par expression booléenne sur les groupes JabRef (cf. group_filter.py)."""
+    index = GroupIndex(entries)
+    try:
+        kept = index.select(group_filter)
+    except GroupQueryError as exc:
+        sys.exit(f"❌  Invalid group filter {group_filter!r}: {exc}")
+    if index.unknown:
+        print(f"⚠️  Unknown group(s) in filter: {', '.join(index.unknown)}")
+    return kept
+
+
+def sort_key(e):
+    """Tri par année puis par premier auteur."""
+    try:
+        y = int(e.get('year', '')[:4])
+    except ValueError:
+        y = 0
+    auth = e.get('author', '').split(' and ')[0]
+    return (y, auth.lower())
+
+
+def resolve_pdfs(entries: List[dict], bib_dir: str) -> List[Tuple[dict, str]]:
+    """(entrée, chemin du PDF) pour chaque entrée dont le PDF existe."""
+    scans = []
+    for entry in entries:
+        # Extraction du chemin PDF
+        ffield = entry.get('file', '')
+        m = re.search(r":([^:]+\.pdf):", ffield)
+        if not m:
+            continue
+        pdfname = m.group(1)
+        pdfpath = os.path.join(bib_dir, pdfname)
+        if not os.path.isfile(pdfpath):
+            continue
+        scans.append((entry, pdfpath))
+    return scans
+
+# ---------------------------------------------------------------------------
+# Incremental manifest (.bib mode)
+# ---------------------------------------------------------------------------
+
+# Champs de l'entrée dont dépend le scan (PDF utilisé, filtrage par groupe)
+MANIFEST_FIELDS = ("file", "groups")
+# Format des occurrences mémorisées (2 : positions ajoutées, 4 : section,
+# 5 : nombre de pages et de pages vides)
+MANIFEST_VERSION = "6"
+
+
+def scan_fingerprint(matcher: KeywordMatcher, context: bool,
+                     sections: FrozenSet[str] = None) -> str:
+    """Empreinte de tout ce qui change les occurrences d'un PDF inchangé."""
+    spec = [EXTRACTOR_VERSION, MANIFEST_VERSION, NORMALIZE_VERSION, context,
+            [(kw, pat.pattern) for kw, pat in matcher.patterns],
+            None if sections is None else [SECTIONS_VERSION, sorted(sections)]]
+    return hashlib.sha1(json.dumps(spec).encode("utf-8")).hexdigest()
+
+
+def manifest_record(entry: dict, pdf_path: str, bib_dir: str, previous: dict = None) -> dict:
+    """
+    État courant d'une entrée et de son PDF. Le PDF n'est re-haché que si
+    sa taille ou sa date de modification diffèrent du manifeste ; ses nombres
+    de pages, de pages vides et de caractères sont ceux du manifeste, puis
+    ceux du scan.
+    """
+    st = os.stat(pdf_path)
+    if previous and (previous["size"], previous["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+        digest = previous["digest"]
+    else:
+        digest = file_digest(pdf_path)
+    return {
+        "pdf": os.path.relpath(pdf_path, bib_dir),
+        "digest": digest,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "pages": previous["pages"] if previous else 0,
+        "blank": previous["blank"] if previous else 0,
+        "chars": previous["chars"] if previous else 0,
+        **{field: entry.get(field, '') for field in MANIFEST_FIELDS},
+    }
 
 # ---------------------------------------------------------------------------
 # Writers
@@ -261,31 +1074,104 @@ def make_bib_header(entry):
         \n--------------------------------------------------------------------\n\n"
 
 
-from collections import defaultdict
+class ReportWriter:
+    """
+    Rapport différé : chaque occurrence est rangée dans un MatchStore
+    (identifiants entiers en tableaux typés, phrases dans un spool sur
+    disque) ; write() agrège les compteurs et rend les lignes du rapport à
+    partir du store, statistiques en tête. S'utilise directement comme
+    write_fun d'analyse().
+    """
 
-def make_merged_writer():
-    body = []
-    counts = defaultdict(int)
-    studies = defaultdict(set)
-    hit_pdfs = set()
-    current = None
+    def __init__(self):
+        self.store = MatchStore()
+        self._pending = None
+
+    def begin(self, header: str) -> None:
+        """En-tête du document suivant, écrit seulement s'il a des occurrences."""
+        self._pending = header
+
+    def __call__(self, page, kw, sent, pdf_path, offsets=None, section=""):
+        if self._pending is not None:
+            self.store.begin(self._pending)
+            self._pending = None
+        self.store.add(page, kw, sent, pdf_path, offsets, section)
+
+    def write(self, f: TextIO, groups, total: int = None) -> None:
+        counts, studies, hit_pdfs = self.store.counts()
+        write_stats(f, groups, counts, studies, total, hit_pdfs if total is not None else None)
+        block = -1
+        for doc, page, kw, sent, _pdf, _offsets, section in self.store:
+            if doc != block:
+                f.write(self.store.blocks[doc])
+                block = doc
+            f.write(format_hit(page, kw, sent, section))
+
+    def close(self) -> None:
+        self.store.close()
 
-    def _w(page, kw, sent, pdf_path):
-        # on peut déclarer nonlocal en début de fonction imbriquée
-        nonlocal current
-        # compte occurrences
-        counts[kw] += 1
-        # mémorise l'étude pour ce kw
-        studies[kw].add(pdf_path)
-        # global hits
-        hit_pdfs.add(pdf_path)
-        # insère un saut quand on change de fichier
-        if pdf_path != current:
-            body.append('\n')
-            current = pdf_path
-        body.append(f" Page {page} – \"{kw}\":\n  \"{sent}\"\n\n")
 
-    return _w, body, counts, studies, hit_pdfs
+def format_hit(page: int, kw: str, sent: str, section: str = "") -> str:
+    where = f"Page {page} [{section}]" if section else f"Page {page}"
+    return f" {where} – \"{kw}\":\n  \"{sent}\"\n\n"
+
+
+class ScanOutput:
+    """
+    Sorties d'un jeu de mots-clés du scan .bib : rapport base.txt,
+    enregistrements (--format) et matrice (--matrix). Si le matcher du scan
+    couvre d'autres jeux (--queries), seules les occurrences des mots-clés du
+    jeu sont retenues, dans l'ordre où son propre matcher les aurait données.
+    """
+
+    def __init__(self, base: str, kwset: KeywordSet, matcher: KeywordMatcher, args):
+        self.base = base
+        self.kwset = kwset
+        self.keywords = kwset.keywords
+        self.order = None
+        if set(self.keywords) != set(matcher.keywords):
+            self.order = {kw: idx for idx, kw in enumerate(self.keywords)}
+        self.writer = ReportWriter()
+        self.records = None
+        if args.format:
+            self.records = open_records(args.format, base, kwset.groups, args.context)
+        # Mots-clés trouvés par entrée, pour la matrice documents x mots-clés
+        self.found = {} if args.matrix else None
+        self.studies: Set[str] = set()
+        self.occurrences = 0
+
+    def add(self, entry: dict, key: str, hits: List[Hit]) -> None:
+        if self.order is not None:
+            # Même position : ordre des mots-clés du jeu, comme KeywordMatcher.finditer()
+            hits = sorted((hit for hit in hits if hit[1] in self.order),
+                          key=lambda hit: (hit[0], hit[4][4], self.order[hit[1]]))
+        # L'en-tête n'est écrit que si on trouve quelque chose
+        self.writer.begin(make_bib_header(entry))
+        for hit in hits:
+            self.writer(*hit)
+        if self.records:
+            self.records.begin(key, entry.get("doi", ""))
+            for hit in hits:
+                self.records(*hit)
+        if self.found is not None:
+            self.found[id(entry)] = [hit[1] for hit in hits]
+        if hits:
+            self.studies.add(hits[0][3])
+            self.occurrences += len(hits)
+
+    def write(self, entries: List[dict], total: int, run: Profile = NO_PROFILE) -> str:
+        out = self.base + ".txt"
+        with run.stage("report"), open(out, "w", encoding="utf-8") as f:
+            self.writer.write(f, self.kwset.groups, total)
+        self.writer.close()
+        print(f"✅ Bib report written to {out}")
+        if self.records:
+            self.records.close()
+            print(f"✅ {self.records.count} records written to {self.records.path}")
+        if self.found is not None:
+            with run.stage("matrix"):
+                write_matrix(self.base, entries, self.found, self.keywords, self.kwset.groups)
+        return out
 
 
 # ---------------------------------------------------------------------------
@@ -307,23 +1193,577 @@ def write_stats(f: TextIO,
         f.write(f"{hdr}\n")
         for kw in kws:
             occ = counts.get(kw, 0)
-            stu = len(studies.get(kw, []))
+            stu = studies.get(kw, 0)
             f.write(f" {kw}: {occ} occurrences / {stu} studies\n")
     f.write("\n")
 
+
+def write_comparison(f: TextIO, outputs: List["ScanOutput"], total: int) -> None:
+    """
+    Tableau comparatif des jeux de --queries : mots-clés, occurrences et
+    études touchées par jeu, puis études communes à chaque paire de jeux.
+    """
+    names = [o.kwset.tag for o in outputs]
+    width = max(len(n) for n in names + ["Keyword set"])
+    f.write("Keyword set comparison:\n")
+    f.write(f"Total studies           : {total}\n\n")
+    f.write(f"{'Keyword set':<{width}}  Keywords  Occurrences  Studies with keyword(s)\n")
+    for name, o in zip(names, outputs):
+        hits = len(o.studies)
+        pct = hits/total*100 if total else 0
+        f.write(f"{name:<{width}}  {len(o.keywords):8d}  {o.occurrences:11d}  "
+                f"{hits:6d}  ({pct:.1f}% )\n")
+
+    cell = max(len(n) for n in names + ["000000"])
+    f.write("\nStudies in common:\n")
+    f.write(" " * width + "".join(f"  {n:>{cell}}" for n in names) + "\n")
+    for name, o in zip(names, outputs):
+        f.write(f"{name:<{width}}" + "".join(f"  {len(o.studies & p.studies):>{cell}}"
+                                         for p in outputs) + "\n")
+
+    f.write("\nReports:\n")
+    for name, o in zip(names, outputs):
+        f.write(f"  {name}: {os.path.basename(o.base)}.txt\n")
+
+# ---------------------------------------------------------------------------
+# Sentence index (index / query subcommands)
+# ---------------------------------------------------------------------------
+
+def index_main(argv: List[str]) -> None:
+    ap = argparse.ArgumentParser(
+        prog="pdf_keyword_scan.py index",
+        description="Build the sentence index of the PDFs referenced by a .bib file.")
+    ap.add_argument("path", help=".bib file to index")
+    ap.add_argument("-g", "--group-filter",
+                    help="Filter .bib entries by JabRef group expression "
+                         "(AND, OR, NOT, parentheses, Prefix_* wildcards)")
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="Worker processes (default: 1, 0 = all cores)")
+    ap.add_argument("--page-jobs", type=int, default=1,
+                    help=f"Worker processes extracting the pages of PDFs longer than "
+                         f"{PAGE_CHUNK} pages (default: 1, 0 = all cores)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Do not read or write the extracted-text cache")
+    args = ap.parse_args(argv)
+
+    target = os.path.abspath(args.path)
+    if not (os.path.isfile(target) and target.lower().endswith(".bib")):
+        ap.error("Path must be a .bib file.")
+    bib_dir = os.path.dirname(target)
+    cache = None if args.no_cache else open_text_cache(bib_dir)
+
+    entries = load_entries(target, args.group_filter)
+    scans = resolve_pdfs(entries, bib_dir)
+    pages = map_documents(load_pages, [p for _e, p in scans], args.jobs, cache,
+                          NO_PROFILE, args.page_jobs)
+
+    def documents():
+        for (entry, pdfpath), doc_pages in zip(scans, pages):
+            sents = [(page, pos, raw[a:b])
+                     for page, raw in doc_pages
+                     for pos, (a, b) in enumerate(sentence_spans(raw))]
+            yield entry.get("ID", ""), pdfpath, make_bib_header(entry), doc_pages, sents
+
+    out = os.path.join(bib_dir, INDEX_NAME)
+    n = build_index(out, documents(), {
+        "total": str(len(entries)),
+        "bib_mtime": str(os.path.getmtime(target)),
+    })
+    print(f"✅ Indexed {n} sentences from {len(scans)} PDFs in {out}")
+
+
+def query_main(argv: List[str]) -> None:
+    ap = argparse.ArgumentParser(
+        prog="pdf_keyword_scan.py query",
+        description="Query the sentence index built by the index subcommand.")
+    ap.add_argument("path", help="Indexed .bib file")
+    ap.add_argument("queries", nargs="*",
+                    help="Keywords or phrases, same rules as --keywords; a trailing "
+                         "\"*\" is a token wildcard (e.g. \"participat* research\"). "
+                         "Default: all keyword groups")
+    ap.add_argument("--context", action="store_true",
+                    help="Include the previous and next sentence around each match")
+    ap.add_argument("-o", "--output",
+                    help="Write the report to this file instead of stdout")
+    args = ap.parse_args(argv)
+
+    target = os.path.abspath(args.path)
+    index_path = os.path.join(os.path.dirname(target), INDEX_NAME)
+    if not os.path.isfile(index_path):
+        ap.error(f"No sentence index found: run `index {args.path}` first.")
+
+    if args.queries:
+        groups_runtime = [('# Query', args.queries)]
+        kws = args.queries
+    else:
+        groups_runtime = KEYWORD_GROUPS
+        kws = KEYWORDS_DEFAULT
+    matcher = compile_matcher(kws)
+
+    index = SentenceIndex(index_path)
+    if index.meta("version") != INDEX_VERSION:
+        index.close()
+        ap.error(f"The sentence index is from an older version: run `index {args.path}` again.")
+    if os.path.isfile(target) and os.path.getmtime(target) > float(index.meta("bib_mtime", 0)):
+        print("⚠️  The .bib file changed since the index was built; rerun `index`.",
+              file=sys.stderr)
+
+    # Pages candidates via l'index, parcourues comme dans le scan : phrases à
+    # cheval sur deux pages et phrases voisines lues sur les pages qui l'entourent
+    candidates = set()
+    for kw in matcher.keywords:
+        candidates |= index.candidates(keyword_plan(kw))
+    docs = index.documents()
+
+    writer = ReportWriter()
+    current = None
+    for doc, page in index.pages(candidates):
+        key, pdf_path, header = docs[doc]
+        if doc != current:
+            writer.begin(header)
+            current = doc
+        prev, raw, nxt = index.window(doc, page)
+        hits = match_folded(matcher, raw, [(0, "")])
+        for match in page_matches(pdf_path, page, hits, prev, raw, nxt, args.context):
+            writer(*match)
+    total = int(index.meta("total", len(docs)))
+    index.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            writer.write(f, groups_runtime, total)
+        print(f"✅ Query report written to {args.output}")
+    else:
+        writer.write(sys.stdout, groups_runtime, total)
+    writer.close()
+
+
+# ---------------------------------------------------------------------------
+# Support attribution (funding subcommand)
+# ---------------------------------------------------------------------------
+
+# Fin de « phrase » qui n'en est pas une : initiale ou abréviation courante
+_CUT_AFTER = re.compile(r"(?:\b[A-Z]|\b(?:[Nn]os?|[Nn]r|al|e\.g|i\.e|vs|Dr|Prof|Fig))\.$")
+
+
+def classify_mentions(hits: List[Hit], initials: Set[str] = None) -> List[Mention]:
+    """
+    Mentions classées (cf. funding.classify()) à partir des occurrences
+    d'iter_matches(..., MentionMatcher(), context=True, sections=frozenset()) :
+    une par phrase, avec tous les projets qu'elle nomme.
+    """
+    mentions, last = [], None
+    for page, project, text, _pdf, offsets, section in hits:
+        start, length, at = offsets[0], offsets[1], offsets[2]
+        if _CUT_AFTER.search(text[:start].rstrip()):
+            # Phrase coupée après une initiale ou une abréviation (« D.M. has
+            # received », « grant agreement no. 777394 ») : on la recolle
+            at, length, start = at + start, length + start, 0
+        key = (page, offsets[4] - at)   # début de la phrase dans la page
+        if key == last:
+            if project not in mentions[-1].projects:
+                mentions[-1] = mentions[-1]._replace(projects=mentions[-1].projects + (project,))
+            continue
+        last = key
+        sentence = text[start:start + length]
+        context, linked, scope, sure, authors = classify(section, text[:start].strip(),
+                                                         sentence, at, initials)
+        mentions.append(Mention(page, (project,), section, context, sentence,
+                                linked, scope, sure, authors))
+    return mentions
+
+
+def write_funding_entry(f: TextIO, mentions: List[Mention], tags: List[str],
+                        current: List[str] = None) -> None:
+    f.write(f" Suggested: {', '.join(tags)}\n")
+    if current is not None:
+        mark = "" if set(current) == set(tags) else "   (differs)"
+        f.write(f" Tagged   : {', '.join(current) or '-'}{mark}\n")
+    if not mentions:
+        f.write(" No AIMS-2-TRIALS / EU-AIMS mention found.\n")
+    f.write("\n")
+    for m in mentions:
+        f.write(f" Page {m.page} [{m.section}] – {' / '.join(m.projects)} – {describe(m)}:\n"
+                f"  \"{m.sentence}\"\n\n")
+
+
+def funding_main(argv: List[str]) -> None:
+    ap = argparse.ArgumentParser(
+        prog="pdf_keyword_scan.py funding",
+        description="Find AIMS-2-TRIALS / EU-AIMS support mentions (names and grant "
+                    "numbers) in the PDFs, classify where each one appears and suggest "
+                    "the Fund_* / Exclude_* groups of each entry.")
+    ap.add_argument("path", help="PDF file or .bib file to scan")
+    ap.add_argument("-g", "--group-filter",
+                    help="Filter .bib entries by JabRef group expression "
+                         "(AND, OR, NOT, parentheses, Prefix_* wildcards)")
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="Worker processes for .bib mode (default: 1, 0 = all cores)")
+    ap.add_argument("--page-jobs", type=int, default=1,
+                    help=f"Worker processes extracting the pages of PDFs longer than "
+                         f"{PAGE_CHUNK} pages (default: 1, 0 = all cores)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Do not read or write the extracted-text and headings cache")
+    ap.add_argument("-o", "--output",
+                    help="Report path (default: _bib_funding_scan.txt next to the .bib, "
+                         "<name>_funding_scan.txt next to a PDF)")
+    args = ap.parse_args(argv)
+
+    target = os.path.abspath(args.path)
+    cache = None if args.no_cache else open_text_cache(os.path.dirname(target))
+    matcher = MentionMatcher()
+
+    # ----- PDF mode -----
+    if os.path.isfile(target) and target.lower().endswith(".pdf"):
+        hits = collect_hits(target, matcher, True, cache, args.page_jobs, frozenset())
+        mentions = classify_mentions(hits)
+        out = args.output or f"{os.path.splitext(target)[0]}_funding_scan.txt"
+        with open(out, "w", encoding="utf-8") as f:
+            f.write("\n")
+            write_funding_entry(f, mentions, suggest_tags(mentions))
+        print(f"✅ Funding report written to {out}")
+        return
+
+    if not (os.path.isfile(target) and target.lower().endswith(".bib")):
+        ap.error("Path must be a .pdf or .bib file.")
+
+    bib_dir = os.path.dirname(target)
+    entries = load_entries(target, args.group_filter)
+    scans = resolve_pdfs(entries, bib_dir)
+    # Occurrences brutes dans les workers, classement avec les auteurs de chaque entrée
+    results = map_documents(collect_hits, [p for _e, p in scans], args.jobs, matcher, True,
+                            cache, args.page_jobs, frozenset())
+
+    writer = tempfile.TemporaryFile("w+", encoding="utf-8")
+    counts = defaultdict(int)
+    with_mention = differs = 0
+    for (entry, _pdfpath), hits in zip(scans, results):
+        mentions = classify_mentions(hits, author_initials(entry.get("author", "")))
+        tags = suggest_tags(mentions)
+        groups = [g.strip() for g in entry.get("groups", "").split(",")]
+        current = [g for g in FUNDING_TAGS if g in groups]
+        with_mention += bool(mentions)
+        differs += set(current) != set(tags)
+        for tag in tags:
+            counts[tag] += 1
+        writer.write(make_bib_header(entry))
+        writer.write(f" Entry    : {entry.get('ID', '')}\n")
+        write_funding_entry(writer, mentions, tags, current)
+
+    scanned = {id(e) for e, _p in scans}
+    missing = [e.get("ID", "") for e in entries if id(e) not in scanned]
+    out = args.output or os.path.join(bib_dir, "_bib_funding_scan.txt")
+    with open(out, "w", encoding="utf-8") as f:
+        f.write("Support attribution (AIMS-2-TRIALS / EU-AIMS):\n")
+        pct = with_mention/len(scans)*100 if scans else 0
+        f.write(f"Total studies           : {len(entries)}\n")
+        f.write(f"Studies with a PDF      : {len(scans)}\n")
+        f.write(f"Studies with mention(s) : {with_mention}  ({pct:.1f}% )\n")
+        f.write(f"Suggestions differing from the current groups: {differs}\n\n")
+        f.write("Suggested groups:\n")
+        for tag in FUNDING_TAGS:
+            if counts[tag]:
+                f.write(f" {tag}: {counts[tag]} studies\n")
+        if missing:
+            f.write(f"\nNo PDF (not scanned): {', '.join(missing)}\n")
+        writer.seek(0)
+        shutil.copyfileobj(writer, f)
+    writer.close()
+    print(f"✅ Funding report written to {out}")
+    if differs:
+        print(f"⚠️  {differs} of {len(scans)} entries are tagged differently from the suggestion")
+
+
+# ---------------------------------------------------------------------------
+# .bib scan and watch mode
+# ---------------------------------------------------------------------------
+
+def scan_bib(target: str, entries: List[dict], args, matcher: KeywordMatcher,
+             sets: List[KeywordSet], run_tag: str, cache: TextCache = None,
+             run: Profile = NO_PROFILE) -> str:
+    """
+    Scan .bib des entrées déjà chargées, incrémental grâce au manifeste ;
+    `args` porte les options de la ligne de commande. Chaque PDF est extrait
+    et parcouru une seule fois par `matcher`, puis chaque jeu de `sets` écrit
+    son rapport. Renvoie le chemin du rapport (du tableau comparatif avec
+    --queries).
+    """
+    bib_dir = os.path.dirname(target)
+    total = len(entries)
+    include_context = args.context
+
+    # Résolution des PDF des références filtrées
+    scans = resolve_pdfs(entries, bib_dir)
+
+    # Noms de sortie .bib : un rapport par jeu de mots-clés
+    base_tag = "_bib_keyword_scan"
+    suffix = f"_{run_tag}" if run_tag else ""
+    out = os.path.join(bib_dir, f"{base_tag}{suffix}.txt")
+    outputs = [ScanOutput(os.path.join(bib_dir, base_tag + (f"_{s.tag}" if s.tag else "")),
+                          s, matcher, args) for s in sets]
+
+    # Manifeste du scan précédent : seuls les PDF nouveaux ou modifiés,
+    # et les entrées dont les groupes ont changé, sont ré-analysés
+    manifest_path = os.path.join(bib_dir, f".{base_tag}{suffix}.manifest.sqlite")
+    manifest = ScanManifest(manifest_path,
+                            scan_fingerprint(matcher, include_context, args.sections),
+                            reset=args.full)
+    plan = []
+    for entry, pdfpath in scans:
+        key = entry.get("ID", pdfpath)
+        old = manifest.record(key)
+        record = manifest_record(entry, pdfpath, bib_dir, old)
+        reuse = old is not None and all(
+            old[k] == record[k] for k in ("digest",) + MANIFEST_FIELDS)
+        plan.append((entry, pdfpath, key, record, old, reuse))
+    todo = [pdfpath for _e, pdfpath, _k, _r, _o, reuse in plan if not reuse]
+
+    # Analyse avec contexte éventuel, en parallèle si --jobs > 1, sous budget
+    # éventuel ; l'ordre de tri est conservé, le rapport reste identique
+    budget = Budget(args.timeout, args.max_pages, args.max_memory)
+    results = scan_documents(todo, args.jobs, budget, matcher, include_context, cache,
+                             args.page_jobs, args.sections)
+
+    # Écriture : une entrée à la fois, dans la sortie de chaque jeu de mots-clés
+    profiles = []
+    # Documents non analysés (hors budget, chiffrés, sans texte) et pages vides
+    skipped, blank = [], []
+    for entry, pdfpath, key, record, old, reuse in plan:
+        prof = NO_PROFILE
+        if reuse:
+            # Les contrôles du scan valent aussi pour un document repris du manifeste
+            if budget.max_pages is not None and record["pages"] > budget.max_pages:
+                skipped.append((key, record["pdf"], Skipped(PAGES, f"{record['pages']} pages")))
+                continue
+            if record["blank"]:
+                blank.append((key, record["pdf"], record["blank"], record["pages"]))
+            if args.profile:
+                # Compteurs du dernier scan : seul le temps de lecture est mesuré
+                prof = Profile(pdfpath)
+                prof.pages, prof.blank, prof.chars = \
+                    record["pages"], record["blank"], record["chars"]
+            with prof.stage("manifest"):
+                hits = [(page, kw, sent, pdfpath, tuple(offsets), section)
+                        for page, kw, sent, offsets, section in manifest.hits(key)]
+            if args.profile:
+                prof.hits = len(hits)
+        else:
+            result = next(results)
+            # Rien n'est mémorisé pour un document non analysé : il sera retenté
+            if isinstance(result, Skipped):
+                skipped.append((key, record["pdf"], result))
+                continue
+            hits, scanned = result
+            record.update(pages=scanned.pages, blank=scanned.blank, chars=scanned.chars)
+            if scanned.blank:
+                blank.append((key, record["pdf"], scanned.blank, scanned.pages))
+            if args.profile:
+                prof = scanned
+        with prof.stage("manifest"):
+            if not reuse or (old["size"], old["mtime_ns"]) != (record["size"], record["mtime_ns"]):
+                manifest.put(key, record, [[page, kw, sent, offsets, section]
+                                           for page, kw, sent, _p, offsets, section in hits])
+
+        with prof.stage("write"):
+            for output in outputs:
+                output.add(entry, key, hits)
+        if args.profile:
+            profiles.append(prof)
+
+    if not args.group_filter:
+        manifest.retain(key for _e, _p, key, _r, _o, _u in plan)
+    manifest.close()
+    if len(todo) < len(scans):
+        print(f"🔁 {len(todo)} of {len(scans)} PDFs analysed, "
+              f"{len(scans) - len(todo)} reused from the manifest")
+
+    # Écriture finale
+    for output in outputs:
+        report = output.write(entries, total, run)
+    if args.queries:
+        with run.stage("report"), open(out, "w", encoding="utf-8") as f:
+            write_comparison(f, outputs, total)
+        print(f"✅ Comparison of {len(outputs)} keyword sets written to {out}")
+    else:
+        out = report
+
+    listed = write_skipped(os.path.splitext(out)[0], skipped, blank)
+    if skipped:
+        reasons = Counter(exc.reason for _k, _p, exc in skipped)
+        print(f"⚠️  {len(skipped)} PDFs not scanned ("
+              + ", ".join(f"{r}: {reasons[r]}" for r in REASONS if reasons[r])
+              + f"), listed in {listed}")
+    elif listed:
+        print(f"👀 {len(blank)} PDFs with pages without text, listed in {listed}")
+    if args.profile:
+        print(write_profile(os.path.splitext(out)[0], profiles, run))
+    return out
+
+
+def write_matrix(base: str, entries: List[dict], found: Dict[int, List[str]],
+                 keywords: List[str], groups_runtime) -> None:
+    """
+    Matrice documents x mots-clés (keyword_stats.py) : une ligne par entrée
+    du .bib, dans l'ordre du rapport, les entrées sans PDF restant à zéro.
+    """
+    # NumPy/SciPy ne sont nécessaires qu'avec --matrix
+    from keyword_stats import MATRIX_SUFFIX, MatrixBuilder
+    family = {kw: hdr for hdr, kws in groups_runtime for kw in kws}
+    builder = MatrixBuilder(keywords, [family[kw] for kw in keywords])
+    for entry in entries:
+        builder.add(entry, found.get(id(entry), ()), id(entry) in found)
+    docs, kws = builder.save(base + MATRIX_SUFFIX)
+    print(f"✅ {docs} x {kws} keyword matrix written to {base}{MATRIX_SUFFIX}")
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def watch_snapshot(target: str, entries: List[dict]) -> dict:
+    """
+    État (taille, mtime) du .bib et du PDF attendu de chaque entrée, présent
+    ou non : un PDF qui arrive, change ou disparaît modifie l'instantané.
+    """
+    bib_dir = os.path.dirname(target)
+    snap = {target: _stat(target)}
+    for entry in entries:
+        m = re.search(r":([^:]+\.pdf):", entry.get('file', ''))
+        if m:
+            path = os.path.join(bib_dir, m.group(1))
+            snap[path] = _stat(path)
+    return snap
+
+
+def watch_bib(target: str, entries: List[dict], args, matcher: KeywordMatcher,
+              sets: List[KeywordSet], run_tag: str, cache: TextCache = None) -> None:
+    """
+    Boucle --watch : interroge le .bib et les PDF toutes les args.watch
+    secondes et relance scan_bib() dès qu'un changement est stable. Le
+    processus reste chaud : imports, mots-clés compilés et entrées du .bib
+    (relues seulement si le .bib change) restent en mémoire, et le manifeste
+    limite la ré-analyse aux entrées touchées.
+    """
+    interval = max(args.watch, 0.2)
+    # --full ne vaut que pour le premier scan
+    args = argparse.Namespace(**{**vars(args), "full": False})
+    snap = watch_snapshot(target, entries)
+    print(f"👀 Watching {target} and its PDFs every {interval:g}s (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            new = watch_snapshot(target, entries)
+            if new == snap:
+                continue
+            # Attend que les fichiers cessent de changer (copie en cours)
+            while True:
+                time.sleep(interval)
+                settled = watch_snapshot(target, entries)
+                if settled == new:
+                    break
+                new = settled
+            changed = sorted(p for p in set(snap) | set(new) if snap.get(p) != new.get(p))
+            print(f"🔄 {len(changed)} file(s) changed: "
+                  + ", ".join(os.path.basename(p) for p in changed[:5])
+                  + (" …" if len(changed) > 5 else ""))
+            run = Profile("run")
+            if new[target] != snap[target]:
+                with run.stage("load_bib"):
+                    entries = load_entries(target, args.group_filter)
+            start = time.perf_counter()
+            scan_bib(target, entries, args, matcher, sets, run_tag, cache, run)
+            print(f"⏱️  Rescan done in {time.perf_counter() - start:.1f}s")
+            snap = watch_snapshot(target, entries)
+    except KeyboardInterrupt:
+        print("\n👋 Watch stopped")
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
-if __name__ == "__main__":
+
+def main(argv: List[str] = None) -> int:
+    """Ligne de commande : scan d'un PDF ou d'un .bib, ou sous-commandes index / query / funding."""
+    argv = sys.argv[1:] if argv is None else argv
+    # Sous-commandes de l'index de phrases
+    if argv and argv[0] == "index":
+        return index_main(argv[1:])
+    if argv and argv[0] == "query":
+        return query_main(argv[1:])
+    if argv and argv[0] == "funding":
+        return funding_main(argv[1:])
+
     ap = argparse.ArgumentParser(description="Scan PDF or .bib for keywords.")
     ap.add_argument("path", help="PDF file or .bib file to scan")
     ap.add_argument("-g", "--group-filter",
-                    help="Filter .bib entries by group keyword (supports OR/AND)")
+                    help="Filter .bib entries by JabRef group expression "
+                         "(AND, OR, NOT, parentheses, Prefix_* wildcards)")
     ap.add_argument("-k", "--keywords",
                     help="Custom comma-separated keywords")
     ap.add_argument("--context", action="store_true",
                     help="Include the previous and next sentence around each match")
-    args = ap.parse_args()
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="Worker processes for .bib mode (default: 1, 0 = all cores)")
+    ap.add_argument("--page-jobs", type=int, default=1,
+                    help=f"Worker processes extracting the pages of PDFs longer than "
+                         f"{PAGE_CHUNK} pages, in chunks of {PAGE_CHUNK} pages "
+                         f"(default: 1, 0 = all cores)")
+    ap.add_argument("--timeout", type=float, metavar="SECONDS",
+                    help="(.bib mode) Time budget per PDF: each PDF is scanned in a supervised "
+                         "worker process, killed and replaced when the PDF goes over budget")
+    ap.add_argument("--max-pages", type=int, metavar="N",
+                    help="(.bib mode) Skip PDFs of more than N pages")
+    ap.add_argument("--max-memory", type=int, metavar="MB",
+                    help="(.bib mode) Address-space cap of each supervised worker process "
+                         "(Unix); a PDF needing more is skipped")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Do not read or write the extracted-text cache")
+    ap.add_argument("--cache-size", type=int, default=500, metavar="MB",
+                    help="Size bound of the extracted-text cache (default: 500 MB)")
+    ap.add_argument("--clear-cache", action="store_true",
+                    help="Empty the extracted-text cache before scanning")
+    ap.add_argument("--full", action="store_true",
+                    help="Ignore the .bib scan manifest and re-analyse every PDF")
+    ap.add_argument("--profile", action="store_true",
+                    help="Record per-document and per-stage timings in a JSON/CSV "
+                         "sidecar next to the report")
+    ap.add_argument("--watch", type=float, nargs="?", const=2.0, metavar="SECONDS",
+                    help="(.bib mode) Keep running and rescan changed entries whenever "
+                         "the .bib or one of its PDFs changes, polling every SECONDS "
+                         "(default: 2)")
+    ap.add_argument("--sections", nargs="?", const="references", metavar="SKIP",
+                    help="Detect section headings from the PDF layout (font size, bold), "
+                         "tag each hit with its section and skip the comma-separated "
+                         "SKIP sections before matching (default: references; 'none' "
+                         f"to only tag). Sections: {FRONT}, {', '.join(SECTIONS)}")
+    ap.add_argument("--matrix", action="store_true",
+                    help="(.bib mode) Also write the documents x keywords count matrix with "
+                         "the year, groups and categories of each entry, for keyword_stats.py "
+                         "(requires NumPy and SciPy)")
+    ap.add_argument("--queries", metavar="FILE",
+                    help="(.bib mode) Scan for several named keyword sets defined in FILE "
+                         "([name] lines followed by keywords; an empty set is the built-in "
+                         "groups) in one extraction pass, and write one report per set plus "
+                         "a comparison table")
+    ap.add_argument("--format", choices=RECORD_FORMATS,
+                    help="Also write one record per hit (bib key, DOI, PDF, page, keyword, "
+                         "keyword group, sentence, context, offsets) as JSON lines, CSV "
+                         "or a memory-mappable columnar file next to the report")
+    args = ap.parse_args(argv)
+    if args.queries and args.keywords:
+        ap.error("--queries and --keywords are mutually exclusive")
+    if args.sections is not None:
+        try:
+            args.sections = skip_sections(args.sections)
+        except ValueError as exc:
+            sys.exit(f"❌ --sections: {exc}")
+
+    # Profil global (hors documents) : compilation, lecture du .bib, rapport
+    run = Profile("run")
 
     include_context = args.context
 
@@ -338,120 +1778,82 @@ if __name__ == "__main__":
         groups_runtime = KEYWORD_GROUPS
         kw_tag = ""
 
-    patterns = compile_patterns(kws)
+    # Jeux de --queries : un seul matcher pour tous leurs mots-clés
+    sets, run_tag = None, kw_tag
+    if args.queries:
+        sets = load_queries(args.queries)
+        run_tag = os.path.splitext(os.path.basename(args.queries))[0].replace(" ", "-")
+        if run_tag in (s.tag for s in sets):
+            sys.exit(f"❌  A keyword set cannot share the name of {args.queries}")
+        kws = [kw for s in sets for kw in s.keywords]
+
+    with run.stage("compile"):
+        matcher = compile_matcher(kws)
     target = os.path.abspath(args.path)
 
+    # Cache du texte extrait, à côté du PDF ou du .bib
+    cache = None
+    if not args.no_cache:
+        cache = open_text_cache(os.path.dirname(target), args.cache_size)
+        if args.clear_cache:
+            cache.clear()
+
     # ----- PDF mode -----
     if os.path.isfile(target) and target.lower().endswith(".pdf"):
+        if args.queries:
+            ap.error("--queries applies to .bib files")
         # Writer global
-        writer, body, counts, studies, hit_pdfs = make_merged_writer()
-        analyse(target, patterns, writer, include_context)
+        writer = ReportWriter()
+        writer.begin("\n")
 
         # Nom de sortie
         base = os.path.splitext(target)[0]
         suffix = f"_{kw_tag}" if kw_tag else ""
         out_name = f"{base}{suffix}_keyword_scan.txt"
 
+        records = None
+        if args.format:
+            records = open_records(args.format, os.path.splitext(out_name)[0],
+                                   groups_runtime, include_context)
+
+        def write_hit(*hit):
+            writer(*hit)
+            if records:
+                records(*hit)
+
+        prof = Profile(target) if args.profile else NO_PROFILE
+        for hit in iter_matches(target, matcher, include_context, cache, prof, args.page_jobs,
+                                sections=args.sections):
+            write_hit(*hit)
+
         # Écriture
-        with open(out_name, "w", encoding="utf-8") as f:
-            write_stats(f, groups_runtime, counts, studies)
-            f.writelines(body)
+        with run.stage("report"), open(out_name, "w", encoding="utf-8") as f:
+            writer.write(f, groups_runtime)
+        writer.close()
 
         print(f"✅ Results written to {out_name}")
-        sys.exit()
+        if records:
+            records.close()
+            print(f"✅ {records.count} records written to {records.path}")
+        if args.profile:
+            print(write_profile(os.path.splitext(out_name)[0], [prof], run))
+        return 0
 
     # ----- .bib mode -----
     if os.path.isfile(target) and target.lower().endswith(".bib"):
-        bib_dir = os.path.dirname(target)
-        with open(target, encoding="utf-8") as bibf:
-            db = bibtexparser.loads(bibf.read())
-
-        # Filtrage par groupe(s), si demandé
-        entries = db.entries
-        if args.group_filter:
-            raw = args.group_filter.strip()
-            # OR logique
-            if re.search(r"\bOR\b", raw, re.IGNORECASE):
-                terms = [t.strip().lower().strip('"\'')
-                         for t in re.split(r"\bOR\b", raw, flags=re.IGNORECASE)]
-                def keep(e):
-                    gs = [g.strip().lower() for g in e.get('groups', '').split(',')]
-                    return any(term in gs for term in terms)
-
-            # AND logique
-            elif re.search(r"\bAND\b", raw, re.IGNORECASE):
-                terms = [t.strip().lower().strip('"\'')
-                         for t in re.split(r"\bAND\b", raw, flags=re.IGNORECASE)]
-                def keep(e):
-                    gs = [g.strip().lower() for g in e.get('groups', '').split(',')]
-                    return all(term in gs for term in terms)
-
-            # par défaut AND sur virgules ou espaces
-            else:
-                parts = re.split(r"[,\s]+", raw)
-                terms = [t.strip().lower().strip('"\'') for t in parts if t.strip()]
-                def keep(e):
-                    gs = [g.strip().lower() for g in e.get('groups', '').split(',')]
-                    return all(term in gs for term in terms)
-
-            entries = [e for e in entries if keep(e)]
-
-        total = len(entries)
-
-        # Tri par année puis par premier auteur
-        def sort_key(e):
-            try:
-                y = int(e.get('year', '')[:4])
-            except ValueError:
-                y = 0
-            auth = e.get('author', '').split(' and ')[0]
-            return (y, auth.lower())
-        entries.sort(key=sort_key)
-
-        # Writer global
-        w_global, body, counts, studies, hit_pdfs = make_merged_writer()
-
-        # Parcours des références filtrées
-        for entry in entries:
-            # Extraction du chemin PDF
-            ffield = entry.get('file', '')
-            m = re.search(r":([^:]+\.pdf):", ffield)
-            if not m:
-                continue
-            pdfname = m.group(1)
-            pdfpath = os.path.join(bib_dir, pdfname)
-            if not os.path.isfile(pdfpath):
-                continue
-
-            # Writer local pour cette entrée
-            entry_body = []
-            def w_entry(page, kw, sent, pdf_path):
-                counts[kw] += 1
-                studies[kw].add(pdf_path)
-                hit_pdfs.add(pdf_path)
-                entry_body.append(f" Page {page} – \"{kw}\":\n  \"{sent}\"\n\n")
-
-            # Analyse avec contexte éventuel
-            analyse(pdfpath, patterns, w_entry, include_context)
-
-            # N’ajoute que si on a trouvé quelque chose
-            if entry_body:
-                body.append(make_bib_header(entry))
-                body.extend(entry_body)
-
-        # Nom de sortie .bib
-        base_tag = "_bib_keyword_scan"
-        suffix = f"_{kw_tag}" if kw_tag else ""
-        out = os.path.join(bib_dir, f"{base_tag}{suffix}.txt")
-
-        # Écriture finale
-        with open(out, "w", encoding="utf-8") as f:
-            write_stats(f, groups_runtime, counts, studies, total, len(hit_pdfs))
-            f.writelines(body)
-
-        print(f"✅ Bib report written to {out}")
-        sys.exit()
+        # Filtrage par groupe(s) si demandé, tri par année puis premier auteur
+        with run.stage("load_bib"):
+            entries = load_entries(target, args.group_filter)
+        if sets is None:
+            sets = [KeywordSet(kw_tag, groups_runtime)]
+        scan_bib(target, entries, args, matcher, sets, run_tag, cache, run)
+        if args.watch is not None:
+            watch_bib(target, entries, args, matcher, sets, run_tag, cache)
+        return 0
 
     # Si on arrive ici, c’est une extension non gérée
     ap.error("Path must be a .pdf or .bib file.")
 
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+scan_budget.py
+
+Per-document time, page and memory budgets for the .bib scans of
+pdf_keyword_scan.py.
+
+With a time or memory budget, every PDF is scanned in a supervised worker
+process: the parent hands one document at a time to each worker and waits for
+its result until the document's deadline. A worker that goes over time is
+killed and replaced, and so is a worker that dies (a crash inside MuPDF, an
+out-of-memory kill). The memory cap is an address-space limit (RLIMIT_AS) set in
+every worker, so an allocation past it fails in the worker instead of
+exhausting the machine. The page limit is checked by the scan itself, before
+any text is extracted.
+
+Documents that cannot be scanned (over budget, encrypted, without any text,
+or failing with an error) come back as Skipped values instead of hits, and
+write_skipped() lists them, together with the documents that have pages
+without text, in a sidecar next to the report.
+"""
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+SKIPPED_SUFFIX = ".skipped.txt"
+
+# Raisons d'un document non analysé
+TIMEOUT, MEMORY, PAGES, ENCRYPTED, TEXTLESS, FAILED = (
+    "timeout", "memory", "pages", "encrypted", "textless", "failed")
+REASONS = {
+    TIMEOUT: "Timed out",
+    MEMORY: "Over the memory cap",
+    PAGES: "Over the page limit",
+    ENCRYPTED: "Encrypted (password required)",
+    TEXTLESS: "No extractable text (scanned or image-only PDF)",
+    FAILED: "Could not be opened or extracted",
+}
+
+
+class Budget(NamedTuple):
+    timeout: Optional[float] = None   # secondes par document
+    max_pages: Optional[int] = None
+    max_memory: Optional[int] = None  # Mo d'espace d'adressage par worker
+
+    @property
+    def supervised(self) -> bool:
+        """Un délai ou un plafond mémoire demande des workers supervisés."""
+        return self.timeout is not None or self.max_memory is not None
+
+
+NO_BUDGET = Budget()
+
+
+class Skipped(Exception):
+    """Document non analysé : raison (TIMEOUT, MEMORY, ...) et détail."""
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(reason, detail)
+        self.reason = reason
+        self.detail = detail
+
+
+def guarded(fun, path: str, *args):
+    """
+    fun(path, *args), ou le Skipped qui explique pourquoi le document n'a pas
+    pu être analysé : une erreur sur un PDF n'interrompt plus tout le scan.
+    """
+    try:
+        return fun(path, *args)
+    except Skipped as exc:
+        return exc
+    except MemoryError:
+        return Skipped(MEMORY, "allocation failed")
+    except Exception as exc:
+        return Skipped(FAILED, f"{type(exc).__name__}: {exc}")
+
+# ---------------------------------------------------------------------------
+# Supervised workers
+# ---------------------------------------------------------------------------
+
+def _limit_memory(max_memory: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        # Pas de RLIMIT_AS hors Unix : seul le délai s'applique
+        return
+    limit = max_memory * 1024 * 1024
+    _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _serve(conn, max_memory: Optional[int]) -> None:
+    """Boucle d'un worker : une tâche (fun, pdf, args) à la fois, None pour finir."""
+    if max_memory is not None:
+        _limit_memory(max_memory)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        fun, path, args = task
+        conn.send(guarded(fun, path, *args))
+
+
+class _Worker:
+
+    def __init__(self, max_memory: Optional[int]):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child, max_memory),
+                                               daemon=True)
+        self.process.start()
+        # Seul le worker garde son bout du tube : sa mort se lit comme une fin de fichier
+        child.close()
+        self.index = None
+        self.deadline = None
+
+    def submit(self, index: int, task: tuple, timeout: Optional[float]) -> None:
+        self.index = index
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.conn.send(task)
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+def supervise(fun, paths: List[str], jobs: int, budget: Budget, *args) -> Iterator:
+    """
+    fun(pdf, *args) pour chaque PDF dans jobs workers supervisés (0 = tous les
+    cœurs), résultats dans l'ordre de `paths` comme map_documents() ; un
+    document hors délai, ou dont le worker meurt, donne un Skipped et son
+    worker est remplacé.
+    """
+    if not paths:
+        return
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    todo = list(enumerate(paths))[::-1]
+    idle = [_Worker(budget.max_memory) for _ in range(jobs)]
+    busy = {}
+    done = {}
+    following = 0
+    try:
+        while following < len(paths):
+            while todo and idle:
+                worker = idle.pop()
+                index, path = todo.pop()
+                worker.submit(index, (fun, path, args), budget.timeout)
+                busy[worker.conn] = worker
+
+            deadlines = [w.deadline for w in busy.values() if w.deadline is not None]
+            delay = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for conn in wait(list(busy), delay):
+                worker = busy.pop(conn)
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    worker.process.join()
+                    result = Skipped(FAILED, f"worker died (exit code {worker.process.exitcode})")
+                done[worker.index] = result
+                if isinstance(result, Skipped) and result.reason in (MEMORY, FAILED):
+                    # Après un échec d'allocation, l'état du worker n'est plus sûr
+                    worker.stop(kill=True)
+                    worker = _Worker(budget.max_memory)
+                idle.append(worker)
+
+            now = time.monotonic()
+            for conn, worker in list(busy.items()):
+                if worker.deadline is None or now < worker.deadline or conn.poll():
+                    continue
+                del busy[conn]
+                worker.stop(kill=True)
+                done[worker.index] = Skipped(TIMEOUT, f"over {budget.timeout:g} s")
+                idle.append(_Worker(budget.max_memory))
+
+            while following in done:
+                yield done.pop(following)
+                following += 1
+    finally:
+        for worker in idle:
+            worker.stop()
+        for worker in busy.values():
+            worker.stop(kill=True)
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def write_skipped(base: str, skipped: List[Tuple[str, str, Skipped]],
+                  blank: List[Tuple[str, str, int, int]]) -> Optional[str]:
+    """
+    base.skipped.txt : documents non analysés, par raison, puis documents
+    analysés dont des pages n'ont pas de texte. skipped : (clé, pdf, Skipped),
+    blank : (clé, pdf, pages sans texte, pages). Sans rien à signaler, un
+    ancien fichier est supprimé et None renvoyé.
+    """
+    path = base + SKIPPED_SUFFIX
+    if not skipped and not blank:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Documents not scanned: {len(skipped)}\n")
+        for reason, label in REASONS.items():
+            rows = [(key, pdf, exc.detail) for key, pdf, exc in skipped if exc.reason == reason]
+            if not rows:
+                continue
+            f.write(f"\n{label} ({len(rows)}):\n")
+            for key, pdf, detail in rows:
+                f.write(f"  {key}  {pdf}" + (f"  ({detail})" if detail else "") + "\n")
+        if blank:
+            f.write(f"\nDocuments with pages without text ({len(blank)}):\n")
+            for key, pdf, empty, pages in blank:
+                f.write(f"  {key}  {pdf}  ({empty} of {pages} pages)\n")
+    return path
@@ -0,0 +1,60 @@
+"""
+scan_manifest.py
+
+Per-corpus manifest behind the incremental .bib scans of pdf_keyword_scan.py.
+
+For each bib entry the manifest keeps the state of its PDF (path, content hash,
+size, mtime, page, blank-page and character counts), the entry fields the scan
+depends on and the hits found in it, all under a fingerprint of the keyword
+set. Records and hits are read one entry at a time, so a rescan never holds
+the whole corpus' hits in memory.
+"""
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+RECORD_FIELDS = ("pdf", "digest", "size", "mtime_ns", "pages", "blank", "chars",
+                 "file", "groups")
+
+
+class ScanManifest:
+
+    def __init__(self, path: str, fingerprint: str, reset: bool = False):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        # Autre jeu de mots-clés (ou --full, ou autre format) : les occurrences
+        # mémorisées ne valent plus, la table est recréée
+        if reset or row is None or row[0] != fingerprint:
+            self.conn.execute("DROP TABLE IF EXISTS docs")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                              (fingerprint,))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY,"
+            " pdf TEXT, digest TEXT, size INTEGER, mtime_ns INTEGER,"
+            " pages INTEGER, blank INTEGER, chars INTEGER, file TEXT, groups TEXT, hits TEXT)")
+        self.conn.commit()
+
+    def record(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT %s FROM docs WHERE key = ?" % ", ".join(RECORD_FIELDS), (key,)).fetchone()
+        return dict(zip(RECORD_FIELDS, row)) if row else None
+
+    def hits(self, key: str) -> List[list]:
+        row = self.conn.execute("SELECT hits FROM docs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def put(self, key: str, record: Dict, hits: List[list]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO docs VALUES (?, %s, ?)" % ", ".join("?" * len(RECORD_FIELDS)),
+            (key, *(record[f] for f in RECORD_FIELDS), json.dumps(hits, ensure_ascii=False)))
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """Oublie les entrées qui ne font plus partie du scan."""
+        keep = set(keys)
+        gone = [k for (k,) in self.conn.execute("SELECT key FROM docs") if k not in keep]
+        self.conn.executemany("DELETE FROM docs WHERE key = ?", ((k,) for k in gone))
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
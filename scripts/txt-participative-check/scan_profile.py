@@ -0,0 +1,117 @@
+"""
+scan_profile.py
+
+Per-document, per-stage instrumentation for pdf_keyword_scan.py --profile.
+
+A Profile accumulates wall-clock and CPU time for named stages (fitz.open,
+get_text, clean, matching, sentence boundaries, report writing, ...) together with
+page, blank-page, character and hit counts. Profiles are plain picklable objects, so the
+worker processes of a --jobs run send them back with their hits. write_profile()
+stores them as a JSON and a CSV sidecar next to the report and returns a short
+summary of the slowest documents and stages.
+"""
+import csv
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class Profile:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, List[float]] = {}
+        self.pages = 0
+        self.blank = 0
+        self.chars = 0
+        self.hits = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            acc = self.stages.setdefault(name, [0.0, 0.0])
+            acc[0] += time.perf_counter() - wall
+            acc[1] += time.process_time() - cpu
+
+    @property
+    def wall(self) -> float:
+        return sum(w for w, _c in self.stages.values())
+
+    @property
+    def cpu(self) -> float:
+        return sum(c for _w, c in self.stages.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "document": self.name,
+            "pages": self.pages,
+            "blank_pages": self.blank,
+            "chars": self.chars,
+            "hits": self.hits,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "stages": {k: {"wall": w, "cpu": c} for k, (w, c) in self.stages.items()},
+        }
+
+
+class _NoProfile:
+    """Remplaçant neutre quand --profile n'est pas demandé."""
+
+    pages = blank = chars = hits = 0
+
+    def __setattr__(self, name, value):
+        # Objet partagé : les compteurs restent à zéro (profile.pages = ..., += ...)
+        pass
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+
+NO_PROFILE = _NoProfile()
+
+
+def write_profile(base: str, documents: List[Profile], run: Profile, top: int = 10) -> str:
+    """Écrit base.profile.json et base.profile.csv ; renvoie le résumé texte."""
+    stages: Dict[str, List[float]] = {}
+    for prof in documents + [run]:
+        for name, (w, c) in prof.stages.items():
+            acc = stages.setdefault(name, [0.0, 0.0])
+            acc[0] += w
+            acc[1] += c
+    slowest = sorted(documents, key=lambda p: p.wall, reverse=True)[:top]
+    stage_rank = sorted(stages.items(), key=lambda kv: kv[1][0], reverse=True)
+
+    data = {
+        "run": run.as_dict(),
+        "totals": {
+            "documents": len(documents),
+            "pages": sum(p.pages for p in documents),
+            "chars": sum(p.chars for p in documents),
+            "hits": sum(p.hits for p in documents),
+        },
+        "stages": {k: {"wall": w, "cpu": c} for k, (w, c) in stage_rank},
+        "slowest_documents": [p.as_dict() for p in slowest],
+        "documents": [p.as_dict() for p in documents],
+    }
+    with open(base + ".profile.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    names = sorted({name for p in documents for name in p.stages})
+    with open(base + ".profile.csv", "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["document", "pages", "chars", "hits", "wall", "cpu"]
+                   + [f"{n}_wall" for n in names])
+        for p in documents:
+            w.writerow([p.name, p.pages, p.chars, p.hits, f"{p.wall:.6f}", f"{p.cpu:.6f}"]
+                       + [f"{p.stages.get(n, (0.0, 0.0))[0]:.6f}" for n in names])
+
+    lines = ["Slowest stages (wall / cpu, seconds):"]
+    lines += [f"  {name:<16} {w:9.3f} / {c:9.3f}" for name, (w, c) in stage_rank]
+    lines.append("Slowest documents (wall seconds, pages, hits):")
+    lines += [f"  {p.wall:9.3f}  {p.pages:5d}  {p.hits:5d}  {p.name}" for p in slowest[:5]]
+    return "\n".join(lines)
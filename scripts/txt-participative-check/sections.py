@@ -0,0 +1,174 @@
+"""
+sections.py
+
+Section detection for pdf_keyword_scan.py --sections.
+
+Headings are read from the layout PyMuPDF returns with page.get_text("dict"):
+a line is a heading when its text, once numbering ("2.", "2.1", "IV.") and
+trailing punctuation are removed, is a known section name (SECTIONS) and it
+stands out from the body text of the page: bold, a larger font, capitals, or
+alone in its block. Run-in headings ("Funding: This work was supported...")
+are recognised from the leading bold run of the line. Each heading keeps the
+number of times its text occurs in the lines above it, so it is found again
+in the cleaned page text at its own line, not at an earlier occurrence in the
+body text ("Results of the pilot study...").
+
+The layout is only read for the pages where a line of the plain text starts
+with a known name (may_hold_headings()): on the other pages no heading can be
+recognised, and building the layout dict costs as much as the text extraction.
+
+Only known names change the current section: sub-headings, figure titles and
+unknown headings keep the section of the last known heading, and the text
+before the first one is FRONT (title, authors, abstract without heading).
+"""
+import re
+from collections import Counter
+from typing import FrozenSet, List, Optional, Tuple
+
+# Version de la détection : à incrémenter dès que page_headings() change,
+# pour invalider les titres mis en cache (3 : rang de l'occurrence du titre)
+SECTIONS_VERSION = "3"
+
+FRONT = "front"
+
+# Section -> intitulés reconnus (regex sur le titre en minuscules, sans numéro)
+SECTIONS = {
+    "abstract": r"abstract|summary|lay (?:abstract|summary)",
+    "introduction": r"introduction|background",
+    "methods": r"(?:materials? and )?methods?(?: and materials?)?|methodology|"
+               r"(?:participants|patients|subjects) and methods|participants|"
+               r"study design|design and methods",
+    "results": r"results|findings|results and discussion",
+    "discussion": r"discussion|general discussion",
+    "conclusion": r"conclusions?|concluding remarks|summary and conclusions?",
+    "acknowledgements": r"acknowledge?ments?(?: and (?:disclosures|funding))?",
+    "funding": r"funding|funding (?:information|sources?|statement)|financial support|"
+               r"role of the funding source|sources? of funding",
+    "declarations": r"declarations?|(?:declaration of )?(?:conflicts? of interests?|"
+                    r"competing interests?)|ethics(?: statement| approval)?|"
+                    r"author contributions|data availability(?: statement)?|"
+                    r"disclosure statement|disclosures",
+    "references": r"references|bibliography|literature cited|works cited|reference list",
+    "appendix": r"appendix(?: [a-z0-9]+)?|appendices|supplementary (?:materials?|information)",
+}
+
+_NAMES = [(name, re.compile(rf"(?:{alias})")) for name, alias in SECTIONS.items()]
+# Début de ligne qui peut être un intitulé connu
+_LEAD = re.compile("|".join(f"(?:{alias})" for alias in SECTIONS.values()))
+_NUMBERING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[ivx]+\.|[a-h]\.)\s+")
+_BOLD = 16          # bit « gras » de span["flags"]
+_MAX_HEADING = 80   # caractères
+
+
+def section_name(text: str) -> Optional[str]:
+    """Section désignée par un intitulé, None s'il n'est pas reconnu."""
+    title = " ".join(text.lower().split()).rstrip(" :.")
+    title = _NUMBERING.sub("", title).replace("&", "and")
+    if not title or len(title) > _MAX_HEADING:
+        return None
+    for name, alias in _NAMES:
+        if alias.fullmatch(title):
+            return name
+    return None
+
+
+def may_hold_headings(text: str) -> bool:
+    """
+    Faux si aucune ligne du texte brut d'une page (get_text()) ne commence
+    par un intitulé connu : page_headings() n'y trouverait aucun titre.
+    """
+    for line in text.lower().splitlines():
+        line = _NUMBERING.sub("", " ".join(line.split())).replace("&", "and")
+        if _LEAD.match(line):
+            return True
+    return False
+
+
+def _is_bold(span: dict) -> bool:
+    return bool(span["flags"] & _BOLD) or "bold" in span["font"].lower()
+
+
+def page_headings(page, textpage=None) -> List[Tuple[str, str, int]]:
+    """
+    (texte du titre tel qu'il apparaît dans le texte nettoyé, section, rang)
+    des titres reconnus de la page, dans l'ordre de lecture ; rang : nombre
+    d'occurrences du même texte dans les lignes qui précèdent le titre.
+    textpage : extraction déjà faite de la page (page.get_textpage()), réutilisée.
+    """
+    layout = page.get_text("dict", textpage=textpage)
+    blocks = [b for b in layout["blocks"] if b.get("type", 0) == 0]
+
+    # Taille du corps de texte : la plus fréquente, pondérée par le nombre de caractères
+    sizes = Counter()
+    for b in blocks:
+        for line in b["lines"]:
+            for span in line["spans"]:
+                sizes[round(span["size"], 1)] += len(span["text"].strip())
+    body = sizes.most_common(1)[0][0] if sizes else 0
+
+    headings = []
+    # Texte des lignes déjà lues, joint comme dans le texte nettoyé
+    seen = ""
+    for b in blocks:
+        for line in b["lines"]:
+            spans = [s for s in line["spans"] if s["text"].strip()]
+            if not spans:
+                continue
+            text = " ".join("".join(s["text"] for s in line["spans"]).split())
+            before, seen = seen, f"{seen} {text}" if seen else text
+            name = section_name(text)
+            if name:
+                styled = (all(_is_bold(s) for s in spans)
+                          or max(s["size"] for s in spans) >= body + 1
+                          or text.isupper() or len(b["lines"]) == 1)
+                if styled:
+                    headings.append((text, name, before.count(text)))
+                continue
+            # Titre en début de ligne : « Funding: » en gras suivi du texte
+            lead = []
+            for s in spans:
+                if not _is_bold(s):
+                    break
+                lead.append(s["text"])
+            if lead and len(lead) < len(spans):
+                run_in = " ".join("".join(lead).split())
+                name = section_name(run_in)
+                if name:
+                    headings.append((run_in, name, before.count(run_in)))
+    return headings
+
+
+def section_spans(text: str, headings, current: str) -> List[Tuple[int, str]]:
+    """
+    Découpe du texte nettoyé d'une page en (début, section) : la page continue
+    la section `current` jusqu'au premier titre retrouvé dans le texte. Chaque
+    titre est cherché à son rang, et non à la première occurrence de son texte.
+    """
+    spans = [(0, current)]
+    pos = 0
+    for heading, name, rank in headings:
+        at = -len(heading)
+        for _ in range(rank + 1):
+            at = text.find(heading, at + len(heading))
+            if at < 0:
+                break
+        if at < pos:
+            continue
+        if at == 0:
+            spans[0] = (0, name)
+        elif name != spans[-1][1]:
+            spans.append((at, name))
+        pos = at + len(heading)
+    return spans
+
+
+def skip_sections(spec: str) -> FrozenSet[str]:
+    """Sections à ignorer d'après --sections ("references,appendix", "none")."""
+    names = {s.strip().lower() for s in spec.split(",") if s.strip()}
+    if names == {"none"}:
+        return frozenset()
+    unknown = sorted(names - set(SECTIONS) - {FRONT})
+    if unknown:
+        raise ValueError(f"unknown section(s): {', '.join(unknown)} "
+                         f"(known: {FRONT}, {', '.join(SECTIONS)})")
+    return frozenset(names)
@@ -0,0 +1,150 @@
+"""
+sentence_index.py
+
+Persistent sentence-level inverted index behind the `index` and `query`
+subcommands of pdf_keyword_scan.py.
+
+The text of every non-empty page is stored once, and every sentence that
+split_sentences() finds on a page is recorded with its document, page and
+position on the page; every distinct lowercase \\w+ token of a sentence,
+folded by text_normalize.py, maps to the ids of the sentences that contain
+it. Keyword queries are answered with prefix lookups on the sorted
+vocabulary, which give a small set of candidate sentences, hence of candidate
+pages; the caller then scans those pages with the regular scanner, together
+with the neighbouring pages, so query results (sentences running over a page
+break and --context included) are exactly those of a scan.
+"""
+import os
+import re
+import sqlite3
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from text_normalize import normalize
+
+INDEX_NAME = ".pdf_sentence_index.sqlite"
+
+# Format de l'index : à incrémenter dès que le schéma change (2 : texte des pages)
+INDEX_VERSION = "2"
+
+_TOKEN = re.compile(r"\w+")
+
+# (clé bib, chemin du PDF, en-tête du rapport, pages non vides (page, texte),
+#  phrases (page, position, texte))
+Document = Tuple[str, str, str, Iterable[Tuple[int, str]], Iterable[Tuple[int, int, str]]]
+
+
+def tokenize(text: str) -> Set[str]:
+    # Texte replié comme pour le scan (ligatures, tirets Unicode)
+    return set(_TOKEN.findall(normalize(text)[0].lower()))
+
+
+def build_index(path: str, documents: Iterable[Document], meta: Dict[str, str]) -> int:
+    """
+    (Re)construit l'index dans un fichier temporaire puis le met en place
+    atomiquement. Renvoie le nombre de phrases indexées.
+    """
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript(
+        "CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);"
+        "CREATE TABLE docs (id INTEGER PRIMARY KEY, key TEXT, path TEXT, header TEXT);"
+        "CREATE TABLE pages (doc INTEGER, page INTEGER, text TEXT,"
+        " PRIMARY KEY (doc, page)) WITHOUT ROWID;"
+        "CREATE TABLE sentences (id INTEGER PRIMARY KEY, doc INTEGER,"
+        " page INTEGER, pos INTEGER);"
+        "CREATE TABLE postings (token TEXT PRIMARY KEY, ids BLOB) WITHOUT ROWID;"
+    )
+    postings = defaultdict(lambda: array("I"))
+    sid = 0
+    for doc_id, (key, pdf_path, header, pages, sentences) in enumerate(documents):
+        conn.execute("INSERT INTO docs VALUES (?, ?, ?, ?)", (doc_id, key, pdf_path, header))
+        conn.executemany("INSERT INTO pages VALUES (?, ?, ?)",
+                         ((doc_id, page, text) for page, text in pages))
+        rows = []
+        for page, pos, text in sentences:
+            rows.append((sid, doc_id, page, pos))
+            for tok in tokenize(text):
+                postings[tok].append(sid)
+            sid += 1
+        conn.executemany("INSERT INTO sentences VALUES (?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO postings VALUES (?, ?)",
+                     ((tok, ids.tobytes()) for tok, ids in postings.items()))
+    conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                     {**meta, "version": INDEX_VERSION}.items())
+    conn.commit()
+    conn.close()
+    os.replace(tmp, path)
+    return sid
+
+
+class SentenceIndex:
+    """Accès en lecture seule à un index construit par build_index()."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self._prefix_cache: Dict[str, Set[int]] = {}
+
+    def meta(self, name: str, default: str = None) -> str:
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def documents(self) -> Dict[int, Tuple[str, str, str]]:
+        return {doc_id: (key, path, header) for doc_id, key, path, header
+                in self.conn.execute("SELECT id, key, path, header FROM docs")}
+
+    def prefix_ids(self, prefix: str) -> Set[int]:
+        """Phrases contenant au moins un token qui commence par `prefix`."""
+        if prefix not in self._prefix_cache:
+            if prefix:
+                hi = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                rows = self.conn.execute(
+                    "SELECT ids FROM postings WHERE token >= ? AND token < ?", (prefix, hi))
+            else:
+                rows = self.conn.execute("SELECT ids FROM postings")
+            ids = set()
+            for (blob,) in rows:
+                ids.update(array("I", blob))
+            self._prefix_cache[prefix] = ids
+        return self._prefix_cache[prefix]
+
+    def candidates(self, alternatives: List[List[str]]) -> Set[int]:
+        """Union des alternatives, chacune étant l'intersection de ses préfixes."""
+        found = set()
+        for prefixes in alternatives:
+            ids = None
+            for prefix in sorted(prefixes, key=lambda p: len(self.prefix_ids(p))):
+                ids = set(self.prefix_ids(prefix)) if ids is None else ids & self.prefix_ids(prefix)
+                if not ids:
+                    break
+            if ids:
+                found |= ids
+        return found
+
+    def pages(self, ids: Iterable[int]) -> List[Tuple[int, int]]:
+        """(doc, page) des pages qui contiennent les phrases demandées, dans l'ordre."""
+        ids = sorted(set(ids))
+        pages = set()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            pages.update(self.conn.execute(
+                "SELECT doc, page FROM sentences WHERE id IN (%s)"
+                % ",".join("?" * len(chunk)), chunk))
+        return sorted(pages)
+
+    def window(self, doc: int, page: int) -> Tuple[str, str, str]:
+        """Texte de la page et des pages non vides qui l'entourent ("" au bord du document)."""
+        def text(sql: str) -> str:
+            row = self.conn.execute(sql, (doc, page)).fetchone()
+            return row[0] if row else ""
+        return (text("SELECT text FROM pages WHERE doc = ? AND page < ?"
+                     " ORDER BY page DESC LIMIT 1"),
+                text("SELECT text FROM pages WHERE doc = ? AND page = ?"),
+                text("SELECT text FROM pages WHERE doc = ? AND page > ?"
+                     " ORDER BY page LIMIT 1"))
+
+    def close(self) -> None:
+        self.conn.close()
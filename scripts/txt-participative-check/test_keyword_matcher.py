@@ -0,0 +1,56 @@
+"""
+Tests for KeywordMatcher in pdf_keyword_scan.py: the single-pass prefilter
+reports the same hits as running each keyword pattern over the text on its
+own, overlapping keywords included.
+
+Run from this folder with: python -m pytest -q (needs PyMuPDF and bibtexparser).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("fitz")
+pytest.importorskip("bibtexparser")
+
+import pdf_keyword_scan as pks  # noqa: E402
+
+KEYWORDS = [
+    "community-based participatory research",
+    "Community-based participatory",
+    "participatory research",
+    "participat*",
+    "co-design",
+    "advisory board",
+    "family",
+]
+
+TEXT = (
+    "We used community-based participatory research (CBPR). Community based "
+    "participatory methods and Participatory Research with families were "
+    "combined; participation was high. A co design phase and two co-designs "
+    "followed, reviewed by advisory boards and one advisory-board."
+)
+
+
+def _naive(words, text):
+    """Chaque motif de compile_patterns() parcourt le texte séparément."""
+    hits = [(m.start(), idx, m.end(), kw)
+            for idx, (kw, pat) in enumerate(pks.compile_patterns(words))
+            for m in pat.finditer(text)]
+    return [(kw, start, end) for start, _idx, end, kw in sorted(hits)]
+
+
+def test_matcher_equals_per_pattern_search():
+    expected = _naive(KEYWORDS, TEXT)
+    assert pks.compile_matcher(KEYWORDS).finditer(TEXT) == expected
+
+    # Les trois mots-clés qui se chevauchent sont tous rapportés
+    found = {kw for kw, _s, _e in expected}
+    assert set(KEYWORDS) <= found
+    start = TEXT.index("community-based")
+    assert [kw for kw, s, _e in expected if s == start] == KEYWORDS[:2]
+    overlap = TEXT.index("participatory research")
+    assert ("participatory research", overlap, overlap + 22) in expected
@@ -0,0 +1,54 @@
+"""
+Tests for the hit stores of pdf_keyword_scan.py: MatchStore (match_store.py)
+and the columnar records (match_records.py) stay usable after a read that
+stops early.
+
+Run from this folder with: python -m pytest -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from match_records import ColumnarWriter, read_columns  # noqa: E402
+from match_store import MatchStore  # noqa: E402
+
+HITS = [
+    (1, "co-design", "A co-design study."),
+    (1, "advisory board", "An advisory board met."),
+    (2, "co-design", "A second co-design round."),
+]
+
+
+def _texts(store):
+    return [(page, kw, text) for _block, page, kw, text, *_rest in store]
+
+
+def test_store_appends_after_partial_read():
+    store = MatchStore()
+    store.begin("doc")
+    for page, kw, text in HITS[:2]:
+        store.add(page, kw, text, "doc.pdf")
+    # Lecture interrompue, puis nouvelle occurrence : elle va en fin de spool
+    for _hit in store:
+        break
+    store.add(*HITS[2], "doc.pdf")
+    assert _texts(store) == HITS
+    store.close()
+
+
+def test_columns_released_after_partial_read(tmp_path):
+    path = str(tmp_path / "hits.columns")
+    writer = ColumnarWriter(path, [("# Custom keywords", ["co-design", "advisory board"])],
+                            False)
+    writer.begin("Doc1", "")
+    for page, kw, text in HITS:
+        writer(page, kw, text, "doc.pdf", (0, len(text), 0, len(kw), 0))
+    writer.close()
+
+    columns = read_columns(path)
+    records = columns.records()
+    assert next(records)["sentence"] == HITS[0][2]
+    records.close()
+    # Plus aucune vue sur le fichier mappé : close() ne lève pas BufferError
+    columns.close()
@@ -0,0 +1,110 @@
+"""
+Tests for the .bib scans of pdf_keyword_scan.py: incremental rescans through
+the manifest, and the index / query subcommands, which report the same hits
+as a scan.
+
+Run from this folder with: python -m pytest -q (needs PyMuPDF and bibtexparser).
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("bibtexparser")
+
+import pdf_keyword_scan as pks  # noqa: E402
+
+PAGES = [
+    "Autistic adults were recruited. The study was then designed with",
+    "autistic co-researchers in co-design workshops. Each workshop had an advisory "
+    "board. A second co-design round followed.",
+    "",
+    "The results were shared with the advisory board. Co-design was evaluated last.",
+]
+
+ENTRY = """@Article{{Doc{n},
+  author = {{Author, A.}},
+  title = {{Doc {n}}},
+  year = {{2024}},
+  file = {{:doc{n}.pdf:PDF}},
+}}
+"""
+
+
+def _write_pdf(path, pages) -> None:
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        if text:
+            page.insert_textbox(fitz.Rect(72, 72, 520, 770), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _write_library(directory, documents):
+    """doc1.pdf, doc2.pdf... et lib.bib qui les référence."""
+    for n, pages in enumerate(documents, 1):
+        _write_pdf(directory / f"doc{n}.pdf", pages)
+    bib = directory / "lib.bib"
+    bib.write_text("\n".join(ENTRY.format(n=n) for n in range(1, len(documents) + 1)),
+                   encoding="utf-8")
+    return bib
+
+
+@pytest.fixture
+def library(tmp_path):
+    return _write_library(tmp_path, [PAGES])
+
+
+def _hits(path) -> str:
+    """Rapport sans le libellé du groupe (# Custom keywords / # Query)."""
+    with open(path, encoding="utf-8") as f:
+        return "".join(line for line in f if not line.startswith("# "))
+
+
+@pytest.mark.parametrize("context", [[], ["--context"]])
+def test_query_matches_scan(library, tmp_path, context):
+    bib = str(library)
+    pks.main([bib, "-k", "co-design,advisory board", "--no-cache"] + context)
+    pks.main(["index", bib, "--no-cache"])
+    report = str(tmp_path / "query.txt")
+    pks.main(["query", bib, "co-design", "advisory board", "-o", report] + context)
+
+    scanned = _hits(tmp_path / "_bib_keyword_scan_co-design-advisory-board.txt")
+    # La phrase commencée page 1 est rapportée en entier, des deux côtés
+    assert "The study was then designed with autistic co-researchers" in scanned
+    assert _hits(report) == scanned
+
+
+def test_rescan_reanalyses_only_the_changed_pdf(tmp_path, capsys):
+    bib = str(_write_library(tmp_path, [["A co-design study."]] * 3))
+    pks.main([bib, "-k", "co-design", "--no-cache"])
+    capsys.readouterr()
+
+    # Contenu modifié : seul doc2 est ré-analysé
+    _write_pdf(tmp_path / "doc2.pdf", ["A co-design study with a co-design group."])
+    pks.main([bib, "-k", "co-design", "--no-cache"])
+    assert "1 of 3 PDFs analysed, 2 reused from the manifest" in capsys.readouterr().out
+    report = (tmp_path / "_bib_keyword_scan_co-design.txt").read_text(encoding="utf-8")
+    assert report.count('"co-design":') == 4
+    assert "with a co-design group" in report
+
+
+def test_profile_counts_reused_documents(library):
+    bib = str(library)
+    profile = library.parent / "_bib_keyword_scan_co-design.profile.json"
+
+    def counts():
+        pks.main([bib, "-k", "co-design", "--no-cache", "--profile"])
+        data = json.loads(profile.read_text(encoding="utf-8"))
+        return [(d["pages"], d["blank_pages"], d["chars"], d["hits"])
+                for d in data["documents"]]
+
+    scanned = counts()
+    # Document repris du manifeste : mêmes compteurs que lors du scan
+    assert counts() == scanned
+    assert scanned[0][:2] == (4, 1) and scanned[0][2] > 0
@@ -0,0 +1,73 @@
+"""
+Tests for the per-document budgets of pdf_keyword_scan.py (scan_budget.py):
+corrupt, encrypted and over-budget PDFs are reported as skipped, and the scan
+goes on with the other documents.
+
+Run from this folder with: python -m pytest -q (needs PyMuPDF and bibtexparser).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("bibtexparser")
+
+import pdf_keyword_scan as pks  # noqa: E402
+from scan_budget import ENCRYPTED, FAILED, PAGES, TIMEOUT, Budget, Skipped  # noqa: E402
+from test_pdf_keyword_scan import _write_library, _write_pdf  # noqa: E402
+
+PAGES_TEXT = ["A co-design study.", "The co-design group met twice."]
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    """Un PDF corrompu, un PDF valide et un PDF chiffré de deux pages."""
+    corrupt = tmp_path / "corrupt.pdf"
+    corrupt.write_bytes(b"%PDF-1.7\nnot a PDF body\n")
+    valid = tmp_path / "valid.pdf"
+    _write_pdf(valid, PAGES_TEXT)
+    encrypted = tmp_path / "encrypted.pdf"
+    doc = fitz.open()
+    for text in PAGES_TEXT:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(encrypted), encryption=fitz.PDF_ENCRYPT_AES_256,
+             user_pw="user", owner_pw="owner")
+    doc.close()
+    return [str(corrupt), str(valid), str(encrypted)]
+
+
+def _scan(paths, budget):
+    # Mêmes arguments que scan_bib() : contexte, cache, page_jobs, sections
+    return list(pks.scan_documents(paths, 2, budget, pks.compile_matcher(["co-design"]),
+                                   False, None, 1, None))
+
+
+def test_unreadable_pdfs_are_skipped(pdfs):
+    # Le PDF chiffré dépasse aussi --max-pages : c'est le chiffrement qui est rapporté
+    corrupt, valid, encrypted = _scan(pdfs, Budget(timeout=60, max_pages=1))
+    assert isinstance(corrupt, Skipped) and corrupt.reason == FAILED
+    assert isinstance(valid, Skipped) and valid.reason == PAGES
+    assert isinstance(encrypted, Skipped) and encrypted.reason == ENCRYPTED
+
+    corrupt, valid, encrypted = _scan(pdfs, Budget(timeout=60))
+    assert corrupt.reason == FAILED and encrypted.reason == ENCRYPTED
+    hits, _profile = valid
+    assert [kw for _page, kw, *_rest in hits] == ["co-design"] * 2
+
+
+def test_zero_timeout_skips_every_document(pdfs):
+    results = _scan(pdfs, Budget(timeout=0))
+    assert [(r.reason, r.detail) for r in results] == [(TIMEOUT, "over 0 s")] * 3
+
+
+def test_scan_reports_skipped_documents(tmp_path):
+    bib = _write_library(tmp_path, [PAGES_TEXT, PAGES_TEXT])
+    (tmp_path / "doc2.pdf").write_bytes(b"%PDF-1.7\nnot a PDF body\n")
+    pks.main([str(bib), "-k", "co-design", "--no-cache", "--timeout", "60"])
+    report = (tmp_path / "_bib_keyword_scan_co-design.txt").read_text(encoding="utf-8")
+    assert report.count('"co-design":') == 2
+    skipped = tmp_path / "_bib_keyword_scan_co-design.skipped.txt"
+    assert "doc2.pdf" in skipped.read_text(encoding="utf-8")
@@ -0,0 +1,67 @@
+"""
+Tests for sections.py: headings are anchored at their own line of the page,
+not at an earlier occurrence of the same word in the body text.
+
+Run from this folder with: python -m pytest -q (needs PyMuPDF).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+fitz = pytest.importorskip("fitz")
+
+import pdf_keyword_scan as pks  # noqa: E402
+from sections import page_headings, section_spans  # noqa: E402
+
+# (texte, gras) ligne par ligne : le corps commence par le mot du titre
+LINES = [
+    ("References to the advisory board are given in the text.", False),
+    ("The study was run with an advisory board of autistic adults.", False),
+    ("References", True),
+    ("Smith J. The advisory board. Autism. 2020.", False),
+]
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 72
+    for text, bold in LINES:
+        page.insert_text((72, y), text, fontname="hebo" if bold else "helv", fontsize=11)
+        y += 40
+    path = str(tmp_path / "sections.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_heading_anchored_at_its_line(pdf):
+    with fitz.open(pdf) as doc:
+        headings = page_headings(doc[0])
+    text = pks.clean_page_range(pdf, 0, 1)[0][1]
+    assert headings == [("References", "references", 1)]
+    spans = section_spans(text, headings, "front")
+    assert spans == [(0, "front"), (text.index("References Smith"), "references")]
+
+
+def test_body_hits_before_heading_are_kept(pdf):
+    hits = list(pks.iter_matches(pdf, pks.compile_matcher(["advisory board"]),
+                                 sections=frozenset({"references"})))
+    assert [(h.keyword, h.section) for h in hits] == [("advisory board", "front")] * 2
+
+
+def test_headings_read_with_the_page_text(pdf, tmp_path):
+    with fitz.open(pdf) as doc:
+        expected = {1: page_headings(doc[0])}
+    cache = pks.open_text_cache(str(tmp_path))
+    for _ in range(2):
+        # Extraction, puis texte et titres servis par le cache
+        headings = {}
+        pages = list(pks.iter_pages(pdf, cache, headings=headings))
+        assert pages == pks.clean_page_range(pdf, 0, 1)
+        assert headings == expected
+    cache.close()
@@ -0,0 +1,53 @@
+"""
+Tests for text_normalize.py: the folded text and the map of its positions
+back to the original text, which must slice out the original characters of a
+hit (soft hyphens, ligatures, non-breaking hyphens).
+
+Run from this folder with: python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from text_normalize import folded_pos, normalize, original_span  # noqa: E402
+
+
+def _original(text, word):
+    """Texte d'origine sous l'occurrence de `word` dans le texte replié."""
+    folded, offsets = normalize(text)
+    start = folded.index(word)
+    begin, end = original_span(offsets, start, start + len(word))
+    return text[begin:end]
+
+
+@pytest.mark.parametrize("text, folded, word, original", [
+    # Trait d'union conditionnel : supprimé, mais gardé dans l'occurrence
+    ("The co\u00addesign work", "The codesign work", "codesign", "co\u00addesign"),
+    ("\u00adco-design", "co-design", "co-design", "co-design"),
+    # Ligature : un caractère en donne deux
+    ("a \ufb01eld study", "a field study", "field", "\ufb01eld"),
+    ("a \ufb01eld study", "a field study", "study", "study"),
+    ("e\ufb03cacy", "efficacy", "efficacy", "e\ufb03cacy"),
+    # Trait d'union insécable : même longueur, pas de table de positions
+    ("co\u2011design", "co-design", "co-design", "co\u2011design"),
+    # Les trois à la fois
+    ("\ufb01rst co\u2011de\u00adsign", "first co-design", "co-design", "co\u2011de\u00adsign"),
+])
+def test_offsets_slice_the_original(text, folded, word, original):
+    assert normalize(text)[0] == folded
+    assert _original(text, word) == original
+
+
+def test_offsets_map():
+    folded, offsets = normalize("x\u00ady\ufb01z")
+    assert folded == "xyfiz"
+    # Une position par caractère replié, plus la sentinelle len(text)
+    assert list(offsets) == [0, 2, 3, 3, 4, 5]
+    # Un morceau de ligature renvoie à la ligature entière
+    assert original_span(offsets, 3, 4) == (3, 4)
+    assert folded_pos(offsets, 2) == 1
+    assert folded_pos(offsets, 4) == 4
+    assert normalize("co\u2011design")[1] is None
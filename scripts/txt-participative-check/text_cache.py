@@ -0,0 +1,119 @@
+"""
+text_cache.py
+
+On-disk cache of normalized PDF page text, used by pdf_keyword_scan.py so that
+repeat scans of an unchanged corpus never re-open the PDFs with PyMuPDF.
+
+Entries are keyed by the SHA-1 of the PDF content and by the extractor
+version: a renamed or moved PDF is still a hit, an edited PDF is a miss, and
+bumping the extractor version invalidates every entry. Pages are stored as
+zlib-compressed JSON in a single SQLite file; the least recently used
+documents are evicted once the cache grows past its size bound.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+CACHE_NAME = ".pdf_text_cache.sqlite"
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+Pages = List[Tuple[int, str]]
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-1 of the file content, read in chunks."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TextCache:
+    """
+    SQLite-backed store of extracted pages, safe to share between the worker
+    processes of a --jobs run (each process opens its own connection).
+    """
+
+    def __init__(self, path: str, version: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self._conn = None
+
+    def __getstate__(self):
+        # La connexion n'est pas picklable : chaque worker rouvre la sienne
+        state = dict(self.__dict__)
+        state["_conn"] = None
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " digest TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " used REAL NOT NULL,"
+                " PRIMARY KEY (digest, version))"
+            )
+            # Invalidation : tout ce qui vient d'un autre extracteur est périmé
+            conn.execute("DELETE FROM pages WHERE version != ?", (self.version,))
+            self._evict(conn)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, digest: str) -> Optional[Pages]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data FROM pages WHERE digest = ? AND version = ?",
+            (digest, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE pages SET used = ? WHERE digest = ? AND version = ?",
+            (time.time(), digest, self.version),
+        )
+        conn.commit()
+        return [(page, text) for page, text in json.loads(zlib.decompress(row[0]))]
+
+    def put(self, digest: str, pages: Pages) -> None:
+        data = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (digest, self.version, data, len(data), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Supprime les documents les moins récemment utilisés au-delà de max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT digest, version, size FROM pages ORDER BY used").fetchall()
+        for digest, version, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM pages WHERE digest = ? AND version = ?",
+                         (digest, version))
+            total -= size
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM pages")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,100 @@
+"""
+text_normalize.py
+
+Unicode folding of the page text searched by pdf_keyword_scan.py.
+
+PyMuPDF returns the characters of the PDF as they are: ligatures (ﬁ, ﬂ), soft
+hyphens, non-breaking spaces, non-breaking hyphens, en and em dashes,
+zero-width characters. The keyword patterns only know the ASCII hyphen and
+space, so "co-design" written with a non-breaking hyphen, or "ﬁeld" with a
+ligature, was missed. normalize() folds a page with a single str.translate():
+dashes become "-", spaces " ", soft hyphens and zero-width characters are
+dropped, and every other character is replaced by its NFKC compatibility form
+(ﬁ -> fi, fullwidth letters -> ASCII). The table is precomputed for the
+characters above and extended with the NFKC form of each new character met,
+so each distinct character is normalized once per process. Combining
+sequences are left as they are: the folding is done character by character.
+
+When the folding changes the length of the text, normalize() also returns the
+map from the positions of the folded text back to the original one, so hits
+found in the folded text are reported with the original characters.
+"""
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+# Version du repliement : à incrémenter dès que la table change (empreinte du manifeste)
+NORMALIZE_VERSION = "1"
+
+# Tirets, espaces (blancs Unicode hors ASCII), caractères invisibles et ligatures
+DASHES = "\u2010\u2011\u2012\u2013\u2014\u2015\u2212\ufe58\ufe63\uff0d"
+SPACES = "\u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009" \
+         "\u200a\u202f\u205f\u3000"
+INVISIBLE = "\u00ad\u200b\u200c\u200d\u2060\ufeff"
+LIGATURES = {"\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi",
+             "\ufb04": "ffl", "\ufb05": "st", "\ufb06": "st"}
+
+_TABLE: Dict[int, str] = {
+    **{ord(c): "-" for c in DASHES},
+    **{ord(c): " " for c in SPACES},
+    **{ord(c): "" for c in INVISIBLE},
+    **{ord(c): s for c, s in LIGATURES.items()},
+}
+# Caractères déjà examinés, et ceux dont le remplacement change la longueur
+_KNOWN = set(_TABLE)
+_RESIZED = {chr(code) for code, s in _TABLE.items() if len(s) != 1}
+
+
+def _learn(chars) -> None:
+    """Ajoute à la table la forme NFKC des caractères non ASCII encore inconnus."""
+    for ch in chars:
+        code = ord(ch)
+        if code < 128 or code in _KNOWN:
+            continue
+        _KNOWN.add(code)
+        folded = unicodedata.normalize("NFKC", ch).translate(_TABLE)
+        if folded != ch:
+            _TABLE[code] = folded
+            if len(folded) != 1:
+                _RESIZED.add(ch)
+
+
+def normalize(text: str) -> Tuple[str, Optional[array]]:
+    """
+    (texte replié, positions) : positions[i] est l'indice dans `text` du
+    caractère i du texte replié, plus une sentinelle len(text) ; None quand
+    les deux textes restent alignés caractère pour caractère.
+    """
+    if text.isascii():
+        return text, None
+    chars = set(text)
+    _learn(chars)
+    folded = text.translate(_TABLE)
+    resized = chars & _RESIZED
+    if not resized:
+        return folded, None
+
+    offsets = array("I")
+    pos = 0
+    for m in re.finditer("[" + re.escape("".join(sorted(resized))) + "]", text):
+        offsets.extend(range(pos, m.start()))
+        offsets.extend([m.start()] * len(_TABLE[ord(m.group())]))
+        pos = m.end()
+    offsets.extend(range(pos, len(text) + 1))
+    return folded, offsets
+
+
+def original_span(offsets: Optional[array], start: int, end: int) -> Tuple[int, int]:
+    """Intervalle du texte d'origine correspondant à [start, end) du texte replié."""
+    if offsets is None:
+        return start, end
+    if end <= start:
+        return offsets[start], offsets[start]
+    return offsets[start], offsets[end - 1] + 1
+
+
+def folded_pos(offsets: Optional[array], pos: int) -> int:
+    """Position dans le texte replié du caractère `pos` du texte d'origine (ou du suivant)."""
+    return pos if offsets is None else bisect_left(offsets, pos)